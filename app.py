@@ -1,31 +1,33 @@
 from src.Data_Science_Project.logger import logging
 from src.Data_Science_Project.exception import CustomException
 
-from src.Data_Science_Project.components.data_ingestion import DataIngestion
-from src.Data_Science_Project.components.data_ingestion import DataIngestionConfig
-
-from src.Data_Science_Project.components.data_transformation import DataTransformation
-from src.Data_Science_Project.components.data_transformation import DataTransformationConfig
-
-from src.Data_Science_Project.components.model_trainer import ModelTrainer
-from src.Data_Science_Project.components.model_trainer import ModelTrainerConfig
+from src.Data_Science_Project.pipelines.training_pipeline import TrainingPipeline
 
 import sys
 import os
 
 # Check MLflow configuration
 def check_mlflow_config():
+    """
+    Logs where runs will be tracked. Without MLFLOW_TRACKING_URI the tracker
+    uses the local ./mlruns store, so a missing DagsHub setup is not fatal.
+    """
     tracking_uri = os.getenv("MLFLOW_TRACKING_URI")
     username = os.getenv("MLFLOW_TRACKING_USERNAME")
     password = os.getenv("MLFLOW_TRACKING_PASSWORD")
-    
+
+    if not tracking_uri:
+        logging.warning(
+            "MLFLOW_TRACKING_URI is not set, tracking runs in the local ./mlruns store. "
+            "Run setup_mlflow.py or setup_mlflow.bat to track on DagsHub."
+        )
+        return False
+
     logging.info(f"MLflow Tracking URI: {tracking_uri}")
     logging.info(f"MLflow Username: {username}")
     logging.info(f"MLflow Password: {'Set' if password else 'Not set'}")
-    
-    if not all([tracking_uri, username, password]):
-        logging.warning("MLflow environment variables not properly configured!")
-        logging.warning("Run setup_mlflow.py or setup_mlflow.bat to configure MLflow for DagsHub")
+    if not (username and password):
+        logging.warning("MLFLOW_TRACKING_USERNAME/PASSWORD not set, a remote tracking server may reject the runs")
         return False
     return True
 
@@ -33,30 +35,20 @@ def check_mlflow_config():
 if __name__ == "__main__":
     logging.info("Starting the application...")
 
-    # Check MLflow configuration
-    if not check_mlflow_config():
-        logging.error("MLflow not properly configured. Please set up environment variables first.")
-        sys.exit(1)
+    check_mlflow_config()
 
     try:
-        # data_transformation_config = DataTransformationConfig()
-
-        data_ingestion = DataIngestion()
-        train_data_path, test_data_path = data_ingestion.initiate_data_ingestion()
-        # logging.info(f"Train data saved at: {train_data_path}")
-        # logging.info(f"Test data saved at: {test_data_path}")
-
-        
-        # data_transformation_config = DataTransformationConfig()
-
-        data_transformation = DataTransformation()
-        train_arr, test_arr,_ = data_transformation.initiate_data_transformation(train_data_path, test_data_path)
-
-
-        ## Model Training
-        model_trainer = ModelTrainer()
-        r2 = model_trainer.initiate_model_trainer(train_arr, test_arr)
-        print(f"Model training completed. R² score: {r2}")
+        # Ingestion -> transformation -> training -> prediction table.
+        # Stages whose inputs and config did not change are restored from the
+        # stage cache instead of being re-run.
+        training_pipeline = TrainingPipeline()
+        if training_pipeline.config.incremental_data_path:
+            # Only the rows that arrived since the last model.pkl
+            report = training_pipeline.run_incremental()
+            print(f"Incremental training completed: {report}")
+        else:
+            r2 = training_pipeline.run()
+            print(f"Model training completed. R² score: {r2}")
 
 
     except Exception as e:
@@ -1,14 +1,52 @@
-from flask import Flask,request,render_template
+from flask import Flask,request,render_template,jsonify,Response,stream_with_context,g
+import io
+import time
+import shutil
+import tempfile
 import numpy as np
 import pandas as pd
 
-from sklearn.preprocessing import StandardScaler
-from src.Data_Science_Project.pipelines.prediction_pipeline import CustomData,PredictPipeline
+from src.Data_Science_Project.pipelines.prediction_pipeline import CustomData,PredictPipeline,get_artifact_cache
+from src.Data_Science_Project.pipelines.batching import MicroBatchConfig,get_micro_batcher
+from src.Data_Science_Project.components.model_monitoring import get_drift_monitor,clear_monitoring_snapshots
+from src.Data_Science_Project.telemetry import get_registry
+from src.Data_Science_Project.logger import sampled_debug
+from src.Data_Science_Project.pipelines.batch_prediction import (
+    INVALID_INPUT_ERRORS,
+    BatchPredictor,
+    iter_csv_chunks,
+    iter_ndjson_chunks,
+    iter_record_chunks,
+)
 
 application=Flask(__name__)
 
 app=application
 
+# Load the preprocessor and model once, before the first request comes in
+get_artifact_cache().warm()
+micro_batching=MicroBatchConfig().enabled
+
+telemetry=get_registry()
+REQUEST_SECONDS=telemetry.histogram("http_request_seconds","Time to handle a request, per endpoint",["endpoint"])
+REQUESTS=telemetry.counter("http_requests_total","Requests handled, per endpoint and status code",["endpoint","status"])
+REQUEST_PHASE_SECONDS=telemetry.histogram(
+    "http_request_phase_seconds","Time spent in each phase of a /predictdata request",["phase"]
+)
+
+@app.before_request
+def start_request_timer():
+    g.request_start=time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    # Streamed responses (/predictbatch) are timed up to their first chunk
+    endpoint=request.endpoint or 'unmatched'
+    REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter()-g.request_start)
+    REQUESTS.labels(endpoint,str(response.status_code)).inc()
+    telemetry.maybe_snapshot()
+    return response
+
 ## Route for a home page
 
 @app.route('/')
@@ -20,26 +58,121 @@ def predict_datapoint():
     if request.method=='GET':
         return render_template('home.html')
     else:
+        timer=REQUEST_PHASE_SECONDS.timer()
         data=CustomData(
             gender=request.form.get('gender'),
             race_ethnicity=request.form.get('ethnicity'),
             parental_level_of_education=request.form.get('parental_level_of_education'),
             lunch=request.form.get('lunch'),
             test_preparation_course=request.form.get('test_preparation_course'),
-            reading_score=float(request.form.get('writing_score')),
-            writing_score=float(request.form.get('reading_score'))
+            reading_score=float(request.form.get('reading_score')),
+            writing_score=float(request.form.get('writing_score'))
 
         )
+        timer.lap('parse_form')
         pred_df=data.get_data_as_data_frame()
-        print(pred_df)
-        print("Before Prediction")
+        timer.lap('build_frame')
 
-        predict_pipeline=PredictPipeline()
-        print("Mid Prediction")
+        # With PREDICTION_MICROBATCH=1 concurrent requests share one predict call
+        predict_pipeline=get_micro_batcher() if micro_batching else PredictPipeline()
         results=predict_pipeline.predict(pred_df)
-        print("after Prediction")
-        return render_template('home.html',results=results[0])
+        timer.lap('predict')
+        sampled_debug("Prediction served",prediction=float(results[0]),**vars(data))
+        page=render_template('home.html',results=results[0])
+        timer.lap('render')
+        return page
+
+@app.route('/predictbatch',methods=['POST'])
+def predict_batch():
+    """
+    Scores many students at once. Accepts a JSON array, NDJSON
+    (application/x-ndjson) or a CSV body/upload (form field "file"), and
+    streams back one prediction per input row, chunk by chunk.
+    """
+    batch_predictor=BatchPredictor()
+    chunk_size=batch_predictor.config.chunk_size
+    upload=None
+
+    if 'file' in request.files:
+        # Flask closes uploaded files once the view returns, before the
+        # streamed response is generated, so spool the upload to our own file
+        upload=tempfile.TemporaryFile()
+        shutil.copyfileobj(request.files['file'].stream,upload)
+        upload.seek(0)
+        chunks=iter_csv_chunks(upload,chunk_size)
+        output,mimetype='csv','text/csv'
+    elif request.mimetype=='text/csv':
+        chunks=iter_csv_chunks(request.stream,chunk_size)
+        output,mimetype='csv','text/csv'
+    elif request.mimetype in ('application/x-ndjson','application/jsonl'):
+        # Buffer the raw body so line iteration is not one read per line
+        chunks=iter_ndjson_chunks(io.BufferedReader(request.stream,1<<16),chunk_size)
+        output,mimetype='ndjson','application/x-ndjson'
+    else:
+        records=request.get_json(silent=True)
+        if not isinstance(records,list):
+            return jsonify(error="Expected a JSON array of records"),400
+        chunks=iter_record_chunks(records,chunk_size)
+        output,mimetype='ndjson','application/x-ndjson'
+
+    scored=batch_predictor.predict_chunks(chunks)
+    # Score the first chunk up front so bad input is reported as a 400
+    # instead of failing halfway through a streamed 200 response; any
+    # other error (missing artifacts, a broken model) is a 500
+    def close_upload():
+        # The CSV reader first, as closing it flushes the file
+        chunks.close()
+        upload.close()
+
+    try:
+        first=next(scored,None)
+    except Exception as e:
+        if upload is not None:
+            close_upload()
+        if isinstance(e,INVALID_INPUT_ERRORS):
+            return jsonify(error=str(e)),400
+        raise
+
+    def scored_chunks():
+        if first is not None:
+            yield first
+            yield from scored
+
+    render=BatchPredictor.render_csv if output=='csv' else BatchPredictor.render_ndjson
+    response=Response(stream_with_context(render(scored_chunks())),mimetype=mimetype)
+    if upload is not None:
+        # Called by the server once the stream is sent or the client is gone
+        response.call_on_close(close_upload)
+    return response
+
+@app.route('/artifacts/stats')
+def artifact_stats():
+    stats=get_artifact_cache().stats()
+    if micro_batching:
+        stats['micro_batching']=get_micro_batcher().stats()
+    return jsonify(stats)
+
+@app.route('/monitoring/drift')
+def drift_report():
+    """
+    Input and prediction drift of the traffic served so far (all workers)
+    against the training baseline.
+    """
+    monitor=get_drift_monitor()
+    if monitor is None:
+        return jsonify(error="Drift monitoring is disabled or has no baseline"),404
+    return jsonify(monitor.report())
+
+@app.route('/metrics')
+def metrics():
+    """
+    Request, prediction and training timings of all workers in the
+    Prometheus text format.
+    """
+    return Response(telemetry.render(),content_type='text/plain; version=0.0.4; charset=utf-8')
     
 
 if __name__=="__main__":
+    telemetry.clear_snapshots()
+    clear_monitoring_snapshots()
     app.run(host="0.0.0.0")        
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""
+Import-time check for the serving path.
+
+    python -m src.Data_Science_Project.benchmarks.import_time [--runs N] [--budget-ms MS]
+
+Imports the serving modules in fresh interpreters under `python -X importtime`
+from an empty working directory, writes a JSON report and exits with status 1
+when the median import time is over budget, a training-only dependency got
+imported, or importing printed anything or created files.
+tests/test_import_time.py runs the same check under pytest.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+from dataclasses import dataclass, field, asdict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+@dataclass
+class ImportTimeConfig:
+    # What the web process imports before it loads any artifact
+    modules: list = field(default_factory=lambda: [
+        "flask",
+        "src.Data_Science_Project.pipelines.prediction_pipeline",
+        "src.Data_Science_Project.pipelines.batching",
+        "src.Data_Science_Project.pipelines.batch_prediction",
+    ])
+    # Training-only or optional dependencies that must stay lazy
+    forbidden_modules: list = field(default_factory=lambda: [
+        "sklearn", "scipy", "xgboost", "catboost", "mlflow", "pymysql", "dotenv", "matplotlib", "seaborn",
+    ])
+    runs: int = 5
+    budget_ms: float = float(os.getenv("IMPORT_TIME_BUDGET_MS", 1200))
+    report_file_path: str = os.path.join("artifacts", "import_time.json")
+
+
+def parse_importtime(stderr):
+    """
+    Returns {module: (self_us, cumulative_us)} from `-X importtime` output.
+    """
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def measure_once(config: ImportTimeConfig):
+    code = "; ".join(f"import {module}" for module in config.modules)
+    code += "; import sys; print('\\n'.join(sorted(sys.modules)), file=sys.stderr)"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [REPO_ROOT, os.getenv("PYTHONPATH")]))}
+    with tempfile.TemporaryDirectory() as cwd:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=cwd, env=env, capture_output=True, text=True,
+        )
+        created_files = sorted(os.listdir(cwd))
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing the serving modules failed:\n{result.stderr[-2000:]}")
+
+    timings = parse_importtime(result.stderr)
+    loaded = {line.strip() for line in result.stderr.splitlines() if not line.startswith("import time:")}
+    return {
+        "total_ms": sum(self_us for self_us, _ in timings.values()) / 1000,
+        "timings": timings,
+        "forbidden": sorted({
+            name.split(".")[0] for name in loaded if name.split(".")[0] in config.forbidden_modules
+        }),
+        "stdout": result.stdout,
+        "created_files": created_files,
+    }
+
+
+def run_import_check(config: ImportTimeConfig = None):
+    """
+    Returns the report dict; report["passed"] tells whether every check held.
+    """
+    config = config or ImportTimeConfig()
+    runs = [measure_once(config) for _ in range(config.runs)]
+    median_ms = statistics.median(run["total_ms"] for run in runs)
+    last = runs[-1]
+    slowest = sorted(last["timings"].items(), key=lambda item: item[1][0], reverse=True)[:15]
+
+    failures = []
+    if median_ms > config.budget_ms:
+        failures.append(f"median import time {median_ms:.0f}ms is over the {config.budget_ms:.0f}ms budget")
+    if last["forbidden"]:
+        failures.append(f"training-only modules imported: {last['forbidden']}")
+    if last["stdout"]:
+        failures.append(f"importing printed to stdout: {last['stdout'][:200]!r}")
+    if last["created_files"]:
+        failures.append(f"importing created files: {last['created_files']}")
+
+    return {
+        "config": asdict(config),
+        "runs_ms": [round(run["total_ms"], 1) for run in runs],
+        "median_ms": round(median_ms, 1),
+        "slowest_modules_ms": {name: round(self_us / 1000, 1) for name, (self_us, _) in slowest},
+        "failures": failures,
+        "passed": not failures,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=ImportTimeConfig.runs)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    parser.add_argument("--report", default=None, help="where to write the JSON report")
+    args = parser.parse_args(argv)
+
+    config = ImportTimeConfig(runs=args.runs)
+    if args.budget_ms is not None:
+        config.budget_ms = args.budget_ms
+    if args.report is not None:
+        config.report_file_path = args.report
+
+    report = run_import_check(config)
+    os.makedirs(os.path.dirname(config.report_file_path) or ".", exist_ok=True)
+    with open(config.report_file_path, "w") as file_obj:
+        json.dump(report, file_obj, indent=2)
+
+    print(f"Serving import time: median {report['median_ms']}ms over {config.runs} runs "
+          f"(budget {config.budget_ms:.0f}ms)")
+    for name, self_ms in report["slowest_modules_ms"].items():
+        print(f"  {self_ms:8.1f}ms  {name}")
+    for failure in report["failures"]:
+        print(f"FAIL: {failure}")
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
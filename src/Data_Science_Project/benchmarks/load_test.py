@@ -0,0 +1,165 @@
+"""
+Load test for the pre-fork server.
+
+    python -m src.Data_Science_Project.benchmarks.load_test --workers 1 2 4 --clients 16 --duration 10
+
+For each worker count, starts `python -m src.Data_Science_Project.server` on a
+free port from the current directory (which must hold the trained
+artifacts/), posts the /predictdata form from client processes over
+keep-alive connections and reports requests/s, latency percentiles and the
+memory of every worker.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import http.client
+import multiprocessing
+from dataclasses import dataclass, field, asdict
+from urllib.parse import urlencode
+
+import numpy as np
+
+from src.Data_Science_Project.server import worker_memory
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+FORM = {
+    "gender": "female",
+    "ethnicity": "group B",
+    "parental_level_of_education": "bachelor's degree",
+    "lunch": "standard",
+    "test_preparation_course": "none",
+    "reading_score": "72",
+    "writing_score": "74",
+}
+
+
+@dataclass
+class LoadTestConfig:
+    worker_counts: list = field(default_factory=lambda: [1, 2, 4])
+    clients: int = 16
+    duration: float = 10.0
+    startup_timeout: float = 60.0
+    report_file_path: str = os.path.join("artifacts", "load_test.json")
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Server did not start listening on port {port} within {timeout}s")
+
+
+def _client(args):
+    port, duration = args
+    body = urlencode(FORM)
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            conn.request("POST", "/predictdata", body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+                continue
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+    return latencies, errors
+
+
+def _children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as file_obj:
+            return [int(child) for child in file_obj.read().split()]
+    except OSError:
+        return []
+
+
+def run_load_test(workers, config: LoadTestConfig):
+    port = _free_port()
+    env = {**os.environ, "SERVER_WORKERS": str(workers), "SERVER_PORT": str(port), "SERVER_HOST": "127.0.0.1",
+           "PYTHONPATH": os.pathsep.join(filter(None, [REPO_ROOT, os.getenv("PYTHONPATH")]))}
+    server = subprocess.Popen([sys.executable, "-m", "src.Data_Science_Project.server"], env=env)
+    try:
+        _wait_for_port(port, config.startup_timeout)
+        with multiprocessing.Pool(config.clients) as pool:
+            results = pool.map(_client, [(port, config.duration)] * config.clients)
+        memory = [worker_memory(pid) for pid in _children(server.pid)]
+        parent_memory = worker_memory(server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    latencies = np.array([latency for result, _ in results for latency in result])
+    memory = [usage for usage in memory if usage is not None]
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in results),
+        "requests_per_s": round(len(latencies) / config.duration, 1),
+        "latency_ms": {
+            f"p{q}": round(float(np.percentile(latencies, q)) * 1000, 2) if len(latencies) else None
+            for q in (50, 90, 99)
+        },
+        "parent_memory_mb": parent_memory,
+        "worker_memory_mb": memory,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=LoadTestConfig().worker_counts)
+    parser.add_argument("--clients", type=int, default=LoadTestConfig.clients)
+    parser.add_argument("--duration", type=float, default=LoadTestConfig.duration)
+    parser.add_argument("--report", default=LoadTestConfig.report_file_path)
+    args = parser.parse_args(argv)
+
+    config = LoadTestConfig(
+        worker_counts=args.workers, clients=args.clients, duration=args.duration, report_file_path=args.report
+    )
+    runs = [run_load_test(workers, config) for workers in config.worker_counts]
+
+    base = runs[0]["requests_per_s"] / runs[0]["workers"] if runs[0]["requests_per_s"] else None
+    for run in runs:
+        run["scaling_efficiency"] = round(run["requests_per_s"] / (base * run["workers"]), 2) if base else None
+        memory = run["worker_memory_mb"]
+        mean = {key: np.mean([usage[key] for usage in memory]) for key in ("rss", "pss", "private")} if memory else {}
+        print(
+            f"{run['workers']} workers: {run['requests_per_s']} req/s "
+            f"(efficiency {run['scaling_efficiency']}), p50 {run['latency_ms']['p50']}ms "
+            f"p99 {run['latency_ms']['p99']}ms, errors {run['errors']}"
+            + (f", per worker rss {mean['rss']:.0f}MB pss {mean['pss']:.0f}MB private {mean['private']:.0f}MB"
+               if mean else "")
+        )
+
+    os.makedirs(os.path.dirname(config.report_file_path) or ".", exist_ok=True)
+    with open(config.report_file_path, "w") as file_obj:
+        json.dump({"config": asdict(config), "cpu_count": os.cpu_count(), "runs": runs}, file_obj, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
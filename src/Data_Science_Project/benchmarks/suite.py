@@ -0,0 +1,296 @@
+"""
+Benchmark suite for the training stages and the serving path.
+
+    python -m src.Data_Science_Project.benchmarks.suite run --rows 100000 --output results.json
+    python -m src.Data_Science_Project.benchmarks.suite compare baseline.json results.json
+
+`run` generates a synthetic dataset of --rows rows, then times ingestion,
+transformation, the model search (evaluate_model), PredictPipeline and the
+/predictdata endpoint inside a scratch directory, and writes throughput,
+latency percentiles and peak RSS per stage to a JSON file.
+
+`compare` lists every metric of two result files and exits with status 1
+when one got worse by more than --threshold (10% by default).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.Data_Science_Project.logger import logging
+from src.Data_Science_Project.utils import track_resources, save_object, evaluate_model
+from src.Data_Science_Project.benchmarks.synthetic_data import SyntheticDataConfig, SyntheticDataGenerator
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# +1 when a larger value is better, -1 when a smaller one is
+METRIC_DIRECTIONS = {
+    "rows_per_s": 1,
+    "requests_per_s": 1,
+    "wall_s": -1,
+    "peak_rss_mb": -1,
+    "p50_ms": -1,
+    "p90_ms": -1,
+    "p99_ms": -1,
+}
+
+FORM_FIELDS = {
+    "gender": "gender",
+    "ethnicity": "race/ethnicity",
+    "parental_level_of_education": "parental level of education",
+    "lunch": "lunch",
+    "test_preparation_course": "test preparation course",
+    "reading_score": "reading score",
+    "writing_score": "writing score",
+}
+
+
+@dataclass
+class BenchmarkConfig:
+    n_rows: int = 100_000
+    # Scratch directory the stages run in (their artifacts/ goes there)
+    work_dir: str = os.path.join("artifacts", "benchmark")
+    output_file_path: str = os.path.join("artifacts", "benchmark_results.json")
+    seed: int = 42
+    # Model families searched in the evaluate_model stage, grids from ModelTrainer
+    models: list = field(default_factory=lambda: ["Linear Regression", "Decision Tree"])
+    predict_calls: int = 2000
+    batch_rows: int = 10_000
+    endpoint_calls: int = 1000
+    # Relative change that counts as a regression in compare mode
+    regression_threshold: float = 0.10
+
+
+def latency_summary(latencies):
+    latencies = np.asarray(latencies)
+    return {
+        "requests": len(latencies),
+        "requests_per_s": round(len(latencies) / latencies.sum(), 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "p90_ms": round(float(np.percentile(latencies, 90)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class BenchmarkSuite:
+    def __init__(self, config: BenchmarkConfig = None):
+        self.config = config or BenchmarkConfig()
+        self.stages = {}
+
+    def _timed(self, name, n_rows, func):
+        with track_resources() as usage:
+            result = func()
+        self.stages[name] = {
+            "rows": n_rows,
+            "wall_s": round(usage.wall_time, 3),
+            "cpu_s": round(usage.cpu_time, 3),
+            "rows_per_s": round(n_rows / usage.wall_time, 1) if usage.wall_time else None,
+            "peak_rss_mb": round(usage.peak_rss_mb, 1) if usage.peak_rss_mb is not None else None,
+        }
+        logging.info(f"Benchmark {name}: {self.stages[name]}")
+        return result
+
+    def _bench_training(self, source_path):
+        from src.Data_Science_Project.components.data_ingestion import DataIngestion
+        from src.Data_Science_Project.components.data_transformation import DataTransformation
+        from src.Data_Science_Project.components.model_trainer import ModelTrainer
+        from src.Data_Science_Project.components.tree_export import ModelExportConfig, ModelExporter
+        from src.Data_Science_Project.components.model_monitoring import (
+            ModelMonitorConfig,
+            MonitoringBaselineBuilder,
+        )
+
+        data_ingestion = DataIngestion()
+        data_ingestion.ingestion_config.source_data_path = source_path
+        train_path, test_path = self._timed(
+            "ingestion", self.config.n_rows, data_ingestion.initiate_data_ingestion
+        )
+
+        data_transformation = DataTransformation()
+        self._timed(
+            "transformation", self.config.n_rows,
+            lambda: data_transformation.initiate_data_transformation(train_path, test_path),
+        )
+
+        (X_train, y_train), (X_test, y_test) = data_transformation.load_transformed_arrays()
+        model_trainer = ModelTrainer()
+        models = {name: model for name, model in model_trainer.get_models().items() if name in self.config.models}
+        params = {name: grid for name, grid in model_trainer.get_params().items() if name in models}
+        report = self._timed(
+            "evaluate_model", len(y_train),
+            lambda: evaluate_model(X_train, y_train, X_test, y_test, models, params),
+        )
+        best_model_name = max(report, key=report.get)
+        save_object(model_trainer.model_trainer_config.trained_model_file_path, models[best_model_name])
+
+        # Serve the way production does: exported model and drift monitor
+        ModelExporter(ModelExportConfig(test_data_path=test_path)).initiate_model_export()
+        MonitoringBaselineBuilder(ModelMonitorConfig(train_data_path=train_path)).initiate_baseline_build()
+        return test_path
+
+    def _bench_predict(self, test_path):
+        from src.Data_Science_Project.utils import read_frame
+        from src.Data_Science_Project.pipelines.prediction_pipeline import PredictPipeline, get_artifact_cache
+
+        get_artifact_cache().warm()
+        features = read_frame(test_path).drop(columns=["math score"])
+        predict_pipeline = PredictPipeline()
+
+        rows = [features.iloc[i:i + 1] for i in range(min(self.config.predict_calls, len(features)))]
+        latencies = []
+        for row in rows:
+            start = time.perf_counter()
+            predict_pipeline.predict(row)
+            latencies.append(time.perf_counter() - start)
+        self.stages["predict_single_row"] = latency_summary(latencies)
+
+        batch = features.iloc[:self.config.batch_rows]
+        self._timed("predict_batch", len(batch), lambda: predict_pipeline.predict(batch))
+        return features
+
+    def _bench_endpoint(self, features):
+        if REPO_ROOT not in sys.path:
+            sys.path.insert(0, REPO_ROOT)
+        from application import app
+
+        client = app.test_client()
+        records = features.iloc[:self.config.endpoint_calls].astype(str).to_dict("records")
+        latencies = []
+        for record in records:
+            form = {name: record[col] for name, col in FORM_FIELDS.items()}
+            start = time.perf_counter()
+            response = client.post("/predictdata", data=form)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(f"/predictdata returned {response.status_code}")
+        self.stages["predictdata_endpoint"] = latency_summary(latencies)
+
+    def run(self):
+        config = self.config
+        cwd = os.getcwd()
+        source_path = os.path.abspath(SyntheticDataConfig.source_data_path)
+        os.makedirs(config.work_dir, exist_ok=True)
+        os.chdir(config.work_dir)
+        try:
+            synthetic_path = self._timed(
+                "synthetic_data", config.n_rows,
+                SyntheticDataGenerator(SyntheticDataConfig(
+                    source_data_path=source_path,
+                    output_path=os.path.join("data", "synthetic.csv"),
+                    n_rows=config.n_rows,
+                    seed=config.seed,
+                )).generate,
+            )
+            test_path = self._bench_training(synthetic_path)
+            features = self._bench_predict(test_path)
+            self._bench_endpoint(features)
+        finally:
+            os.chdir(cwd)
+
+        import sklearn
+
+        return {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "git_commit": _git_commit(),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "pandas": pd.__version__,
+                "sklearn": sklearn.__version__,
+                "cpu_count": os.cpu_count(),
+                "config": asdict(config),
+            },
+            "stages": self.stages,
+        }
+
+
+def compare_results(baseline, current, threshold=0.10):
+    """
+    Returns one row per metric found in both result files, with
+    "regression" set where it got worse by more than `threshold`.
+    """
+    rows = []
+    for stage, metrics in baseline["stages"].items():
+        for metric, direction in METRIC_DIRECTIONS.items():
+            old = metrics.get(metric)
+            new = current["stages"].get(stage, {}).get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            rows.append({
+                "stage": stage,
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change": round(change, 4),
+                "regression": direction * change < -threshold,
+            })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--rows", type=int, default=BenchmarkConfig.n_rows)
+    run_parser.add_argument("--output", default=BenchmarkConfig.output_file_path)
+    run_parser.add_argument("--work-dir", default=BenchmarkConfig.work_dir)
+    run_parser.add_argument("--models", nargs="+", default=None)
+
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=BenchmarkConfig.regression_threshold)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        config = BenchmarkConfig(n_rows=args.rows, output_file_path=args.output, work_dir=args.work_dir)
+        if args.models:
+            config.models = args.models
+        results = BenchmarkSuite(config).run()
+        os.makedirs(os.path.dirname(config.output_file_path) or ".", exist_ok=True)
+        with open(config.output_file_path, "w") as file_obj:
+            json.dump(results, file_obj, indent=2)
+        for stage, metrics in results["stages"].items():
+            print(f"{stage:22s} " + "  ".join(f"{key}={value}" for key, value in metrics.items()))
+        return 0
+
+    with open(args.baseline) as file_obj:
+        baseline = json.load(file_obj)
+    with open(args.current) as file_obj:
+        current = json.load(file_obj)
+    if baseline["meta"]["config"]["n_rows"] != current["meta"]["config"]["n_rows"]:
+        print("Warning: the two runs used different row counts")
+
+    rows = compare_results(baseline, current, args.threshold)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"{row['stage']:22s} {row['metric']:15s} {row['baseline']:>12} -> {row['current']:>12} "
+              f"{row['change']:+8.1%}  {flag}")
+    regressions = [row for row in rows if row["regression"]]
+    print(f"{len(regressions)} regressions over {args.threshold:.0%} "
+          f"({baseline['meta']['git_commit']} -> {current['meta']['git_commit']})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
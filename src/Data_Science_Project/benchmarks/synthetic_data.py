@@ -0,0 +1,101 @@
+"""
+Synthetic students data at any scale.
+
+    python -m src.Data_Science_Project.benchmarks.synthetic_data --rows 1000000 --output artifacts/synthetic.csv
+
+Rows are drawn from notebook/data/raw.csv: the categorical columns of a
+random source row are kept as they are, so the joint category
+distribution matches the real data, and its three scores get Gaussian
+noise so rows are not copies while the scores stay correlated with each
+other and with the categories. Output is written chunk by chunk, so
+memory does not grow with the row count.
+"""
+import os
+import sys
+import argparse
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.Data_Science_Project.exception import CustomException
+from src.Data_Science_Project.logger import logging
+from src.Data_Science_Project.schema import CATEGORICAL_COLUMNS, SCORE_COLUMNS
+
+
+@dataclass
+class SyntheticDataConfig:
+    source_data_path: str = os.path.join("notebook", "data", "raw.csv")
+    output_path: str = os.path.join("artifacts", "synthetic.csv")
+    n_rows: int = 100_000
+    seed: int = 42
+    # Standard deviation of the noise added to each resampled score, and
+    # how correlated it is across the three scores of a row (the real
+    # scores correlate at 0.8-0.95, independent noise would dilute that)
+    score_noise_sd: float = 3.0
+    score_noise_correlation: float = 0.9
+    chunk_size: int = 1_000_000
+
+
+def generate_synthetic_frame(source, n_rows, rng, score_noise_sd=3.0, score_noise_correlation=0.9):
+    """
+    Returns n_rows rows resampled from `source` with noisy scores.
+    """
+    picks = rng.integers(0, len(source), size=n_rows)
+    frame = {}
+    for col in CATEGORICAL_COLUMNS:
+        categorical = pd.Categorical(source[col])
+        frame[col] = pd.Categorical.from_codes(categorical.codes[picks], categorical.categories)
+    shared_noise = rng.standard_normal(n_rows) * np.sqrt(score_noise_correlation)
+    for col in SCORE_COLUMNS:
+        noise = shared_noise + rng.standard_normal(n_rows) * np.sqrt(1 - score_noise_correlation)
+        scores = source[col].to_numpy(dtype=np.float64)[picks] + score_noise_sd * noise
+        frame[col] = np.clip(np.rint(scores), 0, 100).astype(np.uint8)
+    return pd.DataFrame(frame, columns=list(source.columns))
+
+
+class SyntheticDataGenerator:
+    def __init__(self, config: SyntheticDataConfig = None):
+        self.config = config or SyntheticDataConfig()
+
+    def generate(self):
+        try:
+            config = self.config
+            source = pd.read_csv(config.source_data_path)
+            rng = np.random.default_rng(config.seed)
+            os.makedirs(os.path.dirname(config.output_path) or ".", exist_ok=True)
+
+            tmp_path = config.output_path + ".tmp"
+            written = 0
+            while written < config.n_rows:
+                n_rows = min(config.chunk_size, config.n_rows - written)
+                chunk = generate_synthetic_frame(
+                    source, n_rows, rng, config.score_noise_sd, config.score_noise_correlation
+                )
+                chunk.to_csv(tmp_path, index=False, header=written == 0, mode="w" if written == 0 else "a")
+                written += n_rows
+            os.replace(tmp_path, config.output_path)
+
+            logging.info(f"Wrote {written} synthetic rows to {config.output_path}")
+            return config.output_path
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=SyntheticDataConfig.n_rows)
+    parser.add_argument("--output", default=SyntheticDataConfig.output_path)
+    parser.add_argument("--seed", type=int, default=SyntheticDataConfig.seed)
+    args = parser.parse_args(argv)
+
+    path = SyntheticDataGenerator(
+        SyntheticDataConfig(n_rows=args.rows, output_path=args.output, seed=args.seed)
+    ).generate()
+    print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
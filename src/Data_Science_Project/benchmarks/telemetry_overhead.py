@@ -0,0 +1,139 @@
+"""
+Overhead of the runtime telemetry.
+
+    python -m src.Data_Science_Project.benchmarks.telemetry_overhead [--iterations N] [--predict-calls N]
+
+Times the primitives the hooks are built from (a phase lap, a histogram
+observation, a counter increment) with telemetry on and off, then runs
+single-row PredictPipeline.predict calls from the current directory's
+artifacts/ in alternating blocks with telemetry on and off and reports the
+median latency of each. Writes a JSON report.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from dataclasses import dataclass, asdict
+
+from src.Data_Science_Project.telemetry import MetricsRegistry, TelemetryConfig, get_registry
+
+
+@dataclass
+class TelemetryOverheadConfig:
+    iterations: int = 200_000
+    predict_calls: int = 2000
+    # predict_calls are split into blocks that alternate on/off, so drift
+    # in machine load hits both sides alike
+    block_size: int = 100
+    test_data_path: str = os.path.join("artifacts", "test.csv")
+    report_file_path: str = os.path.join("artifacts", "telemetry_overhead.json")
+
+
+def _ns_per_call(func, iterations):
+    start = time.perf_counter_ns()
+    func(iterations)
+    return (time.perf_counter_ns() - start) / iterations
+
+
+def measure_primitives(iterations):
+    """
+    Nanoseconds per call of each primitive, minus an empty loop.
+    """
+    results = {}
+    for enabled in (True, False):
+        registry = MetricsRegistry(TelemetryConfig(enabled=enabled))
+        histogram = registry.histogram("overhead_seconds", "", ["phase"])
+        counter = registry.counter("overhead_total", "")
+
+        def empty(n):
+            for _ in range(n):
+                pass
+
+        def lap(n):
+            timer = histogram.timer()
+            for _ in range(n):
+                timer.lap("phase")
+
+        def observe(n):
+            for _ in range(n):
+                histogram.labels("phase").observe(0.001)
+
+        def inc(n):
+            for _ in range(n):
+                counter.labels().inc()
+
+        baseline = _ns_per_call(empty, iterations)
+        side = "enabled" if enabled else "disabled"
+        results[side] = {
+            name: round(_ns_per_call(func, iterations) - baseline, 1)
+            for name, func in (("lap_ns", lap), ("observe_ns", observe), ("counter_inc_ns", inc))
+        }
+    return results
+
+
+def measure_predict(config: TelemetryOverheadConfig):
+    """
+    Median single-row predict latency in µs with telemetry on and off.
+    """
+    from src.Data_Science_Project.utils import read_frame
+    from src.Data_Science_Project.pipelines.prediction_pipeline import PredictPipeline, get_artifact_cache
+
+    get_artifact_cache().warm()
+    features = read_frame(config.test_data_path).drop(columns=["math score"])
+    rows = [features.iloc[i % len(features):i % len(features) + 1] for i in range(config.block_size)]
+    predict_pipeline = PredictPipeline()
+    registry = get_registry()
+    was_enabled = registry.config.enabled
+
+    latencies = {True: [], False: []}
+    try:
+        for block in range(2 * config.predict_calls // config.block_size):
+            enabled = block % 2 == 0
+            registry.config.enabled = enabled
+            for row in rows:
+                start = time.perf_counter()
+                predict_pipeline.predict(row)
+                latencies[enabled].append(time.perf_counter() - start)
+    finally:
+        registry.config.enabled = was_enabled
+
+    on = statistics.median(latencies[True]) * 1e6
+    off = statistics.median(latencies[False]) * 1e6
+    return {
+        "calls_per_side": len(latencies[True]),
+        "enabled_p50_us": round(on, 1),
+        "disabled_p50_us": round(off, 1),
+        "overhead_us": round(on - off, 1),
+        "overhead_pct": round((on - off) / off * 100, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=TelemetryOverheadConfig.iterations)
+    parser.add_argument("--predict-calls", type=int, default=TelemetryOverheadConfig.predict_calls)
+    parser.add_argument("--report", default=TelemetryOverheadConfig.report_file_path)
+    args = parser.parse_args(argv)
+
+    config = TelemetryOverheadConfig(
+        iterations=args.iterations, predict_calls=args.predict_calls, report_file_path=args.report
+    )
+    report = {"config": asdict(config), "primitives": measure_primitives(config.iterations)}
+    if os.path.exists(config.test_data_path):
+        report["predict"] = measure_predict(config)
+
+    os.makedirs(os.path.dirname(config.report_file_path) or ".", exist_ok=True)
+    with open(config.report_file_path, "w") as file_obj:
+        json.dump(report, file_obj, indent=2)
+
+    for side, timings in report["primitives"].items():
+        print(f"{side:9s} " + "  ".join(f"{name}={value}" for name, value in timings.items()))
+    if "predict" in report:
+        print("predict   " + "  ".join(f"{name}={value}" for name, value in report["predict"].items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.Data_Science_Project.exception import CustomException
+from src.Data_Science_Project.logger import logging
+from src.Data_Science_Project.components.prediction_table import SMALL_FRAME_ROWS
+
+
+class CompiledPreprocessor:
+    """
+    Flat NumPy version of the fitted ColumnTransformer built by
+    DataTransformation.get_data_transformer_object.
+
+    The imputer statistics, one-hot category maps and scaler vectors are
+    pulled out once, and transform() writes the scaled features straight
+    into a preallocated buffer. Output is identical to preprocessor.transform.
+    """
+
+    def __init__(self, numerical_cols, medians, means, scales,
+                 categorical_cols, modes, categories, inv_scales):
+        self.numerical_cols = list(numerical_cols)
+        self.medians = np.asarray(medians, dtype=np.float64)
+        self.means = np.asarray(means, dtype=np.float64)
+        self.scales = np.asarray(scales, dtype=np.float64)
+
+        self.categorical_cols = list(categorical_cols)
+        self.modes = list(modes)
+        self.categories = [list(levels) for levels in categories]
+        # Value written for each one-hot column: 1.0 / scaler.scale_
+        self.inv_scales = np.asarray(inv_scales, dtype=np.float64)
+
+        n_numerical = len(self.numerical_cols)
+        sizes = [len(levels) for levels in self.categories]
+        self.offsets = n_numerical + np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+        self.n_features = n_numerical + sum(sizes)
+
+        self._level_index = [pd.Index(levels) for levels in self.categories]
+        self._level_codes = [
+            {level: code for code, level in enumerate(levels)} for levels in self.categories
+        ]
+        self._local = threading.local()
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor):
+        """
+        Extracts the fitted parameters from a ColumnTransformer with a
+        "num_pipeline" (imputer, scaler) and a "cat_pipeline"
+        (imputer, one_hot_encoder, scaler).
+        """
+        try:
+            transformers = {name: (pipe, cols) for name, pipe, cols in preprocessor.transformers_}
+            num_pipeline, numerical_cols = transformers["num_pipeline"]
+            cat_pipeline, categorical_cols = transformers["cat_pipeline"]
+
+            num_scaler = num_pipeline.named_steps["scaler"]
+            encoder = cat_pipeline.named_steps["one_hot_encoder"]
+            cat_scaler = cat_pipeline.named_steps["scaler"]
+
+            if encoder.handle_unknown != "ignore" or encoder.drop_idx_ is not None:
+                raise ValueError("Only OneHotEncoder(handle_unknown='ignore') without drop is supported")
+            if cat_scaler.with_mean:
+                raise ValueError("Categorical scaler must use with_mean=False")
+
+            means = num_scaler.mean_ if num_scaler.with_mean else np.zeros(len(numerical_cols))
+            scales = num_scaler.scale_ if num_scaler.with_std else np.ones(len(numerical_cols))
+            inv_scales = 1 / cat_scaler.scale_ if cat_scaler.with_std else np.ones(cat_scaler.n_features_in_)
+
+            return cls(
+                numerical_cols=numerical_cols,
+                medians=num_pipeline.named_steps["imputer"].statistics_,
+                means=means,
+                scales=scales,
+                categorical_cols=categorical_cols,
+                modes=cat_pipeline.named_steps["imputer"].statistics_,
+                categories=encoder.categories_,
+                inv_scales=inv_scales,
+            )
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def to_dict(self):
+        """
+        JSON-serializable parameters; from_dict() rebuilds the same transform
+        without sklearn.
+        """
+        return {
+            "numerical_cols": list(self.numerical_cols),
+            "medians": self.medians.tolist(),
+            "means": self.means.tolist(),
+            "scales": self.scales.tolist(),
+            "categorical_cols": list(self.categorical_cols),
+            "modes": np.asarray(self.modes, dtype=object).tolist(),
+            "categories": [np.asarray(levels, dtype=object).tolist() for levels in self.categories],
+            "inv_scales": self.inv_scales.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, params):
+        return cls(**params)
+
+    def _buffer(self, n_rows):
+        # One reusable buffer per thread, grown on demand
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None or buffer.shape[0] < n_rows:
+            buffer = np.empty((n_rows, self.n_features), dtype=np.float64)
+            self._local.buffer = buffer
+        return buffer[:n_rows]
+
+    def transform(self, features, out=None):
+        """
+        Transforms a DataFrame of raw features. Writes into `out` when given,
+        otherwise into a fresh array; use transform_into_buffer() to reuse a
+        per-thread buffer on the serving path.
+        """
+        n_rows = len(features)
+        if out is None:
+            out = np.empty((n_rows, self.n_features), dtype=np.float64)
+        out[:, len(self.numerical_cols):] = 0.0
+
+        # Per-column pandas/NumPy calls cost more than the math for a handful
+        # of rows, so small frames are encoded with plain Python scalars
+        if n_rows <= SMALL_FRAME_ROWS:
+            return self._transform_rows(features, out)
+
+        for j, col in enumerate(self.numerical_cols):
+            values = features[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            values = np.where(np.isnan(values), self.medians[j], values)
+            out[:, j] = (values - self.means[j]) / self.scales[j]
+
+        rows = np.arange(n_rows)
+        for k, col in enumerate(self.categorical_cols):
+            values = features[col]
+            if values.isna().any():
+                values = values.fillna(self.modes[k])
+            codes = self._level_index[k].get_indexer(values)
+            known = codes >= 0
+            # Unknown levels stay all-zero, like handle_unknown="ignore"
+            cols = self.offsets[k] + codes[known]
+            out[rows[known], cols] = self.inv_scales[cols - len(self.numerical_cols)]
+
+        return out
+
+    def _transform_rows(self, features, out):
+        # Python floats are IEEE doubles, so this is still bit-identical
+        for j, col in enumerate(self.numerical_cols):
+            median, mean, scale = float(self.medians[j]), float(self.means[j]), float(self.scales[j])
+            for i, value in enumerate(features[col].tolist()):
+                value = median if value is None or value != value else float(value)
+                out[i, j] = (value - mean) / scale
+
+        for k, col in enumerate(self.categorical_cols):
+            level_codes, offset = self._level_codes[k], int(self.offsets[k])
+            for i, value in enumerate(features[col].tolist()):
+                if value is None or value != value:
+                    value = self.modes[k]
+                code = level_codes.get(value)
+                if code is not None:
+                    out[i, offset + code] = self.inv_scales[offset + code - len(self.numerical_cols)]
+
+        return out
+
+    def transform_into_buffer(self, features):
+        """
+        Same as transform(), but reuses a per-thread buffer. The result is only
+        valid until the next call on the same thread.
+        """
+        return self.transform(features, out=self._buffer(len(features)))
+
+
+def verify_compiled_preprocessor(preprocessor, compiled, features):
+    """
+    Returns True when the compiled transform matches preprocessor.transform
+    bit for bit on the given features.
+    """
+    expected = preprocessor.transform(features)
+    if hasattr(expected, "toarray"):
+        expected = expected.toarray()
+    actual = compiled.transform(features)
+    equal = expected.dtype == actual.dtype and np.array_equal(expected, actual)
+    if not equal:
+        logging.warning(
+            f"Compiled preprocessor differs from ColumnTransformer, "
+            f"max abs diff {np.nanmax(np.abs(expected - actual))}"
+        )
+    return equal
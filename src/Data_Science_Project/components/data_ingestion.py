@@ -1,12 +1,14 @@
 import os
 import sys
+import itertools
 from src.Data_Science_Project.exception import CustomException
 from src.Data_Science_Project.logger import logging
 import pandas as pd
 
 # Data Source(MySQl) -> Data Ingestion(Train Test Split)
 # .env -> utils.py -> read_sql_data()
-from src.Data_Science_Project.utils import read_sql_data
+from src.Data_Science_Project.utils import read_sql_data, parquet_available, read_frame, write_frame
+from src.Data_Science_Project.schema import read_with_schema, frame_memory_mb, optimize_dtypes
 
 
 # For Train Test Split
@@ -15,32 +17,167 @@ from sklearn.model_selection import train_test_split
 
 from dataclasses import dataclass
 
+# Resolution of the hash-based split, test_size is rounded to 1/SPLIT_BUCKETS
+SPLIT_BUCKETS = 10_000
+
 @dataclass
 class DataIngestionConfig:
     train_data_path: str = os.path.join('artifacts', 'train.csv')
     test_data_path: str = os.path.join('artifacts', 'test.csv')
     raw_data_path: str = os.path.join('artifacts', 'raw.csv')
+    source_data_path: str = os.path.join('notebook', 'data', 'raw.csv')
+    # Rows added by incremental training (source layout); ingestion appends
+    # them to the source so a full run trains on them too
+    appended_data_path: str = os.path.join('artifacts', 'appended_rows.csv')
+    test_size: float = 0.2
+    random_state: int = 42
+    # Streaming mode reads the source in chunks and splits rows by a hash of
+    # their key instead of train_test_split, so memory is bounded by chunk_size
+    streaming: bool = os.getenv("INGESTION_STREAMING", "0") == "1"
+    chunk_size: int = int(os.getenv("INGESTION_CHUNK_SIZE", 100_000))
+    # Columns that identify a row for the split; None uses every column
+    split_key_columns: list = None
+    # "parquet", "csv", or "auto" (Parquet when a Parquet engine is installed).
+    # Streaming ingestion always writes CSV.
+    data_format: str = os.getenv("INGESTION_FORMAT", "auto")
+    # Load with the category/uint8 dtypes from schema.py instead of pandas' defaults
+    optimize_dtypes: bool = os.getenv("DATA_SCHEMA", "1") == "1"
+
+    def __post_init__(self):
+        data_format = self.data_format
+        if data_format == "auto":
+            data_format = "parquet" if parquet_available() and not self.streaming else "csv"
+        if data_format == "parquet":
+            self.train_data_path = os.path.splitext(self.train_data_path)[0] + ".parquet"
+            self.test_data_path = os.path.splitext(self.test_data_path)[0] + ".parquet"
+            self.raw_data_path = os.path.splitext(self.raw_data_path)[0] + ".parquet"
+        self.data_format = data_format
+
+
+def is_test_row(chunk, key_columns=None, test_size=0.2):
+    """
+    Deterministically assigns rows to the test split by hashing their key.
+    A row's side never depends on the other rows, so appending data to the
+    source never moves existing rows between train and test.
+    """
+    keys = chunk[key_columns] if key_columns else chunk
+    hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+    return hashes % SPLIT_BUCKETS < round(test_size * SPLIT_BUCKETS)
 
 class DataIngestion:
     def __init__(self):
         self.ingestion_config = DataIngestionConfig()
 
+    def input_paths(self):
+        """
+        The files ingestion reads: the source, plus the appended rows if any.
+        """
+        paths = [self.ingestion_config.source_data_path]
+        if os.path.exists(self.ingestion_config.appended_data_path):
+            paths.append(self.ingestion_config.appended_data_path)
+        return paths
+
+    def append_rows(self, df):
+        """
+        Adds rows to appended_data_path, so every later full ingestion
+        includes them. The file is replaced by rename.
+        """
+        path = self.ingestion_config.appended_data_path
+        if os.path.exists(path):
+            df = pd.concat([pd.read_csv(path), df], ignore_index=True)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        df.to_csv(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+        logging.info(f"{path} now holds {len(df)} appended rows")
+
+    def append_train_rows(self, df):
+        """
+        Adds rows to the train split written by the last ingestion, so what
+        is derived from it (the monitoring baseline) covers the rows an
+        incremental update trained on. The file is replaced by rename.
+        """
+        path = self.ingestion_config.train_data_path
+        df = pd.concat([read_frame(path), df], ignore_index=True)
+        if self.ingestion_config.optimize_dtypes:
+            # Categoricals with different observed levels concat to object
+            df = optimize_dtypes(df)
+        root, ext = os.path.splitext(path)
+        # write_frame picks the format from the extension
+        tmp_path = f"{root}.tmp{ext}"
+        write_frame(df, tmp_path)
+        os.replace(tmp_path, path)
+        logging.info(f"{path} now holds {len(df)} rows")
+
     def initiate_data_ingestion(self):
+        if self.ingestion_config.streaming:
+            return self.initiate_streaming_ingestion()
+
         try:
-            
-            df = pd.read_csv(os.path.join('notebook/data', 'raw.csv'))
+            read = read_with_schema if self.ingestion_config.optimize_dtypes else pd.read_csv
+            frames = [read(path) for path in self.input_paths()]
+            df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+            if len(frames) > 1 and self.ingestion_config.optimize_dtypes:
+                # Categoricals with different observed levels concat to object
+                df = optimize_dtypes(df)
             # df = read_sql_data() 
-            logging.info("Read the dataset as a pandas dataframe")
+            logging.info(f"Read the dataset as a pandas dataframe ({frame_memory_mb(df):.1f} MB)")
 
             os.makedirs(os.path.dirname(self.ingestion_config.train_data_path), exist_ok=True)
 
-            df.to_csv(self.ingestion_config.raw_data_path, index=False, header=True)
-            train_set, test_set = train_test_split(df, test_size=0.2, random_state=42)
-            train_set.to_csv(self.ingestion_config.train_data_path, index=False, header=True)
-            test_set.to_csv(self.ingestion_config.test_data_path, index=False, header=True)
+            write_frame(df, self.ingestion_config.raw_data_path)
+            train_set, test_set = train_test_split(
+                df,
+                test_size=self.ingestion_config.test_size,
+                random_state=self.ingestion_config.random_state,
+            )
+            write_frame(train_set, self.ingestion_config.train_data_path)
+            write_frame(test_set, self.ingestion_config.test_data_path)
 
             logging.info(f"Data Ingestion completed successfully.")
             return self.ingestion_config.train_data_path, self.ingestion_config.test_data_path
             
         except Exception as e:
-            raise CustomException(e, sys)
\ No newline at end of file
+            raise CustomException(e, sys)
+
+    def initiate_streaming_ingestion(self):
+        """
+        Reads the source chunk by chunk and appends every chunk to the raw,
+        train and test files as it goes. Values are read and written as
+        text, so the output is a byte-for-byte row copy of the source and the
+        split hash does not depend on per-chunk dtype inference.
+        """
+        try:
+            config = self.ingestion_config
+            if config.data_format != "csv":
+                raise ValueError("Streaming ingestion only writes CSV, set data_format='csv'")
+            os.makedirs(os.path.dirname(config.train_data_path), exist_ok=True)
+
+            output_paths = [config.raw_data_path, config.train_data_path, config.test_data_path]
+            tmp_paths = [path + ".tmp" for path in output_paths]
+            n_train = n_test = 0
+
+            chunks = itertools.chain.from_iterable(
+                pd.read_csv(path, chunksize=config.chunk_size, dtype=str, keep_default_na=False)
+                for path in self.input_paths()
+            )
+            for i, chunk in enumerate(chunks):
+                test_mask = is_test_row(chunk, config.split_key_columns, config.test_size)
+                header, mode = (True, "w") if i == 0 else (False, "a")
+
+                raw_tmp, train_tmp, test_tmp = tmp_paths
+                chunk.to_csv(raw_tmp, index=False, header=header, mode=mode)
+                chunk[~test_mask].to_csv(train_tmp, index=False, header=header, mode=mode)
+                chunk[test_mask].to_csv(test_tmp, index=False, header=header, mode=mode)
+
+                n_test += int(test_mask.sum())
+                n_train += len(chunk) - int(test_mask.sum())
+
+            # Only replace the previous outputs once the whole source was read
+            for tmp_path, path in zip(tmp_paths, output_paths):
+                os.replace(tmp_path, path)
+
+            logging.info(f"Streaming ingestion completed: {n_train} train rows, {n_test} test rows")
+            return config.train_data_path, config.test_data_path
+
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -1,8 +1,9 @@
 import sys
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.compose import ColumnTransformer
 
@@ -16,12 +17,55 @@ from src.Data_Science_Project.logger import logging
 # To save pickle file in specific location
 import os
 
-from src.Data_Science_Project.utils import save_object
+from src.Data_Science_Project.utils import (
+    save_object,
+    load_object,
+    read_frame,
+    save_features,
+    load_features,
+    feature_matrix_nbytes,
+)
+from src.Data_Science_Project.schema import read_with_schema, frame_memory_mb
+from src.Data_Science_Project.components.compiled_preprocessor import (
+    CompiledPreprocessor,
+    verify_compiled_preprocessor,
+)
 
 
 @dataclass
 class DataTransformationConfig:
-    preprocessor_obj_file_path = os.path.join('artifacts', 'preprocessor.pkl')
+    preprocessor_obj_file_path: str = os.path.join('artifacts', 'preprocessor.pkl')
+    # Features and target are stored separately so they can be memory-mapped
+    # without slicing the target off a combined array
+    train_features_file_path: str = os.path.join('artifacts', 'X_train.npy')
+    train_target_file_path: str = os.path.join('artifacts', 'y_train.npy')
+    test_features_file_path: str = os.path.join('artifacts', 'X_test.npy')
+    test_target_file_path: str = os.path.join('artifacts', 'y_test.npy')
+    # Keep X as CSR from the ColumnTransformer to the models. The dense mode
+    # (default) always returns an ndarray, whatever the one-hot width.
+    sparse_output: bool = os.getenv("FEATURE_SPARSE_OUTPUT", "0") == "1"
+    # Read train/test with the schema.py dtypes
+    optimize_dtypes: bool = os.getenv("DATA_SCHEMA", "1") == "1"
+    # dtype of the stored feature matrices. Every model in ModelTrainer
+    # accepts float32 (the tree ensembles convert to it internally anyway).
+    feature_dtype: str = os.getenv("FEATURE_DTYPE", "float64")
+    # Rows transformed at a time, so only one float64 block exists next to
+    # the output matrix
+    transform_block_rows: int = 100_000
+    target_column: str = "math score"
+    numerical_cols: list = field(default_factory=lambda: ["writing score", "reading score"])
+    categorical_cols: list = field(default_factory=lambda: [
+        "gender",
+        "race/ethnicity",
+        "parental level of education",
+        "lunch",
+        "test preparation course"
+    ])
+
+    def __post_init__(self):
+        if self.sparse_output:
+            self.train_features_file_path = os.path.splitext(self.train_features_file_path)[0] + ".npz"
+            self.test_features_file_path = os.path.splitext(self.test_features_file_path)[0] + ".npz"
 
 class DataTransformation:
     def __init__(self):
@@ -34,14 +78,8 @@ class DataTransformation:
         It handles missing values, categorical encoding, and scaling.
         """
         try:
-            numerical_cols = ["writing score", "reading score"]
-            categorical_cols = [
-                "gender",
-                "race/ethnicity",
-                "parental level of education",
-                "lunch",
-                "test preparation course"
-            ]
+            numerical_cols = self.data_transformation_config.numerical_cols
+            categorical_cols = self.data_transformation_config.categorical_cols
             # Suppose we get new data with missing values
             num_pipeline = Pipeline(steps=[
                 ("imputer", SimpleImputer(strategy="median")),
@@ -60,26 +98,58 @@ class DataTransformation:
                 [
                     ("num_pipeline", num_pipeline, numerical_cols),
                     ("cat_pipeline", cat_pipeline, categorical_cols)
-                ]
+                ],
+                # 1.0 always stacks to CSR, 0.0 always densifies; the default
+                # 0.3 would switch type once one-hot columns got numerous
+                sparse_threshold=1.0 if self.data_transformation_config.sparse_output else 0.0,
             )
             return preprocessor
 
         except Exception as e:
             raise CustomException(e, sys)
+
+    def transform_features(self, preprocessor, features):
+        """
+        Applies a fitted preprocessor block by block and collects the result
+        in feature_dtype, so the full-size float64 matrix and the
+        ColumnTransformer's intermediate copies never exist at once.
+        """
+        config = self.data_transformation_config
+        block_rows = config.transform_block_rows
+        blocks = range(0, len(features), block_rows)
+
+        if config.sparse_output:
+            return sparse.vstack(
+                [preprocessor.transform(features.iloc[i:i + block_rows]) for i in blocks],
+                format="csr",
+            ).astype(config.feature_dtype, copy=False)
+
+        out = None
+        for i in blocks:
+            block = preprocessor.transform(features.iloc[i:i + block_rows])
+            if out is None:
+                out = np.empty((len(features), block.shape[1]), dtype=config.feature_dtype)
+            out[i:i + len(block)] = block
+        if out is None:
+            out = preprocessor.transform(features).astype(config.feature_dtype)
+        return out
     
     def initiate_data_transformation(self, train_path, test_path):
         """
         It reads the train and test data, applies the preprocessor, and saves the transformed data.
         """
         try:
-            train_df = pd.read_csv(train_path)
-            test_df = pd.read_csv(test_path)
+            read = read_with_schema if self.data_transformation_config.optimize_dtypes else read_frame
+            train_df = read(train_path)
+            test_df = read(test_path)
 
-            logging.info("Read train and test data completed")
+            logging.info(
+                f"Read train and test data completed "
+                f"({frame_memory_mb(train_df):.1f} + {frame_memory_mb(test_df):.1f} MB)"
+            )
 
             preprocessing_obj = self.get_data_transformer_object()
-            target_column_name = "math score"
-            numerical_cols = ["writing score", "reading score"]
+            target_column_name = self.data_transformation_config.target_column
 
             # divide the train and test data into independent and dependent features
 
@@ -94,11 +164,27 @@ class DataTransformation:
             # .fit_transform() on training data → calculates mean from training set only.
             # .transform() on test data → uses the mean calculated from training set.
 
-            input_feature_train_arr = preprocessing_obj.fit_transform(input_feature_train_df)
-            input_feature_test_arr = preprocessing_obj.transform(input_feature_test_df)
+            preprocessing_obj.fit(input_feature_train_df)
+            input_feature_train_arr = self.transform_features(preprocessing_obj, input_feature_train_df)
+            input_feature_test_arr = self.transform_features(preprocessing_obj, input_feature_test_df)
 
-            train_arr = np.c_[input_feature_train_arr, np.array(target_feature_train_df)]
-            test_arr = np.c_[input_feature_test_arr, np.array(target_feature_test_df)]
+            logging.info(
+                f"Transformed train features: {type(input_feature_train_arr).__name__} "
+                f"{input_feature_train_arr.shape}, {feature_matrix_nbytes(input_feature_train_arr) / 1e6:.1f} MB"
+            )
+
+            target_train_arr = target_feature_train_df.to_numpy(dtype=np.float64)
+            target_test_arr = target_feature_test_df.to_numpy(dtype=np.float64)
+
+            # The serving path uses a compiled copy of the preprocessor; make
+            # sure it reproduces transform() exactly on held-out data
+            compiled_preprocessor = CompiledPreprocessor.from_preprocessor(preprocessing_obj)
+            verify_df = input_feature_test_df
+            if self.data_transformation_config.sparse_output:
+                # The check compares dense matrices; bound it for wide one-hot output
+                verify_df = input_feature_test_df.head(1000)
+            if verify_compiled_preprocessor(preprocessing_obj, compiled_preprocessor, verify_df):
+                logging.info("Compiled preprocessor matches ColumnTransformer on test data")
 
             logging.info("Saved preprocessing object")
 
@@ -108,11 +194,76 @@ class DataTransformation:
                 obj=preprocessing_obj
             )
 
+            # Keep the transformed arrays on disk so a re-run can skip this
+            # stage and the trainer can memory-map them (see load_transformed_arrays)
+            config = self.data_transformation_config
+            save_features(config.train_features_file_path, input_feature_train_arr)
+            np.save(config.train_target_file_path, target_train_arr)
+            save_features(config.test_features_file_path, input_feature_test_arr)
+            np.save(config.test_target_file_path, target_test_arr)
+
             return (
-                train_arr,
-                test_arr,
+                (input_feature_train_arr, target_train_arr),
+                (input_feature_test_arr, target_test_arr),
                 self.data_transformation_config.preprocessor_obj_file_path
             )
 
         except Exception as e:
-            raise CustomException(sys, e)
\ No newline at end of file
+            raise CustomException(sys, e)
+
+    def transform_new_rows(self, data_path):
+        """
+        Transforms newly arrived rows (train.csv layout) with the preprocessor
+        fitted by the last full run. Returns (raw features, X, y).
+        """
+        try:
+            config = self.data_transformation_config
+            read = read_with_schema if config.optimize_dtypes else read_frame
+            df = read(data_path)
+            features = df.drop(columns=[config.target_column])
+            preprocessor = load_object(config.preprocessor_obj_file_path)
+            X = self.transform_features(preprocessor, features)
+            y = df[config.target_column].to_numpy(dtype=np.float64)
+            logging.info(f"Transformed {len(df)} new rows with the fitted preprocessor")
+            return features, X, y
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def append_train_rows(self, X_new, y_new):
+        """
+        Appends transformed rows to the saved training arrays. The files are
+        replaced by rename, so arrays memory-mapped from them stay valid.
+        """
+        config = self.data_transformation_config
+        (X_train, y_train), _ = self.load_transformed_arrays()
+        if sparse.issparse(X_train):
+            X_train = sparse.vstack([X_train, X_new], format="csr")
+        else:
+            X_train = np.concatenate([X_train, X_new])
+        y_train = np.concatenate([y_train, y_new])
+
+        for path, save, arr in (
+            (config.train_features_file_path, save_features, X_train),
+            (config.train_target_file_path, np.save, y_train),
+        ):
+            root, ext = os.path.splitext(path)
+            # np.save / save_npz add the extension if it is missing
+            tmp_path = f"{root}.tmp{ext}"
+            save(tmp_path, arr)
+            os.replace(tmp_path, path)
+        return X_train, y_train
+
+    def load_transformed_arrays(self, mmap_mode="r"):
+        """
+        Opens the saved (X_train, y_train), (X_test, y_test) arrays. Dense
+        arrays are memory-mapped by default so nothing is parsed or copied up
+        front; sparse features come back as CSR.
+        """
+        config = self.data_transformation_config
+        return (
+            (load_features(config.train_features_file_path, mmap_mode=mmap_mode),
+             np.load(config.train_target_file_path, mmap_mode=mmap_mode)),
+            (load_features(config.test_features_file_path, mmap_mode=mmap_mode),
+             np.load(config.test_target_file_path, mmap_mode=mmap_mode)),
+        )
\ No newline at end of file
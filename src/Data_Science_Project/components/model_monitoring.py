@@ -0,0 +1,453 @@
+import os
+import sys
+import json
+import time
+import random
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.Data_Science_Project.exception import CustomException
+from src.Data_Science_Project.logger import logging
+from src.Data_Science_Project.utils import load_object, file_digest, read_frame
+from src.Data_Science_Project.schema import CATEGORICAL_COLUMNS
+from src.Data_Science_Project.components.prediction_table import SMALL_FRAME_ROWS
+
+
+# Numeric inputs that are monitored, plus the model output
+NUMERIC_COLUMNS = ["reading score", "writing score"]
+PREDICTION_COLUMN = "predicted math score"
+
+
+@dataclass
+class ModelMonitorConfig:
+    baseline_file_path: str = os.path.join("artifacts", "monitoring_baseline.json")
+    train_data_path: str = os.path.join("artifacts", "train.csv")
+    preprocessor_file_path: str = os.path.join("artifacts", "preprocessor.pkl")
+    model_file_path: str = os.path.join("artifacts", "model.pkl")
+    target_column: str = "math score"
+    # Feed every PredictPipeline.predict call into the monitor
+    enabled: bool = os.getenv("PREDICTION_MONITORING", "1") == "1"
+    # Fraction of predict calls summarized; PSI and KS compare distributions,
+    # so a uniform sample is enough under heavy traffic
+    sample_rate: float = float(os.getenv("MONITORING_SAMPLE_RATE", 1.0))
+    # Each process writes its live summary here so reports can merge workers
+    snapshot_dir: str = os.path.join("artifacts", "monitoring")
+    snapshot_interval: float = float(os.getenv("MONITORING_SNAPSHOT_INTERVAL", 60))
+    # Seconds between two stat() checks of the baseline file from observe()
+    baseline_check_interval: float = float(os.getenv("MONITORING_BASELINE_CHECK_INTERVAL", 1.0))
+    # Fixed histogram bins over the score range; values outside it land in
+    # an underflow / overflow bin
+    score_min: float = 0.0
+    score_max: float = 100.0
+    n_bins: int = 50
+    # Usual PSI reading: < 0.1 stable, 0.1-0.2 moderate, > 0.2 drifted
+    psi_threshold: float = 0.2
+    ks_threshold: float = 0.1
+    # Columns are not flagged before this many rows were observed
+    min_observations: int = 100
+
+
+class DriftSummary:
+    """
+    Constant-memory summary of a stream of predictions: counts per known
+    level (plus one "other" bucket) for each categorical column, and a
+    fixed-bin histogram for the numeric columns and the prediction.
+
+    Summaries with the same levels and bins are merged by adding the
+    counts, so per-worker summaries combine into one exactly.
+    """
+
+    def __init__(self, levels, score_min=0.0, score_max=100.0, n_bins=50):
+        self.levels = {col: list(col_levels) for col, col_levels in levels.items()}
+        self.score_min = float(score_min)
+        self.score_max = float(score_max)
+        self.n_bins = int(n_bins)
+        self._level_codes = {
+            col: {level: code for code, level in enumerate(col_levels)}
+            for col, col_levels in self.levels.items()
+        }
+        self._level_index = {col: pd.Index(col_levels) for col, col_levels in self.levels.items()}
+        self._bin_scale = self.n_bins / (self.score_max - self.score_min)
+        self.category_counts = {
+            col: np.zeros(len(col_levels) + 1, dtype=np.int64) for col, col_levels in self.levels.items()
+        }
+        self.histograms = {
+            col: np.zeros(self.n_bins + 2, dtype=np.int64) for col in NUMERIC_COLUMNS + [PREDICTION_COLUMN]
+        }
+        self.n_rows = 0
+        self._lock = threading.Lock()
+
+    def _bin(self, value):
+        # Bin 0 is underflow (and missing values), n_bins + 1 overflow
+        if value is None or not value >= self.score_min:
+            return 0
+        if value >= self.score_max:
+            return self.n_bins + 1
+        return int((value - self.score_min) * self._bin_scale) + 1
+
+    def _bins(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        inside = (values >= self.score_min) & (values < self.score_max)
+        # Missing values stay in the underflow bin like in _bin()
+        bins = np.zeros(len(values), dtype=np.int64)
+        bins[inside] = np.minimum(
+            ((values[inside] - self.score_min) * self._bin_scale).astype(np.int64) + 1, self.n_bins
+        )
+        bins[values >= self.score_max] = self.n_bins + 1
+        return bins
+
+    def update(self, features, predictions):
+        """
+        Adds a frame of raw features and the predictions made for it.
+        """
+        predictions = np.asarray(predictions).ravel()
+        if len(features) <= SMALL_FRAME_ROWS:
+            self._update_rows(features, predictions)
+            return
+
+        category_codes = {}
+        for col, index in self._level_index.items():
+            codes = index.get_indexer(features[col])
+            codes[codes < 0] = len(self.levels[col])
+            category_codes[col] = np.bincount(codes, minlength=len(self.levels[col]) + 1)
+        bins = {
+            col: np.bincount(self._bins(features[col].to_numpy(dtype=np.float64, na_value=np.nan)),
+                             minlength=self.n_bins + 2)
+            for col in NUMERIC_COLUMNS
+        }
+        bins[PREDICTION_COLUMN] = np.bincount(self._bins(predictions), minlength=self.n_bins + 2)
+
+        with self._lock:
+            for col, counts in category_codes.items():
+                self.category_counts[col] += counts
+            for col, counts in bins.items():
+                self.histograms[col] += counts
+            self.n_rows += len(features)
+
+    def _update_rows(self, features, predictions):
+        # Plain Python for the one-row requests of the web path; pandas and
+        # NumPy calls would cost more than the counting itself
+        category_values = [features[col].tolist() for col in self._level_codes]
+        numeric_values = [features[col].tolist() for col in NUMERIC_COLUMNS]
+        predictions = predictions.tolist()
+        with self._lock:
+            for (col, level_codes), values in zip(self._level_codes.items(), category_values):
+                counts, other = self.category_counts[col], len(level_codes)
+                for value in values:
+                    counts[level_codes.get(value, other)] += 1
+            for col, values in zip(NUMERIC_COLUMNS, numeric_values):
+                histogram = self.histograms[col]
+                for value in values:
+                    histogram[self._bin(value)] += 1
+            histogram = self.histograms[PREDICTION_COLUMN]
+            for value in predictions:
+                histogram[self._bin(value)] += 1
+            self.n_rows += len(predictions)
+
+    def merge(self, other):
+        if other.levels != self.levels or (other.score_min, other.score_max, other.n_bins) != (
+            self.score_min, self.score_max, self.n_bins
+        ):
+            raise ValueError("Only summaries with the same levels and bins can be merged")
+        with self._lock:
+            for col, counts in other.category_counts.items():
+                self.category_counts[col] += counts
+            for col, counts in other.histograms.items():
+                self.histograms[col] += counts
+            self.n_rows += other.n_rows
+        return self
+
+    def copy(self):
+        return DriftSummary.from_dict(self.to_dict())
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "levels": self.levels,
+                "score_min": self.score_min,
+                "score_max": self.score_max,
+                "n_bins": self.n_bins,
+                "n_rows": self.n_rows,
+                "category_counts": {col: counts.tolist() for col, counts in self.category_counts.items()},
+                "histograms": {col: counts.tolist() for col, counts in self.histograms.items()},
+            }
+
+    @classmethod
+    def from_dict(cls, data):
+        summary = cls(data["levels"], data["score_min"], data["score_max"], data["n_bins"])
+        for col, counts in data["category_counts"].items():
+            summary.category_counts[col][:] = counts
+        for col, counts in data["histograms"].items():
+            summary.histograms[col][:] = counts
+        summary.n_rows = data["n_rows"]
+        return summary
+
+
+def population_stability_index(expected, actual, epsilon=1e-4):
+    """
+    PSI between two count vectors over the same buckets.
+    """
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    p = np.maximum(expected / max(expected.sum(), 1), epsilon)
+    q = np.maximum(actual / max(actual.sum(), 1), epsilon)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks_statistic(expected, actual):
+    """
+    Kolmogorov-Smirnov distance between two histograms over the same bins,
+    i.e. the largest gap between their cumulative distributions.
+    """
+    expected = np.cumsum(expected, dtype=np.float64)
+    actual = np.cumsum(actual, dtype=np.float64)
+    if expected[-1] == 0 or actual[-1] == 0:
+        return 0.0
+    return float(np.max(np.abs(expected / expected[-1] - actual / actual[-1])))
+
+
+class MonitoringBaselineBuilder:
+    """
+    Summarizes the training split and the model's predictions on it; live
+    traffic is compared against this snapshot.
+    """
+
+    def __init__(self, config: ModelMonitorConfig = None):
+        self.config = config or ModelMonitorConfig()
+
+    def initiate_baseline_build(self):
+        try:
+            train_df = read_frame(self.config.train_data_path)
+            features = train_df.drop(columns=[self.config.target_column])
+            preprocessor = load_object(self.config.preprocessor_file_path)
+            model = load_object(self.config.model_file_path)
+            predictions = model.predict(preprocessor.transform(features))
+
+            levels = {
+                col: sorted(features[col].dropna().astype(str).unique().tolist()) for col in CATEGORICAL_COLUMNS
+            }
+            summary = DriftSummary(levels, self.config.score_min, self.config.score_max, self.config.n_bins)
+            summary.update(features.astype({col: str for col in CATEGORICAL_COLUMNS}), predictions)
+
+            baseline = summary.to_dict()
+            baseline["artifact_digest"] = file_digest(
+                self.config.preprocessor_file_path, self.config.model_file_path
+            )
+            os.makedirs(os.path.dirname(self.config.baseline_file_path), exist_ok=True)
+            tmp_path = self.config.baseline_file_path + ".tmp"
+            with open(tmp_path, "w") as file_obj:
+                json.dump(baseline, file_obj)
+            os.replace(tmp_path, self.config.baseline_file_path)
+
+            logging.info(f"Monitoring baseline built from {summary.n_rows} training rows")
+            return self.config.baseline_file_path
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+class DriftMonitor:
+    """
+    Keeps a live DriftSummary of everything PredictPipeline scored and
+    compares it with the training baseline. The live summary starts over
+    whenever the baseline file changes (i.e. after retraining).
+
+    Each process writes its summary to snapshot_dir every
+    snapshot_interval seconds; report(merge_workers=True) adds up every
+    snapshot built against the current model, so one request to any
+    worker sees the traffic of all of them (including workers of this
+    server that have since exited; the server clears snapshot_dir with
+    clear_monitoring_snapshots() at startup).
+    """
+
+    def __init__(self, config: ModelMonitorConfig = None):
+        self.config = config or ModelMonitorConfig()
+        self._lock = threading.Lock()
+        self._baseline = None
+        self._baseline_digest = None
+        self._baseline_signature = None
+        self.live = None
+        self._last_snapshot = time.monotonic()
+        self._last_baseline_check = time.monotonic()
+        self._load_baseline()
+
+    def _load_baseline(self):
+        with self._lock:
+            stat = os.stat(self.config.baseline_file_path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature == self._baseline_signature:
+                return
+            with open(self.config.baseline_file_path) as file_obj:
+                baseline = json.load(file_obj)
+            self._baseline = DriftSummary.from_dict(baseline)
+            self._baseline_digest = baseline["artifact_digest"]
+            self.live = DriftSummary(
+                self._baseline.levels, self._baseline.score_min, self._baseline.score_max, self._baseline.n_bins
+            )
+            self._baseline_signature = signature
+
+    def observe(self, features, predictions):
+        """
+        Hot-path hook: adds one scored frame to the live summary.
+        """
+        if self.config.sample_rate < 1.0 and random.random() >= self.config.sample_rate:
+            return
+        if time.monotonic() - self._last_baseline_check >= self.config.baseline_check_interval:
+            self._last_baseline_check = time.monotonic()
+            # After a retrain, start counting into the new baseline's bins
+            # instead of mixing traffic of two models
+            self._load_baseline()
+        self.live.update(features, predictions)
+        if time.monotonic() - self._last_snapshot >= self.config.snapshot_interval:
+            self._last_snapshot = time.monotonic()
+            try:
+                self.save_snapshot()
+            except OSError as e:
+                logging.warning(f"Could not write monitoring snapshot: {e}")
+
+    def _snapshot_path(self, pid):
+        return os.path.join(self.config.snapshot_dir, f"{pid}.json")
+
+    def save_snapshot(self):
+        snapshot = self.live.to_dict()
+        snapshot["artifact_digest"] = self._baseline_digest
+        os.makedirs(self.config.snapshot_dir, exist_ok=True)
+        path = self._snapshot_path(os.getpid())
+        with open(path + ".tmp", "w") as file_obj:
+            json.dump(snapshot, file_obj)
+        os.replace(path + ".tmp", path)
+
+    def merged_summary(self):
+        """
+        This process's live summary plus the latest snapshot of every other
+        process that scored against the same baseline.
+        """
+        merged = self.live.copy()
+        if not os.path.isdir(self.config.snapshot_dir):
+            return merged
+        own = os.path.basename(self._snapshot_path(os.getpid()))
+        for name in os.listdir(self.config.snapshot_dir):
+            if name == own or not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.config.snapshot_dir, name)) as file_obj:
+                    snapshot = json.load(file_obj)
+                if snapshot.get("artifact_digest") == self._baseline_digest:
+                    merged.merge(DriftSummary.from_dict(snapshot))
+            except (OSError, ValueError) as e:
+                logging.warning(f"Skipping monitoring snapshot {name}: {e}")
+        return merged
+
+    def report(self, merge_workers=True):
+        """
+        PSI for every monitored column and KS for the numeric ones, live
+        traffic against the training baseline.
+        """
+        self._load_baseline()
+        live = self.merged_summary() if merge_workers else self.live.copy()
+        return drift_report(self._baseline, live, self.config)
+
+
+def drift_report(baseline, live, config):
+    """
+    Compares two DriftSummary objects built with the same levels and bins.
+    """
+    enough = live.n_rows >= config.min_observations
+
+    columns = {}
+    for col, counts in live.category_counts.items():
+        psi = population_stability_index(baseline.category_counts[col], counts)
+        columns[col] = {
+            "psi": round(psi, 4),
+            "unknown_levels": int(counts[-1]),
+            "drifted": enough and psi > config.psi_threshold,
+        }
+    for col, counts in live.histograms.items():
+        psi = population_stability_index(baseline.histograms[col], counts)
+        ks = ks_statistic(baseline.histograms[col], counts)
+        columns[col] = {
+            "psi": round(psi, 4),
+            "ks": round(ks, 4),
+            "drifted": enough and (psi > config.psi_threshold or ks > config.ks_threshold),
+        }
+
+    return {
+        "observations": live.n_rows,
+        "baseline_rows": baseline.n_rows,
+        "enough_observations": enough,
+        "drifted_columns": [col for col, stats in columns.items() if stats["drifted"]],
+        "columns": columns,
+    }
+
+
+def batch_drift_report(features, predictions, config: ModelMonitorConfig = None):
+    """
+    Drift report for one batch of raw feature rows (e.g. newly arrived
+    training data) against the training baseline.
+    """
+    config = config or ModelMonitorConfig()
+    with open(config.baseline_file_path) as file_obj:
+        baseline = DriftSummary.from_dict(json.load(file_obj))
+    live = DriftSummary(baseline.levels, baseline.score_min, baseline.score_max, baseline.n_bins)
+    live.update(features.astype({col: str for col in CATEGORICAL_COLUMNS}), predictions)
+    return drift_report(baseline, live, config)
+
+
+def input_drift_columns(report, config: ModelMonitorConfig = None):
+    """
+    Input columns of a batch_drift_report that no longer match what the
+    preprocessor was fitted on: categorical columns by PSI or levels it has
+    never seen, numeric ones by KS only (the 50-bin PSI of a few hundred
+    rows is above 0.1 from sampling noise alone).
+    """
+    config = config or ModelMonitorConfig()
+    if not report["enough_observations"]:
+        return []
+    drifted = []
+    for col, stats in report["columns"].items():
+        if col == PREDICTION_COLUMN:
+            continue
+        if col in NUMERIC_COLUMNS:
+            if stats["ks"] > config.ks_threshold:
+                drifted.append(col)
+        elif stats["psi"] > config.psi_threshold or stats["unknown_levels"] > 0:
+            drifted.append(col)
+    return drifted
+
+
+def clear_monitoring_snapshots(config: ModelMonitorConfig = None):
+    """
+    Removes the snapshots of earlier processes, so a newly started server
+    reports only its own traffic.
+    """
+    config = config or ModelMonitorConfig()
+    if not os.path.isdir(config.snapshot_dir):
+        return
+    for name in os.listdir(config.snapshot_dir):
+        try:
+            os.remove(os.path.join(config.snapshot_dir, name))
+        except OSError:
+            pass
+
+
+_drift_monitor = None
+_drift_monitor_lock = threading.Lock()
+
+
+def get_drift_monitor():
+    """
+    Returns the process-wide DriftMonitor, or None when monitoring is
+    disabled or no baseline has been built yet.
+    """
+    global _drift_monitor
+    if _drift_monitor is None:
+        with _drift_monitor_lock:
+            if _drift_monitor is None:
+                config = ModelMonitorConfig()
+                if not config.enabled or not os.path.exists(config.baseline_file_path):
+                    return None
+                _drift_monitor = DriftMonitor(config)
+    return _drift_monitor
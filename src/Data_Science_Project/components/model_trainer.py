@@ -2,32 +2,79 @@ import os
 import sys
 from dataclasses import dataclass
 
-from catboost import CatBoostRegressor
+import numpy as np
+from scipy import sparse
+from sklearn.base import clone
 from sklearn.ensemble import (
     AdaBoostRegressor,
     GradientBoostingRegressor,
     RandomForestRegressor,
 )
-from sklearn.linear_model import LinearRegression
+from sklearn.linear_model import LinearRegression, SGDRegressor
 from sklearn.metrics import r2_score
+from sklearn.model_selection import train_test_split
 # from sklearn.neighbours import KNeighboursRegressor
 from sklearn.tree import DecisionTreeRegressor
-from xgboost import XGBRegressor
 
 from src.Data_Science_Project.exception import CustomException
 from src.Data_Science_Project.logger import logging
 
-from src.Data_Science_Project.utils import save_object, evaluate_model
+from src.Data_Science_Project.utils import (
+    save_object,
+    load_object,
+    evaluate_model,
+    get_stopping_round,
+    track_resources,
+)
+from src.Data_Science_Project.model_search import FitResultCache, get_search_strategy, make_folds
+from src.Data_Science_Project.work_queue import QueueExecutor
+from src.Data_Science_Project.telemetry import get_registry
 
 # For MLflow
-import mlflow
-from urllib.parse import urlparse
+from src.Data_Science_Project.tracking import get_tracker
+
 
+MODEL_SAVE_SECONDS = get_registry().histogram(
+    "model_save_seconds", "Time to pickle the trained model to model.pkl", ["mode"]
+)
 
 
 @dataclass
 class ModelTrainerConfig:
-    trained_model_file_path = os.path.join("artifacts", "model.pkl")
+    trained_model_file_path: str = os.path.join("artifacts", "model.pkl")
+    # Worker processes for the hyperparameter search (-1 = all cores)
+    search_n_jobs: int = int(os.getenv("MODEL_SEARCH_N_JOBS", 1))
+    # "local" fits in this process (or its joblib pool); "queue" publishes
+    # the fold fits to the work queue (settings in work_queue.WorkQueueConfig)
+    search_backend: str = os.getenv("MODEL_SEARCH_BACKEND", "local")
+    # "grid" (exhaustive, default), "halving" or "random"
+    search_strategy: str = os.getenv("MODEL_SEARCH_STRATEGY", "grid")
+    # Budgets for the random strategy, per model family
+    search_max_fits: int = int(os.getenv("MODEL_SEARCH_MAX_FITS", 0)) or None
+    search_time_budget: float = float(os.getenv("MODEL_SEARCH_TIME_BUDGET", 0)) or None
+    # Also run the full grid and report time saved vs. R² lost
+    compare_with_grid: bool = os.getenv("MODEL_SEARCH_COMPARE_WITH_GRID", "0") == "1"
+    # Let boosting families stop on a validation slice instead of searching
+    # over n_estimators / iterations. This takes away the resource axis of
+    # the halving strategy, which then runs their full (smaller) grid
+    early_stopping: bool = os.getenv("MODEL_EARLY_STOPPING", "1") == "1"
+    early_stopping_rounds: int = 10
+    # Upper bound on rounds; defaults to the largest value in the family's grid
+    max_boosting_rounds: int = int(os.getenv("MODEL_MAX_BOOSTING_ROUNDS", 0)) or None
+    validation_fraction: float = 0.1
+    # Fold-level CV scores, reused by later searches on the same training data
+    use_fit_cache: bool = os.getenv("MODEL_FIT_CACHE", "1") == "1"
+    fit_cache_path: str = os.getenv("MODEL_FIT_CACHE_PATH", os.path.join("artifacts", "fit_cache.sqlite"))
+    # Adds a linear SGDRegressor family, the linear model incremental mode
+    # can update with partial_fit
+    include_sgd: bool = os.getenv("MODEL_INCLUDE_SGD", "0") == "1"
+    # Incremental mode: trees / boosting rounds added per update, and
+    # partial_fit passes over the new rows
+    incremental_rounds: int = int(os.getenv("MODEL_INCREMENTAL_ROUNDS", 50))
+    incremental_sgd_epochs: int = 5
+    # Also refit the model from scratch on all rows and log the R² and time
+    # the incremental update traded
+    compare_incremental_with_full: bool = os.getenv("MODEL_INCREMENTAL_COMPARE", "1") == "1"
 
 class ModelTrainer:
     def __init__(self):
@@ -40,67 +87,392 @@ class ModelTrainer:
         r2 = r2_score(actual, pred)
         return rmse, mae, r2
 
-    def initiate_model_trainer(self, train_array, test_array):
+    def get_models(self):
+        """
+        Returns a fresh, unfitted estimator for every model family.
+        """
+        # Imported here so only training pays for loading the boosting libraries
+        from catboost import CatBoostRegressor
+        from xgboost import XGBRegressor
+
+        models = {
+            "Linear Regression": LinearRegression(),
+            "Decision Tree": DecisionTreeRegressor(),
+            "Random Forest": RandomForestRegressor(),
+            "Gradient Boosting": GradientBoostingRegressor(),
+            "XGBRegressor": XGBRegressor(),
+            "CatBoosting Regressor": CatBoostRegressor(verbose=0),
+            #"K-Neighbours Regressor": KNeighboursRegressor(),
+            "AdaBoost Regressor": AdaBoostRegressor(),
+        }
+        if self.model_trainer_config.include_sgd:
+            models["SGD Regressor"] = SGDRegressor(random_state=42)
+        return models
+
+    def get_params(self):
+        """
+        Returns the hyperparameter grid searched for every model family.
+        """
+        params = {
+            "Decision Tree": {
+                "criterion": ["squared_error", "friedman_mse", "absolute_error", "poisson"],
+                # 'splitter': ['best', 'random'],
+                # 'max_features': ['sqrt', 'log2']
+            },
+            "Random Forest": {
+                # "criterion": ["squared_error", "friedam_mse", "absolute_error", "poisson"],
+                # 'max_features': ['sqrt', 'log2', 'None'],
+                "n_estimators": [8, 16, 32, 64, 128, 256]
+            },
+            "Gradient Boosting": {
+                # "loss": ["squared_error", "absolute_error", "huber", "quantile"],
+                "learning_rate": [0.1, 0.01, 0.05, 0.001],
+                "subsample": [0.6, 0.7, 0.75, 0.8, 0.85, 0.9],
+                # 'criterion': ['friedman_mse', 'squared_error'],
+                # 'max_features': ['sqrt', 'log2', 'auto'],
+                "n_estimators": [8, 16, 32, 64, 128, 256]
+            },
+            "Linear Regression": {},
+            "XGBRegressor": {
+                "learning_rate": [0.1, 0.01, 0.05, 0.001],
+                "n_estimators": [8, 16, 32, 64, 128, 256]
+            },
+            "CatBoosting Regressor": {
+                "depth": [6, 8, 10],
+                "learning_rate": [0.1, 0.01, 0.05, 0.001],
+                "iterations": [30, 50, 100]
+            },
+            "AdaBoost Regressor": {
+                "learning_rate": [0.1, 0.01, 0.05, 0.001],
+                # 'loss': ['linear', 'square', 'exponential'],
+                "n_estimators": [8, 16, 32, 64, 128, 256]
+            }
+        }
+        if self.model_trainer_config.include_sgd:
+            params["SGD Regressor"] = {
+                "alpha": [0.0001, 0.001, 0.01],
+            }
+        return params
+
+    def apply_early_stopping(self, models, params, X_val, y_val):
+        """
+        Switches the boosting families to early stopping: the rounds axis is
+        dropped from their grid, the round count is capped at
+        max_boosting_rounds (or the grid's largest value), and XGBoost/CatBoost get the validation slice
+        as eval_set. Gradient Boosting holds out validation_fraction of each
+        training fold itself. Returns the fit params for evaluate_model.
+        """
+        config = self.model_trainer_config
+        rounds = config.early_stopping_rounds
+        fit_params = {}
+
+        early_stopping_settings = {
+            "Gradient Boosting": ("n_estimators", {
+                "n_iter_no_change": rounds,
+                "validation_fraction": config.validation_fraction,
+            }),
+            "XGBRegressor": ("n_estimators", {"early_stopping_rounds": rounds}),
+            "CatBoosting Regressor": ("iterations", {"early_stopping_rounds": rounds}),
+        }
+        for name, (rounds_param, settings) in early_stopping_settings.items():
+            if name not in models:
+                continue
+            max_rounds = config.max_boosting_rounds or max(params[name].get(rounds_param, [100]))
+            models[name].set_params(**{rounds_param: max_rounds}, **settings)
+            params[name] = {key: values for key, values in params[name].items() if key != rounds_param}
+
+        if "XGBRegressor" in models:
+            fit_params["XGBRegressor"] = {"eval_set": [(X_val, y_val)], "verbose": False}
+        if "CatBoosting Regressor" in models:
+            fit_params["CatBoosting Regressor"] = {"eval_set": [(X_val, y_val)]}
+
+        return fit_params
+
+    @staticmethod
+    def search_models(models, params, train_data, test_data, fit_params, validation_split=None, **search_kwargs):
+        """
+        Runs evaluate_model over all families. validation_split is the
+        leading part of train_data that excludes the validation slice.
+        Every family cross-validates on the same folds of those rows, so
+        their CV scores are comparable; families whose fit_params carry an
+        eval_set are also refit on them only, so they never train on the
+        rows they stop on, while every other family is refit on all of
+        train_data. The refit estimators replace the entries in `models`.
+        Returns the report in `models` order.
+        """
+        X_train, y_train = train_data
+        X_test, y_test = test_data
+        X_fit, y_fit = validation_split or train_data
+        folds = make_folds(X_fit)
+        held_out = [name for name in models if "eval_set" in fit_params.get(name, {})]
+        groups = [([name for name in models if name not in held_out], X_train, y_train), (held_out, X_fit, y_fit)]
+
+        report = {}
+        for names, X, y in groups:
+            if not names:
+                continue
+            group = {name: models[name] for name in names}
+            report.update(evaluate_model(
+                X, y, X_test, y_test, group, {name: params[name] for name in names},
+                fit_params={name: fit_params[name] for name in names if name in fit_params},
+                cv=folds,
+                **search_kwargs,
+            ))
+            models.update(group)
+        return {name: report[name] for name in models}
+
+    def log_search_stats(self, search_stats):
+        """
+        Logs how much of the search budget each model family used.
+        """
+        total_wall = sum(stats.wall_time for stats in search_stats.values()) or 1.0
+        for name, stats in sorted(search_stats.items(), key=lambda item: -item[1].wall_time):
+            logging.info(
+                f"Search {name}: {stats.wall_time:.2f}s wall ({100 * stats.wall_time / total_wall:.0f}%), "
+                f"{stats.cpu_time:.2f}s cpu, {stats.fit_time:.2f}s fit, "
+                f"{stats.n_fits} fits ({stats.cached_fits} from cache, {stats.time_saved:.2f}s saved), "
+                f"peak rss {stats.peak_rss_mb} MB"
+                + (f", stopped at round {stats.stopping_round}" if stats.stopping_round is not None else "")
+            )
+        n_fits = sum(stats.n_fits for stats in search_stats.values())
+        cached_fits = sum(stats.cached_fits for stats in search_stats.values())
+        time_saved = sum(stats.time_saved for stats in search_stats.values())
+        logging.info(f"Fit cache: {cached_fits}/{n_fits} fits served from cache, {time_saved:.2f}s of fitting saved")
+
+    def log_strategy_comparison(self, strategy_name, search_stats, grid_stats):
+        """
+        Logs the time a non-exhaustive strategy saved per family against the
+        change in test R² compared with the full grid.
+        """
+        for name, stats in search_stats.items():
+            grid = grid_stats[name]
+            logging.info(
+                f"{strategy_name} vs grid, {name}: {grid.wall_time - stats.wall_time:+.2f}s saved "
+                f"({stats.n_fits}/{grid.n_fits} fits), test r2 {stats.test_score:.4f} vs "
+                f"{grid.test_score:.4f} ({stats.test_score - grid.test_score:+.4f})"
+            )
+        saved = sum(grid_stats[name].wall_time - stats.wall_time for name, stats in search_stats.items())
+        best_delta = max(s.test_score for s in search_stats.values()) - max(s.test_score for s in grid_stats.values())
+        logging.info(f"{strategy_name} vs grid overall: {saved:.2f}s saved, best test r2 {best_delta:+.4f}")
+        return saved, best_delta
+
+    @staticmethod
+    def as_trained(model):
+        """
+        Unfitted copy of a fitted model that fits the same number of trees /
+        rounds it ended up with, with early stopping switched off, so it can
+        be refit or continued without a validation slice.
+        """
+        name = type(model).__name__
+        stopping_round = get_stopping_round(model)
+        params = {}
+        if name == "XGBRegressor":
+            params["early_stopping_rounds"] = None
+            if stopping_round is not None:
+                params["n_estimators"] = stopping_round + 1
+        elif name == "CatBoostRegressor":
+            params["early_stopping_rounds"] = None
+            if stopping_round is not None:
+                params["iterations"] = stopping_round + 1
+        elif name == "GradientBoostingRegressor":
+            params.update(n_iter_no_change=None, n_estimators=model.n_estimators_)
+        return clone(model).set_params(**params)
+
+    @staticmethod
+    def stack_rows(X, X_new):
+        if sparse.issparse(X):
+            return sparse.vstack([X, X_new], format="csr")
+        return np.concatenate([X, X_new])
+
+    def update_model(self, model, X_new, y_new, X_seen, y_seen):
+        """
+        Updates a fitted model with newly arrived rows:
+        RandomForest / GradientBoosting grow incremental_rounds more trees
+        on the new rows (warm_start), XGBoost and CatBoost continue boosting
+        from the existing booster, and models with partial_fit (SGD) take
+        incremental_sgd_epochs passes over them. Anything else is refit on
+        all rows. Returns (model, how it was updated).
+        """
+        config = self.model_trainer_config
+        rounds = config.incremental_rounds
+        name = type(model).__name__
+
+        if name in ("RandomForestRegressor", "GradientBoostingRegressor"):
+            if name == "GradientBoostingRegressor":
+                # Early stopping would hold out part of the new rows
+                model.set_params(n_iter_no_change=None)
+            model.set_params(warm_start=True, n_estimators=len(model.estimators_) + rounds)
+            model.fit(X_new, y_new)
+            return model, "warm_start"
+
+        if name == "XGBRegressor":
+            booster = model.get_booster()
+            stopping_round = get_stopping_round(model)
+            if stopping_round is not None:
+                # Drop the rounds trained after the best one
+                booster = booster[:stopping_round + 1]
+            updated = self.as_trained(model).set_params(n_estimators=rounds)
+            updated.fit(X_new, y_new, xgb_model=booster)
+            return updated, "continued boosting"
+
+        if name == "CatBoostRegressor":
+            updated = self.as_trained(model).set_params(iterations=rounds)
+            updated.fit(X_new, y_new, init_model=model)
+            return updated, "continued boosting"
+
+        if hasattr(model, "partial_fit"):
+            for _ in range(config.incremental_sgd_epochs):
+                model.partial_fit(X_new, y_new)
+            return model, "partial_fit"
+
+        logging.info(f"{name} cannot be updated incrementally, refitting it on all {len(y_seen) + len(y_new)} rows")
+        refit = self.as_trained(model)
+        refit.fit(self.stack_rows(X_seen, X_new), np.concatenate([y_seen, y_new]))
+        return refit, "full refit"
+
+    def initiate_incremental_training(self, seen_data, new_data, test_data):
+        """
+        Updates the saved model with new_data instead of searching and
+        training from scratch. seen_data is what the model was trained on;
+        it is only used by models without an incremental update and by the
+        full-retrain comparison. Returns a report of both.
+        """
         try:
-            logging.info("Splitting training and testing data")
-            X_train, y_train, X_test, y_test = (
-                train_array[:, :-1],
-                train_array[:, -1],
-                test_array[:, :-1],
-                test_array[:, -1],
+            config = self.model_trainer_config
+            X_seen, y_seen = self.split_features_target(seen_data)
+            X_new, y_new = self.split_features_target(new_data)
+            X_test, y_test = self.split_features_target(test_data)
+
+            model = load_object(config.trained_model_file_path)
+            name = type(model).__name__
+            # Taken before the update, which changes RF/GB/SGD in place
+            full_model = self.as_trained(model) if config.compare_incremental_with_full else None
+
+            with track_resources() as usage:
+                model, method = self.update_model(model, X_new, y_new, X_seen, y_seen)
+            predicted = model.predict(X_test)
+            rmse, mae, r2 = self.eval_metrics(y_test, predicted)
+
+            report = {
+                "model": name,
+                "method": method,
+                "new_rows": len(y_new),
+                "seen_rows": len(y_seen),
+                "incremental_time": round(usage.wall_time, 3),
+                "incremental_r2": r2,
+            }
+            if full_model is not None:
+                with track_resources() as full_usage:
+                    full_model.fit(self.stack_rows(X_seen, X_new), np.concatenate([y_seen, y_new]))
+                full_r2 = r2_score(y_test, full_model.predict(X_test))
+                report.update(
+                    full_time=round(full_usage.wall_time, 3),
+                    full_r2=full_r2,
+                    r2_delta=r2 - full_r2,
+                    speedup=round(full_usage.wall_time / usage.wall_time, 1) if usage.wall_time else None,
+                )
+            logging.info(
+                f"Incremental update of {name} ({method}) with {len(y_new)} rows: "
+                f"{usage.wall_time:.2f}s, test r2 {r2:.4f}"
+                + (f"; full retrain {report['full_time']:.2f}s, test r2 {report['full_r2']:.4f} "
+                   f"({report['r2_delta']:+.4f})" if full_model is not None else "")
             )
 
-            models = {
-                "Linear Regression": LinearRegression(),
-                "Decision Tree": DecisionTreeRegressor(),
-                "Random Forest": RandomForestRegressor(),
-                "Gradient Boosting": GradientBoostingRegressor(),
-                "XGBRegressor": XGBRegressor(),
-                "CatBoosting Regressor": CatBoostRegressor(verbose=0),
-                #"K-Neighbours Regressor": KNeighboursRegressor(),
-                "AdaBoost Regressor": AdaBoostRegressor(),
-            }
+            if r2 < 0.6:
+                raise CustomException("model is not good enough")
 
-            # Hyperparameter tuning
-
-            params = {
-                "Decision Tree": {
-                    "criterion": ["squared_error", "friedman_mse", "absolute_error", "poisson"],
-                    # 'splitter': ['best', 'random'],
-                    # 'max_features': ['sqrt', 'log2']
-                },
-                "Random Forest": {
-                    # "criterion": ["squared_error", "friedam_mse", "absolute_error", "poisson"],
-                    # 'max_features': ['sqrt', 'log2', 'None'],
-                    "n_estimators": [8, 16, 32, 64, 128, 256]
-                },
-                "Gradient Boosting": {
-                    # "loss": ["squared_error", "absolute_error", "huber", "quantile"],
-                    "learning_rate": [0.1, 0.01, 0.05, 0.001],
-                    "subsample": [0.6, 0.7, 0.75, 0.8, 0.85, 0.9],
-                    # 'criterion': ['friedman_mse', 'squared_error'],
-                    # 'max_features': ['sqrt', 'log2', 'auto'],
-                    "n_estimators": [8, 16, 32, 64, 128, 256]
-                },
-                "Linear Regression": {},
-                "XGBRegressor": {
-                    "learning_rate": [0.1, 0.01, 0.05, 0.001],
-                    "n_estimators": [8, 16, 32, 64, 128, 256]
-                },
-                "CatBoosting Regressor": {
-                    "depth": [6, 8, 10],
-                    "learning_rate": [0.1, 0.01, 0.05, 0.001],
-                    "iterations": [30, 50, 100]
-                },
-                "AdaBoost Regressor": {
-                    "learning_rate": [0.1, 0.01, 0.05, 0.001],
-                    # 'loss': ['linear', 'square', 'exponential'],
-                    "n_estimators": [8, 16, 32, 64, 128, 256]
-                }
-            }
-            model_report:dict = evaluate_model(
-                X_train, y_train, X_test, y_test, models, params
+            tracker = get_tracker()
+            run = tracker.start_run(tags={"best_model": name, "mode": "incremental"})
+            metrics = {"rmse": rmse, "r2": r2, "mae": mae, "incremental_time": report["incremental_time"]}
+            if full_model is not None:
+                metrics.update(full_r2=report["full_r2"], full_time=report["full_time"])
+            tracker.log_metrics(run, metrics)
+            tracker.log_model(run, model, "model")
+            tracker.end_run(run)
+
+            timer = MODEL_SAVE_SECONDS.timer()
+            save_object(file_path=config.trained_model_file_path, obj=model)
+            timer.lap("incremental")
+            return report
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def split_features_target(data):
+        """
+        Accepts an (X, y) pair, or a single array with the target as the
+        last column (the older train_arr/test_arr layout).
+        """
+        if isinstance(data, (tuple, list)):
+            X, y = data
+            return X, y
+        if sparse.issparse(data):
+            data = data.tocsc()
+            return data[:, :-1].tocsr(), data[:, -1].toarray().ravel()
+        return data[:, :-1], data[:, -1]
+
+    def initiate_model_trainer(self, train_array, test_array):
+        try:
+            logging.info("Splitting training and testing data")
+            X_train, y_train = self.split_features_target(train_array)
+            X_test, y_test = self.split_features_target(test_array)
+
+            models = self.get_models()
+            params = self.get_params()
+
+            config = self.model_trainer_config
+            executor = QueueExecutor() if config.search_backend == "queue" else None
+            search_strategy = get_search_strategy(
+                config.search_strategy,
+                max_fits=config.search_max_fits,
+                time_budget=config.search_time_budget,
+                fit_cache=FitResultCache(config.fit_cache_path) if config.use_fit_cache else None,
+                executor=executor,
             )
+            logging.info(f"Hyperparameter search strategy: {search_strategy.name}, backend: {config.search_backend}")
+
+            fit_params = {}
+            validation_split = None
+            if config.early_stopping:
+                # Early stopping needs data the search never trains on; only
+                # the families given an eval_set train without it
+                X_fit, X_val, y_fit, y_val = train_test_split(
+                    X_train, y_train, test_size=config.validation_fraction, random_state=42
+                )
+                # Same rows with the validation slice last, so the folds
+                # built over X_fit index into X_train as well
+                X_train, y_train = self.stack_rows(X_fit, X_val), np.concatenate([y_fit, y_val])
+                validation_split = (X_fit, y_fit)
+                fit_params = self.apply_early_stopping(models, params, X_val, y_val)
+
+            search_stats = {}
+            try:
+                model_report:dict = self.search_models(
+                    models, params, (X_train, y_train), (X_test, y_test), fit_params, validation_split,
+                    n_jobs=config.search_n_jobs,
+                    search_stats=search_stats,
+                    search_strategy=search_strategy,
+                )
+            finally:
+                if executor is not None:
+                    executor.close()
+            self.log_search_stats(search_stats)
+
+            if config.compare_with_grid and search_strategy.name != "grid":
+                grid_stats = {}
+                grid_models = self.get_models()
+                grid_params = self.get_params()
+                grid_fit_params = {}
+                if config.early_stopping:
+                    grid_fit_params = self.apply_early_stopping(grid_models, grid_params, X_val, y_val)
+                self.search_models(
+                    grid_models, grid_params, (X_train, y_train), (X_test, y_test), grid_fit_params,
+                    validation_split,
+                    n_jobs=config.search_n_jobs,
+                    search_stats=grid_stats,
+                )
+                self.log_strategy_comparison(search_strategy.name, search_stats, grid_stats)
 
             ## To get best model score from dictionary
             best_model_score = max(sorted(model_report.values()))
@@ -111,7 +483,7 @@ class ModelTrainer:
             ]
             best_model = models[best_model_name]
 
-            print(f"Best model found: {best_model_name} with score: {best_model_score}")
+            logging.info(f"Best model found: {best_model_name} with score: {best_model_score}")
 
             model_name = list(params.keys())
 
@@ -126,67 +498,39 @@ class ModelTrainer:
 
 
 
-            # Set MLflow tracking URI and registry URI
-            mlflow.set_tracking_uri("https://dagshub.com/PiyushAgarwalcs/Data_Science_Project.mlflow")
-            mlflow.set_registry_uri("https://dagshub.com/PiyushAgarwalcs/Data_Science_Project.mlflow")
-            
-            # Set authentication for DagsHub (you'll need to set these environment variables)
-            # Set these in your system environment or create a .env file:
-            # MLFLOW_TRACKING_USERNAME=your_dagshub_username
-            # MLFLOW_TRACKING_PASSWORD=your_dagshub_token
-            if os.getenv("MLFLOW_TRACKING_USERNAME") and os.getenv("MLFLOW_TRACKING_PASSWORD"):
-                os.environ["MLFLOW_TRACKING_USERNAME"] = os.getenv("MLFLOW_TRACKING_USERNAME")
-                os.environ["MLFLOW_TRACKING_PASSWORD"] = os.getenv("MLFLOW_TRACKING_PASSWORD")
-            
-            tracking_url_type_store = urlparse(mlflow.get_tracking_uri()).scheme
-
-            # ML flow
-            logging.info(f"MLflow tracking URI: {mlflow.get_tracking_uri()}")
-            logging.info(f"MLflow registry URI: {mlflow.get_registry_uri()}")
-            
-            # Start MLflow run
-            with mlflow.start_run():
-
-                predicted_qualities = best_model.predict(X_test)
-
-                (rmse, mae, r2) = self.eval_metrics(y_test, predicted_qualities)
-
-                # mlflow.log_param(best_params)
-                for param_name, param_value in best_params.items():
-                    mlflow.log_param(param_name, param_value)
-                
-                mlflow.log_metric("rmse", rmse)
-                mlflow.log_metric("r2", r2)
-                mlflow.log_metric("mae", mae)
-                
-            
-                # Log the model (without registration to avoid DagsHub compatibility issues)
-                try:
-                    mlflow.sklearn.log_model(best_model, "model")
-                    logging.info("Model logged successfully to MLflow")
-                except Exception as e:
-                    logging.warning(f"Could not log model to MLflow: {e}")
-                    logging.info("Continuing without model logging...")
-
-
-
-
-
-
+            # Tracking goes through a background worker (local ./mlruns unless
+            # MLFLOW_TRACKING_URI points elsewhere), so nothing here waits on
+            # the tracking server
+            tracker = get_tracker()
+            logging.info(f"MLflow tracking URI: {tracker.config.tracking_uri}")
 
+            predicted_qualities = best_model.predict(X_test)
 
+            (rmse, mae, r2) = self.eval_metrics(y_test, predicted_qualities)
 
+            run = tracker.start_run(tags={"best_model": best_model_name})
+            tracker.log_params(run, best_params)
 
+            metrics = {"rmse": rmse, "r2": r2, "mae": mae}
+            stopping_round = search_stats[best_model_name].stopping_round
+            if stopping_round is not None:
+                metrics["stopping_round"] = stopping_round
+            tracker.log_metrics(run, metrics)
 
+            # Logged as plain artifacts (no model registration), which DagsHub accepts
+            tracker.log_model(run, best_model, "model")
+            tracker.end_run(run)
 
             if best_model_score < 0.6:
                 raise CustomException("model is not good enough")
             logging.info(f"Best model found on both training and testing dataset.")
 
+            timer = MODEL_SAVE_SECONDS.timer()
             save_object(
                 file_path=self.model_trainer_config.trained_model_file_path,
                 obj=best_model
             )
+            timer.lap("full")
 
             predicted = best_model.predict(X_test)
             r2_square = r2_score(y_test, predicted)
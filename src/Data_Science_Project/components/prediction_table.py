@@ -0,0 +1,182 @@
+import os
+import sys
+import json
+import itertools
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.Data_Science_Project.exception import CustomException
+from src.Data_Science_Project.logger import logging
+from src.Data_Science_Project.utils import load_object, file_digest
+
+
+@dataclass
+class PredictionTableConfig:
+    table_file_path: str = os.path.join("artifacts", "prediction_table.npy")
+    metadata_file_path: str = os.path.join("artifacts", "prediction_table.json")
+    preprocessor_file_path: str = os.path.join("artifacts", "preprocessor.pkl")
+    model_file_path: str = os.path.join("artifacts", "model.pkl")
+    score_min: int = 0
+    score_max: int = 100
+
+
+# Frames up to this many rows are looked up without pandas indexing
+SMALL_FRAME_ROWS = 64
+
+
+def get_column_layout(preprocessor):
+    """
+    Reads the categorical levels and numerical columns from a fitted preprocessor.
+    """
+    categorical_cols, categories, numerical_cols = [], [], []
+    for name, transformer, cols in preprocessor.transformers_:
+        if name == "cat_pipeline":
+            encoder = transformer.named_steps["one_hot_encoder"]
+            categorical_cols = list(cols)
+            categories = [list(levels) for levels in encoder.categories_]
+        elif name == "num_pipeline":
+            numerical_cols = list(cols)
+    return categorical_cols, categories, numerical_cols
+
+
+class PredictionTableBuilder:
+    """
+    Scores every combination of categorical levels and integer scores once
+    and stores the predictions as a flat float32 array.
+    """
+
+    def __init__(self, config: PredictionTableConfig = None):
+        self.config = config or PredictionTableConfig()
+
+    def initiate_table_build(self):
+        try:
+            preprocessor = load_object(self.config.preprocessor_file_path)
+            model = load_object(self.config.model_file_path)
+            categorical_cols, categories, numerical_cols = get_column_layout(preprocessor)
+
+            scores = np.arange(self.config.score_min, self.config.score_max + 1)
+            score_grid = np.stack(
+                np.meshgrid(*[scores] * len(numerical_cols), indexing="ij"), axis=-1
+            ).reshape(-1, len(numerical_cols))
+            block_size = len(score_grid)
+            n_combinations = int(np.prod([len(levels) for levels in categories]))
+
+            logging.info(
+                f"Building prediction table: {n_combinations} categorical combinations "
+                f"x {block_size} score pairs"
+            )
+
+            # Write next to the final path and rename, so a server never maps
+            # a half-written table
+            tmp_path = self.config.table_file_path + ".tmp"
+            table = np.lib.format.open_memmap(
+                tmp_path, mode="w+", dtype=np.float32, shape=(n_combinations * block_size,)
+            )
+
+            block = pd.DataFrame(score_grid, columns=numerical_cols)
+            level_products = itertools.product(*categories)
+            for i, levels in enumerate(level_products):
+                for col, level in zip(categorical_cols, levels):
+                    block[col] = level
+                preds = model.predict(preprocessor.transform(block))
+                table[i * block_size:(i + 1) * block_size] = preds
+
+            table.flush()
+            del table
+            os.replace(tmp_path, self.config.table_file_path)
+
+            metadata = {
+                "categorical_cols": categorical_cols,
+                "categories": categories,
+                "numerical_cols": numerical_cols,
+                "score_min": self.config.score_min,
+                "score_max": self.config.score_max,
+                "artifact_digest": file_digest(
+                    self.config.preprocessor_file_path, self.config.model_file_path
+                ),
+            }
+            with open(self.config.metadata_file_path, "w") as file_obj:
+                json.dump(metadata, file_obj, indent=2)
+
+            logging.info(f"Prediction table saved at {self.config.table_file_path}")
+            return self.config.table_file_path
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+class PredictionTable:
+    """
+    Memory-mapped lookup over a table built by PredictionTableBuilder.
+    """
+
+    def __init__(self, table, metadata):
+        self.table = table
+        self.categorical_cols = metadata["categorical_cols"]
+        self.numerical_cols = metadata["numerical_cols"]
+        self.score_min = metadata["score_min"]
+        self.score_max = metadata["score_max"]
+        self.artifact_digest = metadata["artifact_digest"]
+        self._level_index = [pd.Index(levels) for levels in metadata["categories"]]
+        self._level_codes = [
+            {level: code for code, level in enumerate(levels)} for levels in metadata["categories"]
+        ]
+        self._shape = tuple(len(levels) for levels in metadata["categories"]) + (
+            self.score_max - self.score_min + 1,
+        ) * len(self.numerical_cols)
+
+    @classmethod
+    def load(cls, config: PredictionTableConfig = None):
+        config = config or PredictionTableConfig()
+        with open(config.metadata_file_path) as file_obj:
+            metadata = json.load(file_obj)
+        table = np.load(config.table_file_path, mmap_mode="r")
+        return cls(table, metadata)
+
+    def lookup(self, features):
+        """
+        Returns (predictions, found) for a feature DataFrame. Rows with unknown
+        or missing categories, or non-integer/out-of-range scores, have
+        found=False and must be scored by the model.
+        """
+        n_rows = len(features)
+        found = np.ones(n_rows, dtype=bool)
+        coords = []
+
+        # pandas' vectorized lookups carry a fixed cost that dominates for
+        # single requests, so small frames use plain dict lookups instead
+        small = n_rows <= SMALL_FRAME_ROWS
+
+        for col, level_index, level_codes in zip(
+            self.categorical_cols, self._level_index, self._level_codes
+        ):
+            if small:
+                codes = np.array([level_codes.get(v, -1) for v in features[col].tolist()], dtype=np.int64)
+            else:
+                codes = level_index.get_indexer(features[col])
+            found &= codes >= 0
+            coords.append(codes)
+
+        for col in self.numerical_cols:
+            try:
+                values = features[col].to_numpy(dtype=np.float64)
+            except (TypeError, ValueError):
+                values = pd.to_numeric(features[col], errors="coerce").to_numpy(dtype=np.float64)
+            valid = (
+                np.isfinite(values)
+                & (values == np.floor(values))
+                & (values >= self.score_min)
+                & (values <= self.score_max)
+            )
+            found &= valid
+            coords.append(np.where(valid, values, self.score_min).astype(np.int64) - self.score_min)
+
+        preds = np.zeros(n_rows, dtype=np.float64)
+        if found.any():
+            flat_index = np.ravel_multi_index(
+                tuple(coord[found] for coord in coords), self._shape
+            )
+            preds[found] = self.table[flat_index]
+        return preds, found
@@ -0,0 +1,408 @@
+import os
+import sys
+import json
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.Data_Science_Project.exception import CustomException
+from src.Data_Science_Project.logger import logging
+from src.Data_Science_Project.utils import load_object, file_digest, read_frame
+from src.Data_Science_Project.components.compiled_preprocessor import (
+    CompiledPreprocessor,
+    verify_compiled_preprocessor,
+)
+
+
+@dataclass
+class ModelExportConfig:
+    export_file_path: str = os.path.join("artifacts", "model_export.npy")
+    metadata_file_path: str = os.path.join("artifacts", "model_export.json")
+    model_file_path: str = os.path.join("artifacts", "model.pkl")
+    preprocessor_file_path: str = os.path.join("artifacts", "preprocessor.pkl")
+    test_data_path: str = os.path.join("artifacts", "test.csv")
+    target_column: str = "math score"
+    # Largest |exported - original| prediction accepted on the test set
+    atol: float = 1e-4
+
+
+# One row per tree node; all trees are stored back to back. Leaves have
+# left == right == -1 and carry the output in `value`. Inner nodes send a
+# row left when float32(x[feature]) <= threshold, or when x is NaN and
+# default_left is set.
+NODE_DTYPE = np.dtype([
+    ("feature", np.int32),
+    ("threshold", np.float32),
+    ("left", np.int32),
+    ("right", np.int32),
+    ("default_left", np.bool_),
+    ("value", np.float64),
+])
+
+
+def _float32_floor(values):
+    """
+    Largest float32 <= each value, so that `x32 <= t64` becomes the
+    float32 comparison `x32 <= t32` with identical results.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = values.astype(np.float32)
+    over = rounded.astype(np.float64) > values
+    rounded[over] = np.nextafter(rounded[over], np.float32(-np.inf))
+    return rounded
+
+
+def _make_nodes(feature, threshold, left, right, value, default_left=None):
+    nodes = np.zeros(len(feature), dtype=NODE_DTYPE)
+    leaf = np.asarray(left) < 0
+    nodes["feature"] = np.where(leaf, 0, feature)
+    nodes["threshold"] = np.where(leaf, 0, threshold)
+    nodes["left"] = np.where(leaf, -1, left)
+    nodes["right"] = np.where(leaf, -1, right)
+    nodes["value"] = value
+    if default_left is not None:
+        nodes["default_left"] = default_left
+    return nodes
+
+
+def _sklearn_tree_nodes(tree):
+    tree = tree.tree_
+    default_left = getattr(tree, "missing_go_to_left", None)
+    return _make_nodes(
+        tree.feature,
+        _float32_floor(tree.threshold),
+        tree.children_left,
+        tree.children_right,
+        tree.value[:, 0, 0],
+        None if default_left is None else default_left.astype(bool),
+    )
+
+
+def _xgboost_trees(model):
+    booster = model.get_booster()
+    raw = json.loads(booster.save_raw("json"))
+    learner = raw["learner"]
+    if learner["objective"]["name"] not in ("reg:squarederror", "reg:linear"):
+        raise ValueError(f"Unsupported XGBoost objective {learner['objective']['name']}")
+    base_score = float(learner["learner_model_param"]["base_score"].strip("[]"))
+
+    trees = learner["gradient_booster"]["model"]["trees"]
+    best_iteration = getattr(model, "best_iteration", None)
+    if getattr(model, "early_stopping_rounds", None) is not None and best_iteration is not None:
+        # predict() only uses the rounds up to the best iteration
+        trees = trees[:best_iteration + 1]
+
+    tree_nodes = []
+    for tree in trees:
+        left = np.asarray(tree["left_children"])
+        # XGBoost goes left on x < split; for float32 x that is x <= the
+        # next float32 below split
+        split = np.asarray(tree["split_conditions"], dtype=np.float32)
+        threshold = np.nextafter(split, np.float32(-np.inf))
+        tree_nodes.append(_make_nodes(
+            tree["split_indices"],
+            threshold,
+            left,
+            tree["right_children"],
+            # Leaves keep their weight in split_conditions
+            np.asarray(tree["split_conditions"], dtype=np.float64),
+            np.asarray(tree["default_left"], dtype=bool),
+        ))
+    return tree_nodes, base_score
+
+
+def _catboost_trees(model):
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "model.json")
+        model.save_model(path, format="json")
+        with open(path) as file_obj:
+            dump = json.load(file_obj)
+
+    features_info = dump["features_info"]
+    if features_info.get("categorical_features") or features_info.get("ctrs"):
+        raise ValueError("CatBoost models with categorical features are not supported")
+    flat_index = {
+        feature["feature_index"]: feature["flat_feature_index"] for feature in features_info["float_features"]
+    }
+    # NaN fails `x > border` unless the feature maps NaN to +inf ("Max")
+    nan_left = {
+        feature["feature_index"]: feature.get("nan_value_treatment") != "Max"
+        for feature in features_info["float_features"]
+    }
+    scale, bias = dump["scale_and_bias"]
+    bias = bias[0] if isinstance(bias, list) else bias
+
+    tree_nodes = []
+    for tree in dump["oblivious_trees"]:
+        # Oblivious tree: split j sets bit j of the leaf index when x > border.
+        # Expand it into a full binary tree whose level j tests split j.
+        splits = tree["splits"]
+        depth = len(splits)
+        n_inner = 2 ** depth - 1
+        levels = np.floor(np.log2(np.arange(n_inner) + 1)).astype(np.int64)
+        features = np.array([flat_index[split["float_feature_index"]] for split in splits], dtype=np.int32)
+        borders = _float32_floor([split["border"] for split in splits])
+        default_left = np.array([nan_left[split["float_feature_index"]] for split in splits], dtype=bool)
+
+        # The leaf reached by path bits b0..b(d-1) (root first) is
+        # leaf_values[sum(b_j << j)], i.e. the bit-reversed BFS position
+        positions = np.arange(2 ** depth)
+        leaf_index = np.zeros_like(positions)
+        for j in range(depth):
+            leaf_index |= ((positions >> (depth - 1 - j)) & 1) << j
+        leaf_values = scale * np.asarray(tree["leaf_values"], dtype=np.float64)[leaf_index]
+
+        inner = np.arange(n_inner)
+        tree_nodes.append(_make_nodes(
+            np.concatenate([features[levels], np.zeros(2 ** depth, dtype=np.int32)]),
+            np.concatenate([borders[levels], np.zeros(2 ** depth, dtype=np.float32)]),
+            np.concatenate([2 * inner + 1, np.full(2 ** depth, -1)]),
+            np.concatenate([2 * inner + 2, np.full(2 ** depth, -1)]),
+            np.concatenate([np.zeros(n_inner), leaf_values]),
+            np.concatenate([default_left[levels], np.zeros(2 ** depth, dtype=bool)]),
+        ))
+    return tree_nodes, float(bias)
+
+
+def export_model(model):
+    """
+    Flattens a fitted model into (nodes, metadata). Supports sklearn
+    DecisionTree, RandomForest, GradientBoosting and AdaBoost regressors,
+    XGBRegressor, CatBoostRegressor and linear models.
+    """
+    name = type(model).__name__
+    metadata = {"model_class": name, "n_features": int(getattr(model, "n_features_in_", 0) or 0)}
+    tree_nodes = []
+
+    if name == "DecisionTreeRegressor":
+        tree_nodes = [_sklearn_tree_nodes(model)]
+        metadata.update(kind="trees", aggregation="sum", base_score=0.0, scale=1.0)
+    elif name in ("RandomForestRegressor", "ExtraTreesRegressor"):
+        tree_nodes = [_sklearn_tree_nodes(tree) for tree in model.estimators_]
+        metadata.update(kind="trees", aggregation="sum", base_score=0.0, scale=1.0 / len(tree_nodes))
+    elif name == "GradientBoostingRegressor":
+        if model.init_ == "zero":
+            base_score = 0.0
+        elif hasattr(model.init_, "constant_"):
+            base_score = float(np.ravel(model.init_.constant_)[0])
+        else:
+            raise ValueError("Only constant init estimators are supported")
+        tree_nodes = [_sklearn_tree_nodes(stage[0]) for stage in model.estimators_]
+        metadata.update(kind="trees", aggregation="sum", base_score=base_score, scale=float(model.learning_rate))
+    elif name == "AdaBoostRegressor":
+        tree_nodes = [_sklearn_tree_nodes(tree) for tree in model.estimators_]
+        metadata.update(
+            kind="trees",
+            aggregation="weighted_median",
+            tree_weights=[float(w) for w in model.estimator_weights_[:len(tree_nodes)]],
+        )
+    elif name == "XGBRegressor":
+        tree_nodes, base_score = _xgboost_trees(model)
+        metadata.update(kind="trees", aggregation="sum", base_score=base_score, scale=1.0)
+    elif name == "CatBoostRegressor":
+        tree_nodes, bias = _catboost_trees(model)
+        metadata.update(kind="trees", aggregation="sum", base_score=bias, scale=1.0)
+    elif hasattr(model, "coef_") and hasattr(model, "intercept_") and np.ndim(model.coef_) == 1:
+        metadata.update(
+            kind="linear",
+            coef=[float(c) for c in model.coef_],
+            intercept=float(model.intercept_),
+        )
+    else:
+        raise ValueError(f"Cannot export {name}")
+
+    if not tree_nodes:
+        return np.zeros(0, dtype=NODE_DTYPE), metadata
+
+    metadata["max_depth"] = max(_tree_depth(nodes) for nodes in tree_nodes)
+
+    # Re-base child indices so all trees live in one array
+    offsets = np.cumsum([0] + [len(nodes) for nodes in tree_nodes])
+    for nodes, offset in zip(tree_nodes, offsets):
+        inner = nodes["left"] >= 0
+        nodes["left"][inner] += offset
+        nodes["right"][inner] += offset
+    metadata["roots"] = [int(offset) for offset in offsets[:-1]]
+    return np.concatenate(tree_nodes), metadata
+
+
+def _tree_depth(nodes):
+    depth, frontier = 0, np.array([0])
+    while True:
+        inner = frontier[nodes["left"][frontier] >= 0]
+        if len(inner) == 0:
+            return depth
+        frontier = np.concatenate([nodes["left"][inner], nodes["right"][inner]])
+        depth += 1
+
+
+class ExportedModel:
+    """
+    Library-free predictor over the arrays written by ModelExporter. Rows are
+    pushed through all trees at once, one tree level per NumPy step.
+    """
+
+    # Rows per traversal step; small enough that the (rows x trees) index
+    # vectors stay in cache, 256 measured fastest for 100-300 trees
+    block_rows = 256
+
+    def __init__(self, nodes, metadata):
+        self.metadata = metadata
+        self.kind = metadata["kind"]
+        if self.kind == "unsupported":
+            return
+        if self.kind == "linear":
+            self.coef = np.asarray(metadata["coef"], dtype=np.float64)
+            self.intercept = metadata["intercept"]
+            return
+
+        # Traversal tables: children[2 * node] is the left child and
+        # children[2 * node + 1] the right one. Leaves point back at
+        # themselves, so every row can take max_depth steps without checking
+        # whether it already reached a leaf.
+        left = np.asarray(nodes["left"], dtype=np.int64)
+        right = np.asarray(nodes["right"], dtype=np.int64)
+        leaf = left < 0
+        own = np.arange(len(nodes), dtype=np.int64)
+        self.children = np.empty(2 * len(nodes), dtype=np.int64)
+        self.children[0::2] = np.where(leaf, own, left)
+        self.children[1::2] = np.where(leaf, own, right)
+        self.feature = np.where(leaf, 0, nodes["feature"]).astype(np.int64)
+        self.threshold = np.ascontiguousarray(nodes["threshold"])
+        self.default_left = np.ascontiguousarray(nodes["default_left"])
+        self.value = np.ascontiguousarray(nodes["value"])
+        self.roots = np.asarray(metadata["roots"], dtype=np.int64)
+        self.max_depth = metadata["max_depth"]
+        self.aggregation = metadata["aggregation"]
+        if self.aggregation == "weighted_median":
+            self.tree_weights = np.asarray(metadata["tree_weights"], dtype=np.float64)
+        else:
+            self.base_score = metadata["base_score"]
+            self.scale = metadata["scale"]
+
+    @classmethod
+    def load(cls, config: ModelExportConfig = None):
+        config = config or ModelExportConfig()
+        with open(config.metadata_file_path) as file_obj:
+            metadata = json.load(file_obj)
+        nodes = np.load(config.export_file_path, mmap_mode="r")
+        return cls(nodes, metadata)
+
+    def _leaf_values(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        has_nan = np.isnan(flat_X).any()
+        # One flat (rows x trees) index vector; row_offset locates each
+        # entry's row in flat_X
+        idx = np.tile(self.roots, n_rows)
+        row_offset = np.repeat(np.arange(n_rows, dtype=np.int64) * n_features, len(self.roots))
+        for _ in range(self.max_depth):
+            x = flat_X[row_offset + self.feature[idx]]
+            go_right = x > self.threshold[idx]
+            if has_nan:
+                go_right |= np.isnan(x) & ~self.default_left[idx]
+            idx = self.children[2 * idx + go_right]
+        return self.value[idx].reshape(n_rows, len(self.roots))
+
+    def _aggregate(self, leaf_values):
+        if self.aggregation == "sum":
+            return self.base_score + self.scale * leaf_values.sum(axis=1)
+        # AdaBoost.R2: weighted median of the per-tree predictions
+        order = np.argsort(leaf_values, axis=1)
+        cumulative = np.cumsum(self.tree_weights[order], axis=1)
+        median_pos = (cumulative >= 0.5 * cumulative[:, -1:]).argmax(axis=1)
+        median_tree = order[np.arange(len(order)), median_pos]
+        return leaf_values[np.arange(len(order)), median_tree]
+
+    def predict(self, X):
+        if hasattr(X, "toarray"):
+            X = X.toarray()
+        if self.kind == "linear":
+            return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), self.block_rows):
+            block = X[start:start + self.block_rows]
+            out[start:start + len(block)] = self._aggregate(self._leaf_values(block))
+        return out
+
+
+class ModelExporter:
+    """
+    Exports the trained model.pkl to flat node arrays, after checking that
+    the exported predictor reproduces model.predict on the test split.
+    """
+
+    def __init__(self, config: ModelExportConfig = None):
+        self.config = config or ModelExportConfig()
+
+    def _write(self, nodes, metadata):
+        tmp_path = self.config.export_file_path + ".tmp.npy"
+        np.save(tmp_path, nodes)
+        os.replace(tmp_path, self.config.export_file_path)
+        tmp_path = self.config.metadata_file_path + ".tmp"
+        with open(tmp_path, "w") as file_obj:
+            json.dump(metadata, file_obj, indent=2)
+        os.replace(tmp_path, self.config.metadata_file_path)
+
+    @staticmethod
+    def _compile_preprocessor(preprocessor, features):
+        try:
+            compiled = CompiledPreprocessor.from_preprocessor(preprocessor)
+        except Exception as e:
+            logging.info(f"Preprocessor not exported: {e}")
+            return None
+        if not verify_compiled_preprocessor(preprocessor, compiled, features):
+            return None
+        return compiled.to_dict()
+
+    def initiate_model_export(self):
+        """
+        Returns the largest absolute prediction difference on the test set,
+        or None when the model could not be exported. In that case an
+        export with kind "unsupported" is written, so serving keeps using
+        model.pkl.
+        """
+        try:
+            model = load_object(self.config.model_file_path)
+            preprocessor = load_object(self.config.preprocessor_file_path)
+            model_digest = file_digest(self.config.model_file_path)
+
+            try:
+                nodes, metadata = export_model(model)
+            except ValueError as e:
+                logging.info(f"Model export skipped: {e}")
+                self._write(np.zeros(0, dtype=NODE_DTYPE), {"kind": "unsupported", "model_digest": model_digest})
+                return None
+
+            test_features = read_frame(self.config.test_data_path).drop(columns=[self.config.target_column])
+            X_test = preprocessor.transform(test_features)
+            expected = model.predict(X_test)
+            actual = ExportedModel(nodes, metadata).predict(X_test)
+            max_abs_diff = float(np.max(np.abs(expected - actual))) if len(expected) else 0.0
+
+            if max_abs_diff > self.config.atol:
+                logging.warning(
+                    f"Exported {metadata['model_class']} differs from the original by {max_abs_diff}, "
+                    f"serving from model.pkl"
+                )
+                self._write(np.zeros(0, dtype=NODE_DTYPE), {"kind": "unsupported", "model_digest": model_digest})
+                return None
+
+            metadata["model_digest"] = model_digest
+            metadata["max_abs_diff"] = max_abs_diff
+            # Stored with the trees so serving needs neither library nor sklearn
+            metadata["preprocessor"] = self._compile_preprocessor(preprocessor, test_features)
+            metadata["preprocessor_digest"] = file_digest(self.config.preprocessor_file_path)
+            self._write(nodes, metadata)
+            logging.info(
+                f"Exported {metadata['model_class']} ({len(nodes)} nodes), "
+                f"max abs diff on test set {max_abs_diff:.2e}"
+            )
+            return max_abs_diff
+
+        except Exception as e:
+            raise CustomException(e, sys)
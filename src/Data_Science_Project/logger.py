@@ -1,22 +1,202 @@
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import sys
+import json
+import queue
+import atexit
+import random
+import threading
+from dataclasses import dataclass
 
-# Create the log filename
-LOG_FILE = f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.log"
 
-# Create the logs directory path (without the filename)
-log_dir = os.path.join(os.getcwd(), "logs")
-os.makedirs(log_dir, exist_ok=True)
+@dataclass
+class LoggingConfig:
+    log_dir: str = os.path.join(os.getcwd(), "logs")
+    file_name: str = os.getenv("LOG_FILE", "app.log")
+    # Size-based rotation: app.log, app.log.1 ... app.log.<backup_count>
+    max_bytes: int = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+    backup_count: int = int(os.getenv("LOG_BACKUP_COUNT", 5))
+    # "text" or "json" (one object per line)
+    format: str = os.getenv("LOG_FORMAT", "text")
+    level: str = os.getenv("LOG_LEVEL", "INFO")
+    # Also write every record to stdout (e.g. when a container collects it)
+    stdout: bool = os.getenv("LOG_STDOUT", "0") == "1"
+    # Fraction of sampled_debug() calls that are logged when LOG_LEVEL=DEBUG
+    debug_sample_rate: float = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", 0.01))
 
-# Create the full file path
-LOG_FILE_PATH = os.path.join(log_dir, LOG_FILE)
 
-# Configure logging
-logging.basicConfig(
-    filename=LOG_FILE_PATH,
-    format="[ %(asctime)s ] %(lineno)d %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-)
+TEXT_FORMAT = "[ %(asctime)s ] %(lineno)d %(name)s - %(levelname)s - %(message)s"
 
-print(f"Log file created at: {LOG_FILE_PATH}")
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def _extra_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class TextFormatter(logging.Formatter):
+    """
+    The usual text line, followed by key=value for every `extra=` field.
+    """
+
+    def format(self, record):
+        line = super().format(record)
+        fields = _extra_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value!r}" for key, value in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record, with the `extra=` fields as top-level keys.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "line": record.lineno,
+            "process": record.process,
+            "message": record.getMessage(),
+            **_extra_fields(record),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _SharedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    RotatingFileHandler that creates the logs directory on the first record,
+    so importing the package never touches the filesystem, and that copes
+    with other processes (pre-fork workers) writing to the same file: when
+    another process already rotated it, the file is reopened instead of
+    being rotated a second time.
+    """
+
+    def __init__(self, filename, max_bytes, backup_count):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+    def _rotated_elsewhere(self):
+        try:
+            on_disk = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            return True
+        opened = os.fstat(self.stream.fileno())
+        return (on_disk.st_dev, on_disk.st_ino) != (opened.st_dev, opened.st_ino)
+
+    def shouldRollover(self, record):
+        if not super().shouldRollover(record):
+            return False
+        if self._rotated_elsewhere():
+            self.stream.close()
+            self.stream = self._open()
+            return super().shouldRollover(record)
+        return True
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues the record as it is. The stock QueueHandler formats the message
+    in the calling thread (so it can be pickled to another process); our
+    queue stays in this process, so formatting is left to the listener.
+    Arguments passed to a log call must therefore not be mutated afterwards.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class LogListener:
+    """
+    Owns the background thread that formats queued records and writes them
+    to the rotating file (and stdout). The thread does not survive fork(),
+    so it is stopped before every fork and started again in both processes.
+    It is stopped at interpreter exit; a process leaving through os._exit()
+    must call stop() first or lose the records still queued.
+    """
+
+    def __init__(self, log_queue, handlers):
+        self.queue = log_queue
+        self.handlers = handlers
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = logging.handlers.QueueListener(
+                    self.queue, *self.handlers, respect_handler_level=True
+                )
+                self._listener.start()
+
+    def stop(self):
+        """
+        Writes out every queued record and stops the thread.
+        """
+        with self._lock:
+            if self._listener is not None:
+                self._listener.stop()
+                self._listener = None
+        for handler in self.handlers:
+            handler.flush()
+
+    def _after_fork_in_child(self):
+        # The lock may have been copied while held by another thread
+        self._lock = threading.Lock()
+        self._listener = None
+        self.start()
+
+
+def configure_logging(config: LoggingConfig = None):
+    """
+    Routes the root logger through a queue to a background listener.
+    Returns the LogListener.
+    """
+    config = config or LoggingConfig()
+    formatter = JsonFormatter() if config.format == "json" else TextFormatter(TEXT_FORMAT)
+    handlers = [_SharedRotatingFileHandler(
+        os.path.join(config.log_dir, config.file_name), config.max_bytes, config.backup_count
+    )]
+    if config.stdout:
+        handlers.append(logging.StreamHandler(sys.stdout))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = LogListener(log_queue, handlers)
+    logging.basicConfig(handlers=[_DeferredQueueHandler(log_queue)], level=config.level)
+    listener.start()
+
+    atexit.register(listener.stop)
+    os.register_at_fork(
+        before=listener.stop, after_in_parent=listener.start, after_in_child=listener._after_fork_in_child
+    )
+    return listener
+
+
+LOGGING_CONFIG = LoggingConfig()
+LOG_FILE_PATH = os.path.join(LOGGING_CONFIG.log_dir, LOGGING_CONFIG.file_name)
+log_listener = configure_logging(LOGGING_CONFIG)
+
+_debug_logger = logging.getLogger("debug_events")
+
+
+def sampled_debug(event, **fields):
+    """
+    Logs `event` at DEBUG level with `fields` for a random
+    LOG_DEBUG_SAMPLE_RATE fraction of calls. Costs one level check when
+    DEBUG is off, so it is safe on the request path.
+    """
+    if not _debug_logger.isEnabledFor(logging.DEBUG) or random.random() >= LOGGING_CONFIG.debug_sample_rate:
+        return
+    _debug_logger.debug(event, extra=fields, stacklevel=2)
@@ -0,0 +1,436 @@
+import os
+import sys
+import json
+import time
+import pickle
+import sqlite3
+import hashlib
+from abc import ABC, abstractmethod
+from contextlib import closing
+
+import numpy as np
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.model_selection import GridSearchCV, KFold, ParameterGrid, ParameterSampler
+
+# Halving search is still experimental in scikit-learn and has to be enabled
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingGridSearchCV
+
+from src.Data_Science_Project.logger import logging
+
+
+# Estimator parameters that count boosting rounds / trees and can be used as
+# the resource that successive halving grows between rounds
+RESOURCE_PARAMS = ("n_estimators", "iterations")
+
+
+def make_folds(X, n_splits=3):
+    """
+    The (train, test) index pairs a search cross-validates on. Same splits
+    as cv=n_splits gives a regressor in GridSearchCV; evaluate_model
+    computes them once and shares them between all model families.
+    """
+    return list(KFold(n_splits=n_splits).split(X))
+
+
+def _update_digest(digest, value):
+    if sparse.issparse(value):
+        value = value.tocsr()
+        digest.update(repr(value.shape).encode())
+        for part in (value.data, value.indices, value.indptr):
+            _update_digest(digest, part)
+    elif isinstance(value, np.ndarray):
+        digest.update(f"{value.dtype}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).data)
+    elif isinstance(value, dict):
+        for key in sorted(value):
+            digest.update(repr(key).encode())
+            _update_digest(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _update_digest(digest, item)
+    else:
+        digest.update(pickle.dumps(value))
+
+
+def data_digest(*values):
+    """
+    Content hash of arrays (dense or sparse) and of fit params holding them.
+    """
+    digest = hashlib.sha256()
+    for value in values:
+        _update_digest(digest, value)
+    return digest.hexdigest()
+
+
+def estimator_key(estimator):
+    """
+    Identifies an unfitted estimator: its class, the version of the library
+    it comes from and every parameter it was given.
+    """
+    cls = type(estimator)
+    library = sys.modules.get(cls.__module__.split(".")[0])
+    params = json.dumps(estimator.get_params(deep=False), sort_keys=True, default=repr)
+    return f"{cls.__module__}.{cls.__qualname__}@{getattr(library, '__version__', '')}:{params}"
+
+
+class FitResultCache:
+    """
+    Durable store of cross-validation results, one row per fold fit, keyed
+    by the training data digest, the fold, the estimator class and its
+    parameters. A search over an extended grid only fits the candidates
+    (and folds) it has no row for.
+    """
+
+    def __init__(self, path=os.path.join("artifacts", "fit_cache.sqlite")):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fold_results ("
+                "key TEXT PRIMARY KEY, estimator TEXT, score REAL, fit_time REAL, score_time REAL)"
+            )
+
+    def _connect(self):
+        # A connection per call keeps the cache picklable and thread-agnostic
+        return sqlite3.connect(self.path, timeout=60)
+
+    @staticmethod
+    def fit_key(data_key, fold, estimator):
+        return hashlib.sha256(f"{data_key}|{fold}|{estimator_key(estimator)}".encode()).hexdigest()
+
+    def get_many(self, keys):
+        """
+        Returns {key: (score, fit_time, score_time)} for the keys it holds.
+        """
+        found = {}
+        keys = list(keys)
+        with closing(self._connect()) as conn:
+            # Stay under SQLite's limit on bound parameters
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT key, score, fit_time, score_time FROM fold_results "
+                    f"WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                for key, score, fit_time, score_time in rows:
+                    found[key] = (score, fit_time, score_time)
+        return found
+
+    def put_many(self, rows):
+        """
+        rows: (key, estimator name, score, fit_time, score_time) tuples.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO fold_results VALUES (?, ?, ?, ?, ?)", rows)
+
+
+class SearchStrategy(ABC):
+    """
+    Builds the search object evaluate_model fits for one model family.
+    The returned object must behave like GridSearchCV: fit(), best_estimator_,
+    best_params_, cv_results_ and n_splits_.
+    """
+
+    name = "base"
+    fit_cache = None
+    executor = None
+
+    @abstractmethod
+    def build(self, estimator, param_grid, cv, n_jobs):
+        ...
+
+
+class GridSearch(SearchStrategy):
+    """
+    Exhaustive GridSearchCV, the reproducible default.
+    """
+
+    name = "grid"
+
+    def __init__(self, fit_cache=None, executor=None):
+        self.fit_cache = fit_cache
+        self.executor = executor
+
+    def build(self, estimator, param_grid, cv, n_jobs):
+        if self.fit_cache is not None or self.executor is not None:
+            return CachedSearchCV(
+                estimator, list(ParameterGrid(param_grid)), cv, n_jobs, self.fit_cache, executor=self.executor
+            )
+        return GridSearchCV(estimator, param_grid, cv=cv, n_jobs=n_jobs)
+
+
+class HalvingSearch(SearchStrategy):
+    """
+    Successive halving: every candidate starts with a small number of
+    trees/iterations, and only the best 1/factor move on to the next round
+    with factor times more. Families without a resource parameter, or with
+    too few candidates to halve, fall back to the full grid. Only that
+    fallback goes through the fit cache and work queue: the halving rounds
+    refit every fold with the round's tree count from inside
+    HalvingGridSearchCV, which gives no hook to look up or farm out single
+    fold fits.
+    """
+
+    name = "halving"
+
+    def __init__(self, factor=3, random_state=42, fit_cache=None, executor=None):
+        self.factor = factor
+        self.random_state = random_state
+        self.fit_cache = fit_cache
+        self.executor = executor
+
+    def build(self, estimator, param_grid, cv, n_jobs):
+        name = type(estimator).__name__
+        resource = next((key for key in RESOURCE_PARAMS if key in param_grid), None)
+        if resource is None:
+            # Also the boosting families under early stopping, which drops
+            # n_estimators / iterations from their grid
+            logging.info(f"Halving: {name} has no {'/'.join(RESOURCE_PARAMS)} in its grid, searching the full grid")
+            return GridSearch(self.fit_cache, self.executor).build(estimator, param_grid, cv, n_jobs)
+
+        other_params = {key: values for key, values in param_grid.items() if key != resource}
+        if len(ParameterGrid(other_params)) <= self.factor:
+            logging.info(f"Halving: {name} has too few candidates to halve, searching the full grid")
+            return GridSearch(self.fit_cache, self.executor).build(estimator, param_grid, cv, n_jobs)
+
+        # CatBoost only reports parameters that were set explicitly, and
+        # halving checks that the resource is one of get_params()
+        estimator = clone(estimator).set_params(**{resource: max(param_grid[resource])})
+
+        return HalvingGridSearchCV(
+            estimator,
+            other_params,
+            resource=resource,
+            min_resources="exhaust",
+            max_resources=max(param_grid[resource]),
+            factor=self.factor,
+            cv=cv,
+            n_jobs=n_jobs,
+            random_state=self.random_state,
+        )
+
+
+class RandomSearch(SearchStrategy):
+    """
+    Samples grid points without replacement until a fit-count or wall-clock
+    budget is used up. With neither budget set it degrades to the full grid
+    in random order.
+    """
+
+    name = "random"
+
+    def __init__(self, max_fits=None, time_budget=None, random_state=42, fit_cache=None, executor=None):
+        self.max_fits = max_fits
+        self.time_budget = time_budget
+        self.random_state = random_state
+        self.fit_cache = fit_cache
+        self.executor = executor
+
+    def build(self, estimator, param_grid, cv, n_jobs):
+        return BudgetedRandomSearchCV(
+            estimator,
+            param_grid,
+            cv=cv,
+            n_jobs=n_jobs,
+            max_fits=self.max_fits,
+            time_budget=self.time_budget,
+            random_state=self.random_state,
+            fit_cache=self.fit_cache,
+            executor=self.executor,
+        )
+
+
+def best_candidate(mean_scores, name):
+    """
+    Index of the first of the best mean scores, like GridSearchCV. Failed
+    candidates (NaN, error_score=nan) rank last; if every candidate failed
+    there is nothing to refit, so that is an error.
+    """
+    mean_scores = np.asarray(mean_scores, dtype=float)
+    if np.isnan(mean_scores).all():
+        raise ValueError(f"Every {name} candidate failed to fit; see the warnings above")
+    return int(np.argmax(np.nan_to_num(mean_scores, nan=-np.inf)))
+
+
+def _fit_and_score_fold(estimator, params, X, y, train, test, fit_params):
+    estimator = clone(estimator).set_params(**params)
+    start = time.perf_counter()
+    try:
+        estimator.fit(X[train], y[train], **fit_params)
+    except Exception as e:
+        # Same as GridSearchCV's error_score=np.nan
+        logging.warning(f"Fit failed for {type(estimator).__name__} {params}: {e}")
+        return np.nan, time.perf_counter() - start, 0.0
+    fit_time = time.perf_counter() - start
+    start = time.perf_counter()
+    score = estimator.score(X[test], y[test])
+    return score, fit_time, time.perf_counter() - start
+
+
+class CachedSearchCV:
+    """
+    GridSearchCV over an explicit candidate list that looks every
+    (candidate, fold) up in a FitResultCache first (if one is given) and
+    only fits the missing ones, in a joblib pool or through the executor
+    (work_queue.QueueExecutor). cached_fits_ counts the fold results served
+    from the cache and time_saved_ is the fit + score time they originally
+    took; mean_fit_time/mean_score_time in cv_results_ only count this
+    run's fits.
+    """
+
+    def __init__(self, estimator, candidates, cv, n_jobs, fit_cache, refit=True, executor=None):
+        self.estimator = estimator
+        self.candidates = candidates
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.fit_cache = fit_cache
+        self.refit = refit
+        self.executor = executor
+
+    def fit(self, X, y, **fit_params):
+        folds = make_folds(X, self.cv) if isinstance(self.cv, int) else list(self.cv)
+        self.n_splits_ = len(folds)
+        if self.fit_cache is not None:
+            data_key = data_digest(X, y, fit_params)
+            fold_keys = [f"{i}/{len(folds)}:{data_digest(test)}" for i, (_, test) in enumerate(folds)]
+            keys = [
+                [self.fit_cache.fit_key(data_key, fold_key, clone(self.estimator).set_params(**params))
+                 for fold_key in fold_keys]
+                for params in self.candidates
+            ]
+            cached = self.fit_cache.get_many(key for row in keys for key in row)
+        else:
+            keys = [[(c, i) for i in range(len(folds))] for c in range(len(self.candidates))]
+            cached = {}
+        missing = [(c, i) for c, row in enumerate(keys) for i, key in enumerate(row) if key not in cached]
+
+        if self.executor is not None and missing:
+            fitted = self.executor.map_folds(self.estimator, self.candidates, X, y, folds, fit_params, missing)
+        else:
+            fitted = Parallel(n_jobs=self.n_jobs)(
+                delayed(_fit_and_score_fold)(self.estimator, self.candidates[c], X, y, *folds[i], fit_params)
+                for c, i in missing
+            )
+        fitted = dict(zip(missing, fitted))
+        if self.fit_cache is not None:
+            self.fit_cache.put_many(
+                (keys[c][i], type(self.estimator).__name__, *result)
+                for (c, i), result in fitted.items()
+                if not np.isnan(result[0])
+            )
+
+        shape = (len(self.candidates), len(folds))
+        scores, fit_times, score_times = np.empty(shape), np.zeros(shape), np.zeros(shape)
+        self.cached_fits_, self.time_saved_ = 0, 0.0
+        for c, row in enumerate(keys):
+            for i, key in enumerate(row):
+                if (c, i) in fitted:
+                    scores[c, i], fit_times[c, i], score_times[c, i] = fitted[(c, i)]
+                else:
+                    score, fit_time, score_time = cached[key]
+                    scores[c, i] = score
+                    self.cached_fits_ += 1
+                    self.time_saved_ += fit_time + score_time
+
+        mean_scores = scores.mean(axis=1)
+        self.cv_results_ = {
+            "params": self.candidates,
+            "mean_test_score": mean_scores,
+            "std_test_score": scores.std(axis=1),
+            "mean_fit_time": fit_times.mean(axis=1),
+            "mean_score_time": score_times.mean(axis=1),
+            **{f"split{i}_test_score": scores[:, i] for i in range(len(folds))},
+        }
+        if not self.refit:
+            # A batch of a larger search, which picks the best itself
+            return self
+        best = best_candidate(mean_scores, type(self.estimator).__name__)
+        self.best_index_ = best
+        self.best_params_ = self.candidates[best]
+        self.best_score_ = mean_scores[best]
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_)
+        self.best_estimator_.fit(X, y, **fit_params)
+        return self
+
+
+class BudgetedRandomSearchCV:
+    """
+    Random search over a discrete grid that evaluates candidates in batches
+    and stops as soon as the fit or time budget is exhausted.
+    """
+
+    def __init__(self, estimator, param_grid, cv=3, n_jobs=None,
+                 max_fits=None, time_budget=None, random_state=42, fit_cache=None, executor=None):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.max_fits = max_fits
+        self.time_budget = time_budget
+        self.random_state = random_state
+        self.fit_cache = fit_cache
+        self.executor = executor
+
+    def fit(self, X, y, **fit_params):
+        n_grid = len(ParameterGrid(self.param_grid))
+        n_folds = self.cv if isinstance(self.cv, int) else len(list(self.cv))
+        n_candidates = n_grid
+        if self.max_fits is not None:
+            n_candidates = max(1, min(n_grid, self.max_fits // n_folds))
+        candidates = list(ParameterSampler(self.param_grid, n_iter=n_candidates, random_state=self.random_state))
+
+        # Batches of one candidate per worker keep the budget check fine grained
+        batch_size = max(1, self.n_jobs if self.n_jobs and self.n_jobs > 0 else 1)
+        results = {"params": [], "mean_test_score": [], "mean_fit_time": [], "mean_score_time": []}
+        self.cached_fits_, self.time_saved_ = 0, 0.0
+        start = time.perf_counter()
+        for i in range(0, len(candidates), batch_size):
+            if self.time_budget is not None and results["params"] and time.perf_counter() - start > self.time_budget:
+                logging.info(f"Random search time budget reached after {len(results['params'])} candidates")
+                break
+            # Not GridSearchCV: it raises when every fit of a batch fails,
+            # which with one-candidate batches would end the whole search
+            gs = CachedSearchCV(
+                self.estimator, candidates[i:i + batch_size], self.cv, self.n_jobs, self.fit_cache,
+                refit=False, executor=self.executor,
+            )
+            gs.fit(X, y, **fit_params)
+            self.cached_fits_ += gs.cached_fits_
+            self.time_saved_ += gs.time_saved_
+            self.n_splits_ = gs.n_splits_
+            for key in results:
+                results[key].extend(gs.cv_results_[key])
+
+        self.cv_results_ = {
+            key: (values if key == "params" else np.asarray(values)) for key, values in results.items()
+        }
+        best = best_candidate(self.cv_results_["mean_test_score"], type(self.estimator).__name__)
+        self.best_params_ = self.cv_results_["params"][best]
+        self.best_score_ = self.cv_results_["mean_test_score"][best]
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_)
+        self.best_estimator_.fit(X, y, **fit_params)
+        return self
+
+
+def get_search_strategy(name="grid", max_fits=None, time_budget=None, factor=3, random_state=42,
+                        fit_cache=None, executor=None):
+    """
+    Returns the SearchStrategy registered under `name`, reading and writing
+    fold results through `fit_cache` and running the fits through
+    `executor` if they are given.
+    """
+    if name == "grid":
+        return GridSearch(fit_cache=fit_cache, executor=executor)
+    if name == "halving":
+        return HalvingSearch(factor=factor, random_state=random_state, fit_cache=fit_cache, executor=executor)
+    if name == "random":
+        return RandomSearch(
+            max_fits=max_fits, time_budget=time_budget, random_state=random_state,
+            fit_cache=fit_cache, executor=executor,
+        )
+    raise ValueError(f"Unknown search strategy: {name}")
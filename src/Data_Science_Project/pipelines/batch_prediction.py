@@ -0,0 +1,92 @@
+import os
+import json
+from dataclasses import dataclass
+from itertools import islice
+
+import pandas as pd
+from src.Data_Science_Project.logger import logging
+from src.Data_Science_Project.pipelines.prediction_pipeline import (
+    PredictPipeline,
+    normalize_feature_frame,
+)
+
+
+@dataclass
+class BatchPredictionConfig:
+    # Rows per preprocessor.transform + model.predict call
+    chunk_size: int = int(os.getenv("BATCH_PREDICTION_CHUNK_SIZE", 10000))
+
+
+# What parsing and normalising a bad request body raises (json and CSV
+# decode errors are ValueErrors too); anything else is a server fault
+INVALID_INPUT_ERRORS = (ValueError, KeyError, pd.errors.ParserError)
+
+
+def iter_record_chunks(records, chunk_size):
+    """
+    Yields DataFrames of at most chunk_size rows from an iterable of dicts.
+    """
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield pd.DataFrame.from_records(chunk)
+
+
+def iter_ndjson_chunks(lines, chunk_size):
+    """
+    Yields DataFrames from newline-delimited JSON, skipping blank lines.
+    """
+    records = (json.loads(line) for line in lines if line.strip())
+    return iter_record_chunks(records, chunk_size)
+
+
+def iter_csv_chunks(file_obj, chunk_size):
+    """
+    Yields DataFrames from a CSV file object without reading it all at once.
+    Binary streams (uploads, request bodies) are decoded by pandas. Parsing
+    starts on the first next(), so an empty or unparsable body fails there,
+    where callers already validate the first chunk.
+    """
+    yield from pd.read_csv(file_obj, chunksize=chunk_size)
+
+
+class BatchPredictor:
+    """
+    Scores an iterable of input chunks with one transform and one predict
+    call per chunk, and renders the results chunk by chunk.
+    """
+
+    def __init__(self, predict_pipeline: PredictPipeline = None, config: BatchPredictionConfig = None):
+        self.predict_pipeline = predict_pipeline or PredictPipeline()
+        self.config = config or BatchPredictionConfig()
+
+    def predict_chunks(self, chunks):
+        """
+        Yields (first_row_number, predictions) for every input chunk.
+        Input that cannot be parsed or lacks feature columns raises one of
+        INVALID_INPUT_ERRORS unchanged; a failure to score raises
+        CustomException.
+        """
+        row = 0
+        for chunk in chunks:
+            features = normalize_feature_frame(chunk)
+            preds = self.predict_pipeline.predict(features)
+            yield row, preds
+            row += len(features)
+        logging.info(f"Batch prediction scored {row} rows")
+
+    @staticmethod
+    def render_csv(scored_chunks):
+        yield "row,prediction\n"
+        for start, preds in scored_chunks:
+            yield "".join(f"{start + i},{float(p)}\n" for i, p in enumerate(preds))
+
+    @staticmethod
+    def render_ndjson(scored_chunks):
+        for start, preds in scored_chunks:
+            yield "".join(
+                json.dumps({"row": start + i, "prediction": float(p)}) + "\n"
+                for i, p in enumerate(preds)
+            )
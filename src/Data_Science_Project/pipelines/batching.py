@@ -0,0 +1,171 @@
+import os
+import time
+import queue
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from src.Data_Science_Project.logger import logging
+from src.Data_Science_Project.pipelines.prediction_pipeline import PredictPipeline
+
+
+@dataclass
+class MicroBatchConfig:
+    # Route /predictdata through the coalescer
+    enabled: bool = os.getenv("PREDICTION_MICROBATCH", "0") == "1"
+    # Longest a request waits for others to join its batch
+    max_wait_ms: float = float(os.getenv("PREDICTION_BATCH_MAX_WAIT_MS", 2.0))
+    # A batch is scored as soon as it holds this many rows
+    max_batch_rows: int = int(os.getenv("PREDICTION_BATCH_MAX_ROWS", 64))
+    # On top of max_wait_ms, how long a request waits for its batch to be
+    # scored before it gives up on the batcher and predicts by itself
+    predict_timeout_ms: float = float(os.getenv("PREDICTION_BATCH_PREDICT_TIMEOUT_MS", 1000.0))
+
+
+class _PendingRequest:
+    __slots__ = ("features", "done", "result", "error")
+
+    def __init__(self, features):
+        self.features = features
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent predict() calls. Requests that arrive within
+    max_wait_ms of the first one (or until max_batch_rows rows are queued)
+    are concatenated, scored with a single PredictPipeline.predict call, and
+    each caller gets its own slice of the result back.
+
+    The worker only waits while other callers are inside predict(), so a
+    lone request is scored immediately instead of sitting out the window.
+    If the worker thread died (e.g. it does not survive fork()) it is
+    started again, and a request whose batch is not scored within
+    max_wait_ms + predict_timeout_ms is predicted directly instead.
+    """
+
+    def __init__(self, predict_pipeline: PredictPipeline = None, config: MicroBatchConfig = None):
+        self.predict_pipeline = predict_pipeline or PredictPipeline()
+        self.config = config or MicroBatchConfig()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._active_lock = threading.Lock()
+        self._active = 0
+        self.batches = 0
+        self.requests = 0
+        self.rows = 0
+        self.timeouts = 0
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._start_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    if self._thread is not None:
+                        logging.warning("Prediction batcher thread is gone, starting a new one")
+                        # Requests left in the old queue time out and fall back
+                        self._queue = queue.Queue()
+                    self._thread = threading.Thread(target=self._work, name="prediction-batcher", daemon=True)
+                    self._thread.start()
+
+    def predict(self, features):
+        """
+        Blocks until the batch containing `features` has been scored and
+        returns the predictions for its rows.
+        """
+        self._ensure_worker()
+        pending = _PendingRequest(features)
+        with self._active_lock:
+            self._active += 1
+        try:
+            self._queue.put(pending)
+            scored = pending.done.wait((self.config.max_wait_ms + self.config.predict_timeout_ms) / 1000)
+        finally:
+            with self._active_lock:
+                self._active -= 1
+        if not scored:
+            self.timeouts += 1
+            logging.warning("Micro-batch not scored in time, predicting the request directly")
+            return np.asarray(self.predict_pipeline.predict(features))
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        n_rows = len(batch[0].features)
+        deadline = time.perf_counter() + self.config.max_wait_ms / 1000
+        # Callers already in the batch are still counted in _active
+        while n_rows < self.config.max_batch_rows and len(batch) < self._active:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                pending = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(pending)
+            n_rows += len(pending.features)
+        return batch, n_rows
+
+    def _score(self, batch):
+        if len(batch) == 1:
+            batch[0].result = np.asarray(self.predict_pipeline.predict(batch[0].features))
+            return
+
+        features = pd.concat([pending.features for pending in batch], ignore_index=True)
+        preds = np.asarray(self.predict_pipeline.predict(features))
+        start = 0
+        for pending in batch:
+            end = start + len(pending.features)
+            pending.result = preds[start:end].copy()
+            start = end
+
+    def _work(self):
+        while True:
+            batch, n_rows = self._collect()
+            try:
+                self._score(batch)
+            except Exception:
+                # One bad request must not fail the others, so score them
+                # one by one to find out whose input it was
+                for pending in batch:
+                    try:
+                        pending.result = np.asarray(self.predict_pipeline.predict(pending.features))
+                    except Exception as e:
+                        logging.warning(f"Micro-batched prediction failed: {e}")
+                        pending.error = e
+
+            self.batches += 1
+            self.requests += len(batch)
+            self.rows += n_rows
+            for pending in batch:
+                pending.done.set()
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "rows": self.rows,
+            "timeouts": self.timeouts,
+            "mean_batch_requests": self.requests / self.batches if self.batches else 0.0,
+        }
+
+
+_micro_batcher = None
+_micro_batcher_lock = threading.Lock()
+
+
+def get_micro_batcher():
+    """
+    Returns the process-wide MicroBatcher, creating it on first use.
+    """
+    global _micro_batcher
+    if _micro_batcher is None:
+        with _micro_batcher_lock:
+            if _micro_batcher is None:
+                _micro_batcher = MicroBatcher()
+    return _micro_batcher
@@ -1,28 +1,326 @@
+import os
 import sys
+import threading
+import time
+from collections import namedtuple
+from dataclasses import dataclass
+
 import pandas as pd
 from src.Data_Science_Project.exception import CustomException
-from src.Data_Science_Project.utils import load_object
+from src.Data_Science_Project.logger import logging
+from src.Data_Science_Project.utils import load_object, file_digest
+from src.Data_Science_Project.telemetry import get_registry
+from src.Data_Science_Project.components.compiled_preprocessor import CompiledPreprocessor
+from src.Data_Science_Project.components.prediction_table import (
+    PredictionTable,
+    PredictionTableConfig,
+)
+from src.Data_Science_Project.components.tree_export import ExportedModel, ModelExportConfig
+from src.Data_Science_Project.components.model_monitoring import get_drift_monitor
+
+
+@dataclass
+class PredictPipelineConfig:
+    model_file_path: str = os.path.join("artifacts", "model.pkl")
+    preprocessor_file_path: str = os.path.join("artifacts", "preprocessor.pkl")
+    # Seconds between two stat() checks of the artifact files
+    reload_check_interval: float = float(os.getenv("ARTIFACT_RELOAD_INTERVAL", 1.0))
+    # "mtime" compares (mtime, size), "hash" compares a sha256 of the file contents
+    change_detection: str = os.getenv("ARTIFACT_CHANGE_DETECTION", "mtime")
+    # "model" runs preprocessor + model on every request, "table" answers
+    # from the precomputed prediction table and falls back to the model
+    serving_mode: str = os.getenv("PREDICTION_SERVING_MODE", "model")
+    # Use the flat NumPy encoder instead of ColumnTransformer.transform
+    use_compiled_preprocessor: bool = os.getenv("PREDICTION_COMPILED_PREPROCESSOR", "1") == "1"
+    table_file_path: str = PredictionTableConfig.table_file_path
+    table_metadata_file_path: str = PredictionTableConfig.metadata_file_path
+    # Serve from the NumPy export of model.pkl when one matches it, so
+    # xgboost/catboost are never imported by the web process
+    use_exported_model: bool = os.getenv("PREDICTION_EXPORTED_MODEL", "1") == "1"
+    export_file_path: str = ModelExportConfig.export_file_path
+    export_metadata_file_path: str = ModelExportConfig.metadata_file_path
+
+
+PREDICT_PHASE_SECONDS = get_registry().histogram(
+    "predict_phase_seconds", "Time spent in each phase of PredictPipeline.predict", ["phase"]
+)
+PREDICT_ROWS = get_registry().counter("predict_rows_total", "Rows scored by PredictPipeline.predict")
+
+
+# Input columns in the order the fitted preprocessor was trained on
+FEATURE_COLUMNS = [
+    "gender",
+    "race/ethnicity",
+    "parental level of education",
+    "lunch",
+    "test preparation course",
+    "reading score",
+    "writing score",
+]
+
+# Field names accepted from forms and API clients
+FEATURE_ALIASES = {
+    "ethnicity": "race/ethnicity",
+    "race_ethnicity": "race/ethnicity",
+    "parental_level_of_education": "parental level of education",
+    "test_preparation_course": "test preparation course",
+    "reading_score": "reading score",
+    "writing_score": "writing score",
+}
+
+
+def normalize_feature_frame(df):
+    """
+    Renames aliased input columns and returns the feature columns in training order.
+    """
+    df = df.rename(columns=FEATURE_ALIASES)
+    missing = [col for col in FEATURE_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing input columns: {missing}")
+    return df[FEATURE_COLUMNS]
+
+
+# A preprocessor/model pair that was loaded together. The cache only ever
+# swaps the whole tuple, so a reader can never see a mixed pair.
+# preprocessor is None when the compiled one came from the model export.
+LoadedArtifacts = namedtuple("LoadedArtifacts", ["preprocessor", "model", "compiled", "table", "version"])
+
+
+class ArtifactCache:
+    """
+    Process-wide cache for the fitted preprocessor and model.
+    Artifacts are unpickled once and kept resident; when the files on disk
+    change they are reloaded and swapped in atomically.
+    """
+
+    def __init__(self, config: PredictPipelineConfig = None):
+        self.config = config or PredictPipelineConfig()
+        self._artifacts = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def _file_signature(self, file_path):
+        if self.config.change_detection == "hash":
+            return file_digest(file_path)
+        stat = os.stat(file_path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _table_enabled(self):
+        return self.config.serving_mode == "table" and os.path.exists(self.config.table_metadata_file_path)
+
+    def _export_enabled(self):
+        return self.config.use_exported_model and os.path.exists(self.config.export_metadata_file_path)
+
+    def _signature(self):
+        signature = (
+            self._file_signature(self.config.preprocessor_file_path),
+            self._file_signature(self.config.model_file_path),
+        )
+        if self._table_enabled():
+            signature += (self._file_signature(self.config.table_metadata_file_path),)
+        if self._export_enabled():
+            signature += (self._file_signature(self.config.export_metadata_file_path),)
+        return signature
+
+    def _load_table(self):
+        table = PredictionTable.load(PredictionTableConfig(
+            table_file_path=self.config.table_file_path,
+            metadata_file_path=self.config.table_metadata_file_path,
+        ))
+        # A table built from other artifacts would silently serve stale predictions
+        digest = file_digest(self.config.preprocessor_file_path, self.config.model_file_path)
+        if table.artifact_digest != digest:
+            logging.warning("Prediction table does not match the current artifacts, serving from the model")
+            return None
+        return table
+
+    def _load_exported_model(self):
+        """
+        Returns the ExportedModel for the current model.pkl, or None if the
+        export is missing, unsupported or was made from another model.
+        """
+        if not self._export_enabled():
+            return None
+        exported = ExportedModel.load(ModelExportConfig(
+            export_file_path=self.config.export_file_path,
+            metadata_file_path=self.config.export_metadata_file_path,
+        ))
+        if exported.kind == "unsupported":
+            return None
+        if exported.metadata["model_digest"] != file_digest(self.config.model_file_path):
+            logging.warning("Exported model does not match model.pkl, serving from model.pkl")
+            return None
+        return exported
+
+    def _load_exported_preprocessor(self, exported):
+        """
+        Returns the CompiledPreprocessor stored with the export, or None if it
+        has none or it was built from another preprocessor.pkl.
+        """
+        params = exported.metadata.get("preprocessor")
+        if params is None:
+            return None
+        if exported.metadata.get("preprocessor_digest") != file_digest(self.config.preprocessor_file_path):
+            return None
+        return CompiledPreprocessor.from_dict(params)
+
+    def _compile(self, preprocessor):
+        try:
+            return CompiledPreprocessor.from_preprocessor(preprocessor)
+        except Exception as e:
+            logging.warning(f"Could not compile preprocessor, using ColumnTransformer: {e}")
+            return None
+
+    def _load(self, signature):
+        model = self._load_exported_model()
+        preprocessor = compiled = None
+        if model is not None and self.config.use_compiled_preprocessor:
+            compiled = self._load_exported_preprocessor(model)
+        if compiled is None:
+            # Unpickling the ColumnTransformer imports most of sklearn, so it
+            # is skipped whenever the export carries the preprocessor
+            preprocessor = load_object(file_path=self.config.preprocessor_file_path)
+            compiled = self._compile(preprocessor) if self.config.use_compiled_preprocessor else None
+        if model is None:
+            model = load_object(file_path=self.config.model_file_path)
+        table = self._load_table() if self._table_enabled() else None
+
+        # The files may have been replaced while we were reading them;
+        # only publish the pair if both still match what we started from.
+        if self._signature() != signature:
+            raise RuntimeError("Artifacts changed while loading")
+        return LoadedArtifacts(preprocessor, model, compiled, table, signature)
+
+    def _refresh(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            current = self._artifacts
+            if not force and current is not None and now - self._last_check < self.config.reload_check_interval:
+                return current
+            self._last_check = now
+
+            try:
+                signature = self._signature()
+                if current is not None and current.version == signature:
+                    return current
+
+                loaded = self._load(signature)
+            except Exception as e:
+                if current is None:
+                    raise
+                # Keep serving the previous pair, retry on the next check
+                logging.warning(f"Artifact reload failed, keeping loaded version: {e}")
+                return current
+
+            self.misses += 1
+            if current is not None:
+                self.reloads += 1
+                logging.info("Reloaded preprocessor and model artifacts")
+            else:
+                logging.info("Loaded preprocessor and model artifacts")
+            self._artifacts = loaded
+            return loaded
+
+    def get(self):
+        """
+        Returns the current LoadedArtifacts, loading or reloading them if needed.
+        """
+        current = self._artifacts
+        if current is not None and time.monotonic() - self._last_check < self.config.reload_check_interval:
+            self.hits += 1
+            return current
+
+        loaded = self._refresh()
+        if loaded is current:
+            self.hits += 1
+        return loaded
+
+    def warm(self):
+        """
+        Loads the artifacts eagerly, e.g. at server startup.
+        """
+        return self._refresh(force=True)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "loaded": self._artifacts is not None,
+        }
+
+
+_artifact_cache = None
+_artifact_cache_lock = threading.Lock()
+
+
+def get_artifact_cache():
+    """
+    Returns the process-wide ArtifactCache, creating it on first use.
+    """
+    global _artifact_cache
+    if _artifact_cache is None:
+        with _artifact_cache_lock:
+            if _artifact_cache is None:
+                _artifact_cache = ArtifactCache()
+    return _artifact_cache
 
 
 class PredictPipeline:
-    def __init__(self):
-        pass
+    def __init__(self, artifact_cache: ArtifactCache = None):
+        self.artifact_cache = artifact_cache or get_artifact_cache()
 
     def predict(self,features):
         try:
-            model_path=os.path.join("artifacts","model.pkl")
-            preprocessor_path=os.path.join('artifacts','preprocessor.pkl')
-            print("Before Loading")
-            model=load_object(file_path=model_path)
-            preprocessor=load_object(file_path=preprocessor_path)
-            print("After Loading")
-            data_scaled=preprocessor.transform(features)
-            preds=model.predict(data_scaled)
+            timer = PREDICT_PHASE_SECONDS.timer()
+            PREDICT_ROWS.labels().inc(len(features))
+            # Take one snapshot so the whole request uses a consistent pair
+            artifacts = self.artifact_cache.get()
+            if artifacts.compiled is not None:
+                transform = artifacts.compiled.transform_into_buffer
+            else:
+                transform = artifacts.preprocessor.transform
+            timer.lap("load_artifacts")
+
+            if artifacts.table is not None:
+                preds, found = artifacts.table.lookup(features)
+                timer.lap("table_lookup")
+                if not found.all():
+                    # Anything outside the table goes through the real model
+                    missing = ~found
+                    data_scaled=transform(features[missing])
+                    timer.lap("transform")
+                    preds[missing]=artifacts.model.predict(data_scaled)
+                    timer.lap("predict")
+                self._monitor(features, preds)
+                timer.lap("monitor")
+                return preds
+
+            data_scaled=transform(features)
+            timer.lap("transform")
+            preds=artifacts.model.predict(data_scaled)
+            timer.lap("predict")
+            self._monitor(features, preds)
+            timer.lap("monitor")
             return preds
-        
+
         except Exception as e:
             raise CustomException(e,sys)
 
+    @staticmethod
+    def _monitor(features, preds):
+        monitor = get_drift_monitor()
+        if monitor is None:
+            return
+        try:
+            monitor.observe(features, preds)
+        except Exception as e:
+            # Monitoring must never fail a prediction
+            logging.warning(f"Drift monitor update failed: {e}")
+
 
 
 class CustomData:
@@ -51,17 +349,18 @@ class CustomData:
 
     def get_data_as_data_frame(self):
         try:
+            # Keys must match the column names the preprocessor was fitted on
             custom_data_input_dict = {
                 "gender": [self.gender],
-                "race_ethnicity": [self.race_ethnicity],
-                "parental_level_of_education": [self.parental_level_of_education],
+                "race/ethnicity": [self.race_ethnicity],
+                "parental level of education": [self.parental_level_of_education],
                 "lunch": [self.lunch],
-                "test_preparation_course": [self.test_preparation_course],
-                "reading_score": [self.reading_score],
-                "writing_score": [self.writing_score],
+                "test preparation course": [self.test_preparation_course],
+                "reading score": [self.reading_score],
+                "writing score": [self.writing_score],
             }
 
             return pd.DataFrame(custom_data_input_dict)
 
         except Exception as e:
-            raise CustomException(e, sys)
\ No newline at end of file
+            raise CustomException(e, sys)
@@ -0,0 +1,396 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+from dataclasses import dataclass, asdict
+
+from src.Data_Science_Project.exception import CustomException
+from src.Data_Science_Project.logger import logging
+from src.Data_Science_Project.utils import file_digest, track_resources, load_object, read_frame
+from src.Data_Science_Project.telemetry import TRAINING_BUCKETS, get_registry
+
+from src.Data_Science_Project.components.data_ingestion import DataIngestion
+from src.Data_Science_Project.components.data_transformation import DataTransformation
+from src.Data_Science_Project.components.model_trainer import ModelTrainer
+from src.Data_Science_Project.components.prediction_table import (
+    PredictionTableBuilder,
+    PredictionTableConfig,
+)
+from src.Data_Science_Project.components.tree_export import ModelExportConfig, ModelExporter
+from src.Data_Science_Project.components.model_monitoring import (
+    ModelMonitorConfig,
+    MonitoringBaselineBuilder,
+    batch_drift_report,
+    input_drift_columns,
+)
+
+
+@dataclass
+class TrainingPipelineConfig:
+    stage_cache_dir: str = os.path.join("artifacts", "stage_cache")
+    use_stage_cache: bool = os.getenv("STAGE_CACHE", "1") == "1"
+    # Entries kept per stage; the least recently used ones are evicted
+    stage_cache_max_entries: int = int(os.getenv("STAGE_CACHE_MAX_ENTRIES", 4))
+    # Scoring every feature combination takes seconds and is only read when
+    # serving with PREDICTION_SERVING_MODE=table, so it is built only then
+    # (or when PREDICTION_TABLE=1)
+    build_prediction_table: bool = (
+        os.getenv("PREDICTION_TABLE", "0") == "1" or os.getenv("PREDICTION_SERVING_MODE", "model") == "table"
+    )
+    export_model: bool = True
+    build_monitoring_baseline: bool = True
+    # Rows that arrived since the last training (train.csv layout); when
+    # set, app.py updates the current model with them instead of retraining
+    incremental_data_path: str = os.getenv("INCREMENTAL_DATA_PATH") or None
+    # Timings of every stage, model search and save of the run
+    telemetry_summary_file_path: str = os.path.join("artifacts", "telemetry_summary.json")
+
+
+STAGE_SECONDS = get_registry().histogram(
+    "training_stage_seconds", "Time spent in each training pipeline stage", ["stage", "cache"], TRAINING_BUCKETS
+)
+
+
+@dataclass
+class StageRun:
+    name: str
+    key: str
+    cache_hit: bool
+    wall_time: float
+    # Peak RSS of the process while the stage ran, None where unavailable
+    peak_rss_mb: float = None
+
+
+class StageCache:
+    """
+    Content-addressed store of stage outputs. Each entry lives under
+    <cache_dir>/<stage>/<key>/, where key hashes the stage's input files and
+    config, so switching back to an earlier config restores its outputs.
+    Only the max_entries most recently stored or restored entries of each
+    stage are kept.
+    """
+
+    def __init__(self, cache_dir, max_entries=4):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+    def stage_key(self, name, input_paths, stage_config):
+        digest = hashlib.sha256(name.encode())
+        for path in input_paths:
+            digest.update(path.encode())
+            digest.update(file_digest(path).encode())
+        digest.update(json.dumps(stage_config, sort_keys=True, default=repr).encode())
+        return digest.hexdigest()
+
+    def _entry_dir(self, name, key):
+        return os.path.join(self.cache_dir, name, key)
+
+    def restore(self, name, key):
+        """
+        Copies a cached entry's outputs back into place and returns its
+        manifest, or None on a miss.
+        """
+        manifest_path = os.path.join(self._entry_dir(name, key), "manifest.json")
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path) as file_obj:
+            manifest = json.load(file_obj)
+
+        for output in manifest["outputs"]:
+            target = output["path"]
+            if os.path.exists(target) and file_digest(target) == output["digest"]:
+                continue
+            os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+            tmp_path = target + ".tmp"
+            shutil.copyfile(os.path.join(self._entry_dir(name, key), output["stored_as"]), tmp_path)
+            os.replace(tmp_path, target)
+        # The manifest's mtime is the entry's last use
+        os.utime(manifest_path)
+        return manifest
+
+    def store(self, name, key, output_paths, result):
+        entry_dir = self._entry_dir(name, key)
+        tmp_dir = f"{entry_dir}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        outputs = []
+        for i, path in enumerate(output_paths):
+            stored_as = f"{i}_{os.path.basename(path)}"
+            shutil.copyfile(path, os.path.join(tmp_dir, stored_as))
+            outputs.append({"path": path, "stored_as": stored_as, "digest": file_digest(path)})
+
+        with open(os.path.join(tmp_dir, "manifest.json"), "w") as file_obj:
+            json.dump({"stage": name, "key": key, "outputs": outputs, "result": result}, file_obj, indent=2)
+
+        # Publish the entry in one rename so a crash never leaves half an entry
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+        self.evict(name)
+
+    def evict(self, name):
+        """
+        Removes all but the max_entries most recently used entries of a stage.
+        """
+        stage_dir = os.path.join(self.cache_dir, name)
+        entries = []
+        for key in os.listdir(stage_dir):
+            # .tmp- directories are entries another process is still writing
+            if ".tmp-" in key:
+                continue
+            try:
+                entries.append((os.path.getmtime(os.path.join(stage_dir, key, "manifest.json")), key))
+            except OSError:
+                continue
+        for _, key in sorted(entries, reverse=True)[self.max_entries:]:
+            logging.info(f"Evicting stage cache entry {name}/{key[:12]}")
+            shutil.rmtree(os.path.join(stage_dir, key), ignore_errors=True)
+
+
+def describe_models(models):
+    """
+    JSON-friendly description of unfitted estimators for cache keys.
+    (CatBoost's repr contains an object address, so repr() is not stable.)
+    """
+    return {name: [type(model).__name__, model.get_params()] for name, model in models.items()}
+
+
+class TrainingPipeline:
+    """
+    Runs ingestion -> transformation -> training -> prediction table, and
+    skips any stage whose inputs and config are unchanged since a previous run.
+    """
+
+    def __init__(self, config: TrainingPipelineConfig = None):
+        self.config = config or TrainingPipelineConfig()
+        self.stage_cache = StageCache(self.config.stage_cache_dir, self.config.stage_cache_max_entries)
+        self.stage_runs = []
+
+    def run_stage(self, name, input_paths, stage_config, output_paths, run):
+        """
+        Runs one stage, or restores its outputs from the stage cache.
+        `run` must return a JSON-serializable result.
+        """
+        with track_resources() as usage:
+            key = self.stage_cache.stage_key(name, input_paths, stage_config)
+
+            manifest = self.stage_cache.restore(name, key) if self.config.use_stage_cache else None
+            if manifest is not None:
+                result = manifest["result"]
+            else:
+                result = run()
+                if self.config.use_stage_cache:
+                    self.stage_cache.store(name, key, output_paths, result)
+
+        stage_run = StageRun(name, key, manifest is not None, usage.wall_time, usage.peak_rss_mb)
+        self._record(stage_run)
+        logging.info(
+            f"Stage {name}: {'cache hit' if stage_run.cache_hit else 'ran'} "
+            f"in {stage_run.wall_time:.2f}s, peak rss {stage_run.peak_rss_mb} MB (key {key[:12]})"
+        )
+        return result
+
+    def _record(self, stage_run):
+        self.stage_runs.append(stage_run)
+        STAGE_SECONDS.labels(stage_run.name, "hit" if stage_run.cache_hit else "miss").observe(stage_run.wall_time)
+
+    def log_summary(self):
+        hits = sum(stage_run.cache_hit for stage_run in self.stage_runs)
+        logging.info(f"Training pipeline: {hits}/{len(self.stage_runs)} stages served from cache")
+        for stage_run in self.stage_runs:
+            peak = f"{stage_run.peak_rss_mb:8.1f} MB" if stage_run.peak_rss_mb is not None else "       - MB"
+            logging.info(
+                f"  {stage_run.name:<16} {'hit ' if stage_run.cache_hit else 'miss'} "
+                f"{stage_run.wall_time:8.2f}s {peak}"
+            )
+        self.dump_telemetry()
+
+    def dump_telemetry(self):
+        """
+        Logs the timings collected in this process (stages, model searches,
+        model saves) and writes them to telemetry_summary_file_path.
+        """
+        summary = get_registry().summary()
+        if not summary:
+            return
+        logging.info("Telemetry summary (count, total s, mean s):")
+        for name, stats in summary.items():
+            logging.info(f"  {name:<66} {stats['count']:4d} {stats['total']:10.3f} {stats['mean']:10.4f}")
+        path = self.config.telemetry_summary_file_path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as file_obj:
+            json.dump(summary, file_obj, indent=2)
+
+    def run_model_stages(self, train_data_path, test_data_path):
+        """
+        Rebuilds what is derived from model.pkl: prediction table, model
+        export and monitoring baseline.
+        """
+        if self.config.build_prediction_table:
+            table_config = PredictionTableConfig()
+            self.run_stage(
+                "prediction_table",
+                [table_config.preprocessor_file_path, table_config.model_file_path],
+                asdict(table_config),
+                [table_config.table_file_path, table_config.metadata_file_path],
+                lambda: PredictionTableBuilder(table_config).initiate_table_build(),
+            )
+
+        if self.config.export_model:
+            export_config = ModelExportConfig(test_data_path=test_data_path)
+            self.run_stage(
+                "model_export",
+                [export_config.model_file_path, export_config.preprocessor_file_path, test_data_path],
+                asdict(export_config),
+                [export_config.export_file_path, export_config.metadata_file_path],
+                lambda: ModelExporter(export_config).initiate_model_export(),
+            )
+
+        if self.config.build_monitoring_baseline:
+            monitor_config = ModelMonitorConfig(train_data_path=train_data_path)
+            self.run_stage(
+                "monitoring_baseline",
+                [train_data_path, monitor_config.preprocessor_file_path, monitor_config.model_file_path],
+                asdict(monitor_config),
+                [monitor_config.baseline_file_path],
+                lambda: MonitoringBaselineBuilder(monitor_config).initiate_baseline_build(),
+            )
+
+    def run_incremental(self, new_data_path=None):
+        """
+        Updates the current model with the rows in new_data_path instead of
+        retraining from scratch, keeping the fitted preprocessor. If the new
+        rows drifted from the training baseline, the preprocessor's scaling
+        no longer fits them and this falls back to the full run().
+        Either way the rows are added to the ingestion's appended rows, so
+        the full run (and every later one) trains on them.
+        Returns ModelTrainer.initiate_incremental_training's report.
+        """
+        try:
+            new_data_path = new_data_path or self.config.incremental_data_path
+            data_ingestion = DataIngestion()
+            ingestion_config = data_ingestion.ingestion_config
+            data_transformation = DataTransformation()
+            model_trainer = ModelTrainer()
+
+            features, X_new, y_new = data_transformation.transform_new_rows(new_data_path)
+
+            monitor_config = ModelMonitorConfig()
+            if os.path.exists(monitor_config.baseline_file_path):
+                model = load_object(model_trainer.model_trainer_config.trained_model_file_path)
+                drift = batch_drift_report(features, model.predict(X_new), monitor_config)
+                drifted_columns = input_drift_columns(drift, monitor_config)
+                if drifted_columns:
+                    logging.warning(f"New rows drifted on {drifted_columns}, refitting preprocessor and model")
+                    data_ingestion.append_rows(read_frame(new_data_path))
+                    r2 = self.run()
+                    n_rows = self.check_retrained_on_all_rows(data_ingestion)
+                    return {"method": "full retrain", "drifted_columns": drifted_columns, "r2": r2, "rows": n_rows}
+            else:
+                logging.warning("No monitoring baseline, skipping the drift check on the new rows")
+
+            with track_resources() as usage:
+                seen_data, test_data = data_transformation.load_transformed_arrays()
+                report = model_trainer.initiate_incremental_training(seen_data, (X_new, y_new), test_data)
+                # The saved arrays and train split (which the monitoring
+                # baseline is built from) keep describing everything the
+                # model was trained on
+                new_rows = read_frame(new_data_path)
+                data_transformation.append_train_rows(X_new, y_new)
+                data_ingestion.append_train_rows(new_rows)
+                data_ingestion.append_rows(new_rows)
+            self._record(StageRun("incremental_training", "", False, usage.wall_time, usage.peak_rss_mb))
+
+            self.run_model_stages(ingestion_config.train_data_path, ingestion_config.test_data_path)
+            self.log_summary()
+            return report
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def check_retrained_on_all_rows(self, data_ingestion):
+        """
+        Makes sure the last run() refit the model on the source plus the
+        appended rows instead of restoring an older model from the stage
+        cache. Returns the number of rows in the train and test arrays.
+        """
+        stage_runs = {stage_run.name: stage_run for stage_run in self.stage_runs}
+        for name in ("ingestion", "transformation", "training"):
+            if stage_runs[name].cache_hit:
+                raise RuntimeError(f"Full retrain restored the {name} stage from the cache")
+
+        expected = sum(len(read_frame(path)) for path in data_ingestion.input_paths())
+        (_, y_train), (_, y_test) = DataTransformation().load_transformed_arrays()
+        if len(y_train) + len(y_test) != expected:
+            raise RuntimeError(
+                f"Full retrain used {len(y_train) + len(y_test)} rows, source and appended rows hold {expected}"
+            )
+        return expected
+
+    def run(self):
+        try:
+            data_ingestion = DataIngestion()
+            ingestion_config = data_ingestion.ingestion_config
+            train_data_path, test_data_path = self.run_stage(
+                "ingestion",
+                data_ingestion.input_paths(),
+                asdict(ingestion_config),
+                [ingestion_config.raw_data_path, ingestion_config.train_data_path, ingestion_config.test_data_path],
+                lambda: list(data_ingestion.initiate_data_ingestion()),
+            )
+
+            data_transformation = DataTransformation()
+            transformation_config = data_transformation.data_transformation_config
+            transformed_paths = [
+                transformation_config.train_features_file_path,
+                transformation_config.train_target_file_path,
+                transformation_config.test_features_file_path,
+                transformation_config.test_target_file_path,
+            ]
+            self.run_stage(
+                "transformation",
+                [train_data_path, test_data_path],
+                {
+                    **asdict(transformation_config),
+                    "preprocessor": repr(data_transformation.get_data_transformer_object()),
+                },
+                [
+                    transformation_config.preprocessor_obj_file_path,
+                    *transformed_paths,
+                ],
+                lambda: data_transformation.initiate_data_transformation(train_data_path, test_data_path)[2],
+            )
+
+            model_trainer = ModelTrainer()
+            trainer_config = asdict(model_trainer.model_trainer_config)
+            # The worker count, backend and fit cache change how fast the
+            # search runs, not what it finds; the incremental settings only
+            # apply to run_incremental
+            for key in ("search_n_jobs", "search_backend", "use_fit_cache", "fit_cache_path",
+                        "incremental_rounds", "incremental_sgd_epochs", "compare_incremental_with_full"):
+                trainer_config.pop(key)
+
+            def train():
+                train_data, test_data = data_transformation.load_transformed_arrays()
+                return float(model_trainer.initiate_model_trainer(train_data, test_data))
+
+            r2 = self.run_stage(
+                "training",
+                transformed_paths,
+                {
+                    **trainer_config,
+                    "models": describe_models(model_trainer.get_models()),
+                    "params": model_trainer.get_params(),
+                },
+                [model_trainer.model_trainer_config.trained_model_file_path],
+                train,
+            )
+
+            self.run_model_stages(train_data_path, test_data_path)
+
+            self.log_summary()
+            return r2
+
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from src.Data_Science_Project.utils import read_frame
+
+
+# Column types of the students dataset. Categoricals have a handful of
+# levels and every score is an integer between 0 and 100.
+CATEGORICAL_COLUMNS = [
+    "gender",
+    "race/ethnicity",
+    "parental level of education",
+    "lunch",
+    "test preparation course",
+]
+SCORE_COLUMNS = ["math score", "reading score", "writing score"]
+
+# What CSVs are parsed as. Scores are parsed as float32 so missing values
+# still load; optimize_dtypes narrows them further when possible.
+CSV_DTYPES = {
+    **{col: "category" for col in CATEGORICAL_COLUMNS},
+    **{col: "float32" for col in SCORE_COLUMNS},
+}
+
+
+def optimize_dtypes(df):
+    """
+    Casts known columns in place of pandas' defaults: categoricals to
+    `category`, scores to uint8 when they are whole numbers in 0-255 with no
+    missing values, float32 otherwise. Unknown columns are left alone.
+    """
+    for col in df.columns.intersection(CATEGORICAL_COLUMNS):
+        if df[col].dtype.name != "category":
+            df[col] = df[col].astype("category")
+
+    for col in df.columns.intersection(SCORE_COLUMNS):
+        values = df[col]
+        if not pd.api.types.is_numeric_dtype(values):
+            continue
+        if values.notna().all() and values.between(0, 255).all() and (values % 1 == 0).all():
+            df[col] = values.astype(np.uint8)
+        else:
+            df[col] = values.astype(np.float32)
+    return df
+
+
+def read_with_schema(file_path):
+    """
+    Reads a CSV or Parquet file written by ingestion with the schema dtypes.
+    """
+    if file_path.endswith(".csv"):
+        return optimize_dtypes(read_frame(file_path, dtype=CSV_DTYPES))
+    return optimize_dtypes(read_frame(file_path))
+
+
+def frame_memory_mb(df):
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
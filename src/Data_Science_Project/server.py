@@ -0,0 +1,170 @@
+import os
+import gc
+import sys
+import time
+import signal
+import socket
+import threading
+from dataclasses import dataclass
+
+from src.Data_Science_Project.logger import logging, log_listener
+from src.Data_Science_Project.telemetry import get_registry
+from src.Data_Science_Project.components.model_monitoring import clear_monitoring_snapshots
+
+
+@dataclass
+class PreforkServerConfig:
+    host: str = os.getenv("SERVER_HOST", "0.0.0.0")
+    port: int = int(os.getenv("SERVER_PORT", 5000))
+    # Worker processes; 0 starts one per CPU
+    workers: int = int(os.getenv("SERVER_WORKERS", 0))
+    # Serve each worker's connections from a thread pool instead of one at a time
+    threaded: bool = os.getenv("SERVER_THREADED", "1") == "1"
+    backlog: int = 1024
+    # A worker that dies sooner than this after starting is restarted after a pause
+    min_worker_lifetime: float = 1.0
+
+    def __post_init__(self):
+        if self.workers <= 0:
+            self.workers = os.cpu_count() or 1
+
+
+class PreforkServer:
+    """
+    Pre-fork WSGI server. The parent process imports the app (which loads
+    the preprocessor and model), binds the listening socket and then forks
+    the workers, which all accept on that socket. The loaded artifacts are
+    shared with the workers copy-on-write: the GC is frozen before forking,
+    so collections in the workers never write to those pages.
+
+    Workers that die are restarted. An artifact hot-reload inside a worker
+    gives that worker private copies of the new artifacts; restart the
+    server after retraining to share them again.
+
+    Run `python -m src.Data_Science_Project.server` from the project root.
+    """
+
+    def __init__(self, app, config: PreforkServerConfig = None):
+        self.app = app
+        self.config = config or PreforkServerConfig()
+        self.socket = None
+        self.workers = {}
+        self._stopping = False
+
+    def bind(self):
+        self.socket = socket.create_server(
+            (self.config.host, self.config.port), backlog=self.config.backlog
+        )
+        self.socket.set_inheritable(True)
+        return self.socket
+
+    def _serve(self):
+        from werkzeug.serving import make_server
+
+        server = make_server(
+            self.config.host, self.config.port, self.app,
+            threaded=self.config.threaded, fd=self.socket.fileno(),
+        )
+        server.serve_forever()
+
+    def spawn(self, slot):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            # Start from zero so the parent's counts are not reported by every worker
+            get_registry().reset()
+            exit_code = 0
+            try:
+                self._serve()
+            except BaseException as e:
+                logging.error(f"Worker {slot} crashed: {e}")
+                exit_code = 1
+            finally:
+                # os._exit skips atexit, which would drop the queued log records
+                log_listener.stop()
+                os._exit(exit_code)
+        self.workers[pid] = (slot, time.monotonic())
+        return pid
+
+    def stop(self, signum=None, frame=None):
+        self._stopping = True
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        if self.socket is None:
+            self.bind()
+        # Write out queued log records and stop the log listener thread; the
+        # fork hooks in logger.py start it again in the parent and each worker
+        log_listener.stop()
+        if threading.active_count() > 1:
+            # Only the forking thread exists in the children; locks held by
+            # the others stay locked there forever
+            logging.warning(f"{threading.active_count() - 1} threads are running before fork")
+
+        # Everything allocated so far is shared with the workers; freezing
+        # moves it out of the collector's reach so it is never written to
+        gc.collect()
+        gc.freeze()
+
+        # Metric and drift snapshots of an earlier server would be added to this one's
+        get_registry().clear_snapshots()
+        clear_monitoring_snapshots()
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for slot in range(self.config.workers):
+            self.spawn(slot)
+        logging.info(
+            f"Serving on {self.config.host}:{self.config.port} with {self.config.workers} workers "
+            f"(parent pid {os.getpid()})"
+        )
+
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            slot, started = self.workers.pop(pid, (None, None))
+            if slot is None or self._stopping:
+                continue
+            logging.warning(f"Worker {slot} (pid {pid}) exited with status {status}, restarting it")
+            if time.monotonic() - started < self.config.min_worker_lifetime:
+                time.sleep(self.config.min_worker_lifetime)
+            self.spawn(slot)
+
+        self.socket.close()
+        logging.info("Server stopped")
+
+
+def worker_memory(pid):
+    """
+    Returns the worker's memory in MB from /proc: rss, pss (shared pages
+    split between the processes that map them) and private (pages only this
+    process has). Returns None where /proc/<pid>/smaps_rollup is unavailable.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as file_obj:
+            # The first line is the address range header
+            fields = dict(line.split(":", 1) for line in file_obj.readlines()[1:])
+    except OSError:
+        return None
+
+    def mb(*names):
+        return sum(int(fields[name].split()[0]) for name in names if name in fields) / 1024
+
+    return {
+        "rss": mb("Rss"),
+        "pss": mb("Pss"),
+        "private": mb("Private_Clean", "Private_Dirty"),
+    }
+
+
+if __name__ == "__main__":
+    from application import app
+
+    sys.exit(PreforkServer(app).run())
@@ -0,0 +1,338 @@
+import os
+import json
+import time
+import threading
+from bisect import bisect_right
+from dataclasses import dataclass
+
+from src.Data_Science_Project.logger import logging
+
+
+@dataclass
+class TelemetryConfig:
+    # TELEMETRY=0 turns every timer and counter into a no-op
+    enabled: bool = os.getenv("TELEMETRY", "1") == "1"
+    # Each process writes its metrics here so /metrics can add up all workers
+    snapshot_dir: str = os.path.join("artifacts", "telemetry")
+    snapshot_interval: float = float(os.getenv("TELEMETRY_SNAPSHOT_INTERVAL", 5))
+
+
+# Seconds; from the tens of microseconds of a compiled transform to a slow request
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+# Seconds; training stages and model searches
+TRAINING_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+
+class _Histogram:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        # One slot per bound plus +Inf; cumulated only when rendered
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_right(self.bounds, value)
+        # acquire/release rather than `with`: this is the hot path, and
+        # nothing in between can raise
+        self._lock.acquire()
+        self.counts[i] += 1
+        self.sum += value
+        self._lock.release()
+
+    def state(self):
+        with self._lock:
+            return {"counts": list(self.counts), "sum": self.sum}
+
+
+class _Counter:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        self._lock.acquire()
+        self.value += amount
+        self._lock.release()
+
+    def state(self):
+        return {"value": self.value}
+
+
+class _Null:
+    """
+    Stands in for a histogram, counter or timer when telemetry is disabled.
+    """
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def lap(self, phase):
+        pass
+
+
+_NULL = _Null()
+
+
+class PhaseTimer:
+    """
+    Times consecutive phases of one operation: every lap(phase) records the
+    time since the previous lap (or since the timer was created).
+    """
+
+    __slots__ = ("family", "last")
+
+    def __init__(self, family):
+        self.family = family
+        self.last = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        # Timers only exist while telemetry is enabled, so the child can be
+        # looked up directly
+        child = self.family.children.get((phase,)) or self.family.labels(phase)
+        child.observe(now - self.last)
+        self.last = now
+
+
+class MetricFamily:
+    """
+    A named histogram or counter with one child per combination of label
+    values. Children are created on first use and never removed, so label
+    values must come from a small fixed set (phases, stages, endpoints).
+    """
+
+    def __init__(self, registry, kind, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        self.registry = registry
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self.children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        if not self.registry.config.enabled:
+            return _NULL
+        child = self.children.get(values)
+        if child is None:
+            with self._lock:
+                child = self.children.get(values)
+                if child is None:
+                    child = _Histogram(self.buckets) if self.kind == "histogram" else _Counter()
+                    self.children[values] = child
+        return child
+
+    def timer(self):
+        return PhaseTimer(self) if self.registry.config.enabled else _NULL
+
+    def state(self):
+        with self._lock:
+            children = list(self.children.items())
+        return {
+            "kind": self.kind,
+            "documentation": self.documentation,
+            "label_names": list(self.label_names),
+            "buckets": list(self.buckets),
+            "children": [[list(values), child.state()] for values, child in children],
+        }
+
+
+class MetricsRegistry:
+    """
+    In-process histograms and counters, rendered in the Prometheus text
+    format. Observing costs a bisect and an uncontended lock.
+
+    Every process writes a snapshot of its metrics to snapshot_dir at most
+    every snapshot_interval seconds (from maybe_snapshot(), called once per
+    request); render(merge_workers=True) adds the snapshots of the other
+    processes, so a scrape of any pre-fork worker covers all of them.
+    """
+
+    def __init__(self, config: TelemetryConfig = None):
+        self.config = config or TelemetryConfig()
+        self.families = {}
+        self._lock = threading.Lock()
+        self._last_snapshot = time.monotonic()
+
+    def _family(self, kind, name, documentation, label_names, buckets=LATENCY_BUCKETS):
+        with self._lock:
+            family = self.families.get(name)
+            if family is None:
+                family = MetricFamily(self, kind, name, documentation, label_names, buckets)
+                self.families[name] = family
+            return family
+
+    def histogram(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        return self._family("histogram", name, documentation, label_names, buckets)
+
+    def counter(self, name, documentation, label_names=()):
+        return self._family("counter", name, documentation, label_names)
+
+    def reset(self):
+        """
+        Drops every observation, e.g. in a freshly forked worker.
+        """
+        for family in self.families.values():
+            with family._lock:
+                family.children = {}
+
+    def state(self):
+        return {name: family.state() for name, family in self.families.items()}
+
+    def _snapshot_path(self, pid):
+        return os.path.join(self.config.snapshot_dir, f"{pid}.json")
+
+    def save_snapshot(self):
+        os.makedirs(self.config.snapshot_dir, exist_ok=True)
+        path = self._snapshot_path(os.getpid())
+        with open(path + ".tmp", "w") as file_obj:
+            json.dump(self.state(), file_obj)
+        os.replace(path + ".tmp", path)
+
+    def maybe_snapshot(self):
+        if not self.config.enabled or time.monotonic() - self._last_snapshot < self.config.snapshot_interval:
+            return
+        self._last_snapshot = time.monotonic()
+        try:
+            self.save_snapshot()
+        except OSError as e:
+            logging.warning(f"Could not write telemetry snapshot: {e}")
+
+    def clear_snapshots(self):
+        """
+        Removes the snapshots of earlier processes, so a newly started
+        server counts from zero.
+        """
+        if not os.path.isdir(self.config.snapshot_dir):
+            return
+        for name in os.listdir(self.config.snapshot_dir):
+            try:
+                os.remove(os.path.join(self.config.snapshot_dir, name))
+            except OSError:
+                pass
+
+    def merged_state(self):
+        """
+        This process's metrics plus the latest snapshot of every other process.
+        """
+        merged = self.state()
+        if not os.path.isdir(self.config.snapshot_dir):
+            return merged
+        own = os.path.basename(self._snapshot_path(os.getpid()))
+        for name in os.listdir(self.config.snapshot_dir):
+            if name == own or not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.config.snapshot_dir, name)) as file_obj:
+                    snapshot = json.load(file_obj)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Skipping telemetry snapshot {name}: {e}")
+                continue
+            for family_name, family in snapshot.items():
+                target = merged.setdefault(family_name, {**family, "children": []})
+                children = {tuple(values): state for values, state in target["children"]}
+                for values, state in family["children"]:
+                    current = children.get(tuple(values))
+                    if current is None:
+                        children[tuple(values)] = state
+                    elif "counts" in state and len(state["counts"]) == len(current["counts"]):
+                        current["counts"] = [a + b for a, b in zip(current["counts"], state["counts"])]
+                        current["sum"] += state["sum"]
+                    elif "value" in state:
+                        current["value"] += state["value"]
+                target["children"] = [[list(values), state] for values, state in children.items()]
+        return merged
+
+    def render(self, merge_workers=True):
+        """
+        All metrics in the Prometheus text exposition format (version 0.0.4).
+        """
+        state = self.merged_state() if merge_workers else self.state()
+        lines = []
+        for name, family in sorted(state.items()):
+            lines.append(f"# HELP {name} {family['documentation']}")
+            lines.append(f"# TYPE {name} {family['kind']}")
+            for values, child in sorted(family["children"]):
+                labels = [f'{key}="{_escape(value)}"' for key, value in zip(family["label_names"], values)]
+                if family["kind"] == "counter":
+                    lines.append(f"{name}{_label_set(labels)} {child['value']}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(family["buckets"]) + ["+Inf"], child["counts"]):
+                    cumulative += count
+                    bucket_labels = _label_set(labels + [f'le="{bound}"'])
+                    lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{name}_sum{_label_set(labels)} {child['sum']}")
+                lines.append(f"{name}_count{_label_set(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, prefix=""):
+        """
+        count, total and mean seconds and bucket-estimated p50/p95 of every
+        histogram child whose name starts with prefix.
+        """
+        summary = {}
+        for name, family in self.state().items():
+            if family["kind"] != "histogram" or not name.startswith(prefix):
+                continue
+            for values, child in family["children"]:
+                count = sum(child["counts"])
+                if not count:
+                    continue
+                key = name + _label_set([f'{k}="{v}"' for k, v in zip(family["label_names"], values)])
+                summary[key] = {
+                    "count": count,
+                    "total": round(child["sum"], 6),
+                    "mean": round(child["sum"] / count, 6),
+                    "p50": _bucket_quantile(family["buckets"], child["counts"], 0.5),
+                    "p95": _bucket_quantile(family["buckets"], child["counts"], 0.95),
+                }
+        return summary
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_set(labels):
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def _bucket_quantile(bounds, counts, q):
+    """
+    Upper bound of the bucket the q-quantile falls in (None for +Inf).
+    """
+    target = q * sum(counts)
+    cumulative = 0
+    for bound, count in zip(list(bounds) + [None], counts):
+        cumulative += count
+        if cumulative >= target:
+            return bound
+    return None
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """
+    Returns the process-wide MetricsRegistry, creating it on first use.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry()
+    return _registry
@@ -0,0 +1,318 @@
+import os
+import json
+import time
+import uuid
+import queue
+import atexit
+import shutil
+import threading
+from dataclasses import dataclass
+
+from src.Data_Science_Project.logger import logging
+
+
+@dataclass
+class TrackingConfig:
+    # Local file store by default; point MLFLOW_TRACKING_URI at DagsHub (or
+    # any MLflow server) to log remotely
+    tracking_uri: str = os.getenv("MLFLOW_TRACKING_URI", os.path.join(".", "mlruns"))
+    experiment_name: str = os.getenv("MLFLOW_EXPERIMENT_NAME", "Default")
+    # Runs are staged here until the tracking server has everything; runs left
+    # behind by an unreachable server are uploaded by the next tracker
+    spool_dir: str = os.path.join("artifacts", "mlflow_spool")
+    # How long interpreter exit waits for pending uploads before leaving them
+    # in the spool
+    close_timeout: float = float(os.getenv("MLFLOW_CLOSE_TIMEOUT", 30))
+    # After a failed call, skip the server for this long before retrying
+    retry_interval: float = 60.0
+    # MLflow's log_batch limits
+    max_batch_params: int = 100
+    max_batch_metrics: int = 1000
+
+
+class AsyncTracker:
+    """
+    MLflow logging off the training thread. Calls only enqueue events; a
+    background worker writes each run's state to the spool directory, then
+    uploads new params/metrics with log_batch and model directories with
+    log_artifacts. A run's spool entry is deleted once the server has all
+    of it, so nothing is lost if the server is down or the process exits.
+    """
+
+    def __init__(self, config: TrackingConfig = None):
+        self.config = config or TrackingConfig()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._runs = {}
+        self._client = None
+        self._experiment_ids = {}
+        self._down_since = None
+
+    def _ensure_worker(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, name="mlflow-tracker", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _put(self, *event):
+        self._ensure_worker()
+        self._queue.put(event)
+
+    def start_run(self, tags=None):
+        """
+        Returns a local run id to pass to the other log_* calls.
+        """
+        local_id = uuid.uuid4().hex
+        self._put("start", local_id, dict(tags or {}), int(time.time() * 1000))
+        return local_id
+
+    def log_params(self, local_id, params):
+        self._put("params", local_id, {key: str(value) for key, value in params.items()})
+
+    def log_metrics(self, local_id, metrics, step=0):
+        timestamp = int(time.time() * 1000)
+        self._put("metrics", local_id, [[key, float(value), timestamp, step] for key, value in metrics.items()])
+
+    def log_model(self, local_id, model, artifact_path="model"):
+        """
+        Queues an sklearn-flavoured model. It is serialized to the spool by
+        the worker, so the model must not be mutated afterwards.
+        """
+        self._put("model", local_id, model, artifact_path)
+
+    def end_run(self, local_id, status="FINISHED"):
+        self._put("end", local_id, status, int(time.time() * 1000))
+
+    def flush(self, timeout=None):
+        """
+        Waits until every queued event, and any run an earlier process left
+        in the spool, has been processed. Returns False on timeout. Runs the
+        server rejected stay in the spool either way.
+        """
+        done = threading.Event()
+        self._put("flush", done)
+        return done.wait(timeout)
+
+    def close(self, timeout=None):
+        if self._thread is None or not self._thread.is_alive():
+            return
+        timeout = self.config.close_timeout if timeout is None else timeout
+        self._queue.put(("stop",))
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logging.warning(
+                f"MLflow uploads still pending after {timeout}s; they stay in {self.config.spool_dir}"
+            )
+
+    # Worker side
+
+    def _run_dir(self, local_id):
+        return os.path.join(self.config.spool_dir, local_id)
+
+    def _save_state(self, state):
+        run_dir = self._run_dir(state["local_id"])
+        os.makedirs(run_dir, exist_ok=True)
+        tmp_path = os.path.join(run_dir, "state.json.tmp")
+        with open(tmp_path, "w") as file_obj:
+            json.dump(state, file_obj)
+        os.replace(tmp_path, os.path.join(run_dir, "state.json"))
+
+    def _apply(self, event):
+        kind, local_id = event[0], event[1]
+        if kind == "start":
+            self._runs[local_id] = {
+                "local_id": local_id,
+                "pid": os.getpid(),
+                "run_id": None,
+                "experiment_name": self.config.experiment_name,
+                "tags": event[2],
+                "start_time": event[3],
+                "params": [],
+                "params_sent": 0,
+                "metrics": [],
+                "metrics_sent": 0,
+                "models": [],
+                "status": None,
+                "end_time": None,
+                "terminated": False,
+            }
+            return
+        state = self._runs[local_id]
+        if kind == "params":
+            state["params"].extend(event[2].items())
+        elif kind == "metrics":
+            state["metrics"].extend(event[2])
+        elif kind == "model":
+            import mlflow.sklearn
+
+            model_dir = f"model_{len(state['models'])}"
+            mlflow.sklearn.save_model(event[2], os.path.join(self._run_dir(local_id), model_dir))
+            state["models"].append({"dir": model_dir, "artifact_path": event[3], "sent": False})
+        elif kind == "end":
+            state["status"], state["end_time"] = event[2], event[3]
+
+    def _get_client(self):
+        if self._client is None:
+            from mlflow.tracking import MlflowClient
+
+            self._client = MlflowClient(tracking_uri=self.config.tracking_uri)
+        return self._client
+
+    def _experiment_id(self, client, name):
+        if name not in self._experiment_ids:
+            experiment = client.get_experiment_by_name(name)
+            self._experiment_ids[name] = (
+                experiment.experiment_id if experiment is not None else client.create_experiment(name)
+            )
+        return self._experiment_ids[name]
+
+    def _upload(self, state):
+        """
+        Sends whatever part of the run the server does not have yet. State is
+        saved after every call, so a retry never logs anything twice.
+        """
+        from mlflow.entities import Metric, Param
+
+        client = self._get_client()
+        if state["run_id"] is None:
+            experiment_id = self._experiment_id(client, state["experiment_name"])
+            run = client.create_run(experiment_id, start_time=state["start_time"], tags=state["tags"])
+            state["run_id"] = run.info.run_id
+            self._save_state(state)
+
+        while state["params_sent"] < len(state["params"]):
+            end = state["params_sent"] + self.config.max_batch_params
+            batch = state["params"][state["params_sent"]:end]
+            client.log_batch(state["run_id"], params=[Param(key, value) for key, value in batch])
+            state["params_sent"] += len(batch)
+            self._save_state(state)
+
+        while state["metrics_sent"] < len(state["metrics"]):
+            end = state["metrics_sent"] + self.config.max_batch_metrics
+            batch = state["metrics"][state["metrics_sent"]:end]
+            client.log_batch(state["run_id"], metrics=[Metric(*metric) for metric in batch])
+            state["metrics_sent"] += len(batch)
+            self._save_state(state)
+
+        for model in state["models"]:
+            if not model["sent"]:
+                client.log_artifacts(
+                    state["run_id"], os.path.join(self._run_dir(state["local_id"]), model["dir"]),
+                    model["artifact_path"],
+                )
+                model["sent"] = True
+                self._save_state(state)
+
+        if state["status"] is not None and not state["terminated"]:
+            client.set_terminated(state["run_id"], state["status"], end_time=state["end_time"])
+            state["terminated"] = True
+            self._save_state(state)
+
+    def _sync(self, local_id):
+        state = self._runs[local_id]
+        self._save_state(state)
+        if self._down_since is not None and time.monotonic() - self._down_since < self.config.retry_interval:
+            return
+        try:
+            self._upload(state)
+            self._down_since = None
+        except Exception as e:
+            self._down_since = time.monotonic()
+            logging.warning(f"MLflow tracking server unavailable, run kept in spool: {e}")
+            return
+        if state["terminated"]:
+            shutil.rmtree(self._run_dir(local_id), ignore_errors=True)
+            del self._runs[local_id]
+
+    def _claim_spooled_runs(self):
+        """
+        Picks up runs a previous process left in the spool. A directory is
+        claimed by renaming it, so two trackers never upload the same run.
+        """
+        if not os.path.isdir(self.config.spool_dir):
+            return
+        for name in os.listdir(self.config.spool_dir):
+            state_path = os.path.join(self.config.spool_dir, name, "state.json")
+            if not os.path.exists(state_path):
+                continue
+            with open(state_path) as file_obj:
+                state = json.load(file_obj)
+            # Only runs whose process is gone (it may still be retrying them)
+            if _pid_alive(state.get("pid")):
+                continue
+            local_id = uuid.uuid4().hex
+            try:
+                os.rename(os.path.join(self.config.spool_dir, name), self._run_dir(local_id))
+            except OSError:
+                continue
+            state["local_id"] = local_id
+            self._runs[local_id] = state
+            logging.info(f"Uploading MLflow run spooled by an earlier process ({name})")
+
+    def _work(self):
+        try:
+            self._claim_spooled_runs()
+        except Exception as e:
+            logging.warning(f"Could not read the MLflow spool: {e}")
+        pending = set(self._runs)
+        stop = False
+        while not stop:
+            events = [self._queue.get()]
+            # Coalesce everything queued meanwhile into one upload per run
+            while True:
+                try:
+                    events.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            flushes = []
+            for event in events:
+                if event[0] == "stop":
+                    stop = True
+                elif event[0] == "flush":
+                    flushes.append(event[1])
+                else:
+                    try:
+                        self._apply(event)
+                        pending.add(event[1])
+                    except Exception as e:
+                        logging.warning(f"Dropped MLflow {event[0]} event: {e}")
+
+            if stop:
+                # Last chance before exit: retry the server even if it just failed
+                self._down_since = None
+            for local_id in list(pending):
+                self._sync(local_id)
+                if local_id not in self._runs:
+                    pending.discard(local_id)
+            for done in flushes:
+                done.set()
+
+
+def _pid_alive(pid):
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_tracker():
+    """
+    Process-wide AsyncTracker.
+    """
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = AsyncTracker()
+        return _tracker
@@ -0,0 +1,419 @@
+"""
+Work queue for spreading the hyperparameter search over worker processes,
+on this host or on others.
+
+evaluate_model (through model_search.CachedSearchCV) publishes one task per
+(family, params, fold) fit. Workers lease tasks, fit and score them on the
+published copy of the training arrays and report back. A worker holds a
+lease only while it keeps renewing it, so when a worker dies its task is
+delivered again to another one; a task that keeps killing workers is given
+up after max_attempts deliveries and scores NaN.
+
+The default backend is a SQLite file next to the published arrays. Workers
+on other hosts need both on a shared filesystem:
+
+    python -m src.Data_Science_Project.work_queue worker --queue artifacts/work_queue/queue.sqlite
+
+Other backends implement the WorkQueue methods.
+"""
+import os
+import sys
+import time
+import uuid
+import atexit
+import pickle
+import shutil
+import socket
+import sqlite3
+import argparse
+import threading
+import subprocess
+from abc import ABC, abstractmethod
+from contextlib import closing
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.Data_Science_Project.logger import logging
+from src.Data_Science_Project.utils import save_features, load_features
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@dataclass
+class WorkQueueConfig:
+    queue_path: str = os.getenv("MODEL_SEARCH_QUEUE_PATH", os.path.join("artifacts", "work_queue", "queue.sqlite"))
+    # Worker processes the search starts on this host; 0 leaves all the
+    # work to workers started separately
+    local_workers: int = int(os.getenv("MODEL_SEARCH_QUEUE_WORKERS", 2))
+    # A task whose worker stops renewing its lease for this long is re-delivered
+    lease_seconds: float = 30.0
+    max_attempts: int = 3
+    poll_interval: float = 0.05
+    # Local workers exit after this long without tasks, in case the search
+    # that started them never stops them
+    idle_timeout: float = 300.0
+
+
+class WorkQueue(ABC):
+    """
+    Task store the search and the workers share. Tasks are opaque payloads;
+    a task is pending, leased by one worker until its lease expires, done
+    with a result, or failed.
+    """
+
+    @abstractmethod
+    def publish(self, search_id, payloads):
+        ...
+
+    @abstractmethod
+    def lease(self, worker_id, lease_seconds):
+        """
+        Returns (task_id, payload) for the next pending or expired task, or None.
+        """
+
+    @abstractmethod
+    def renew(self, task_id, worker_id, lease_seconds):
+        ...
+
+    @abstractmethod
+    def complete(self, task_id, result):
+        ...
+
+    @abstractmethod
+    def release(self, worker_id):
+        """
+        Makes the tasks leased by a worker known to be dead pending again.
+        """
+
+    @abstractmethod
+    def finished(self, search_id):
+        """
+        Returns {task_id: (status, result, error)} for the done/failed tasks.
+        """
+
+    def count_finished(self, search_id):
+        return len(self.finished(search_id))
+
+    @abstractmethod
+    def purge(self, search_id):
+        ...
+
+
+class SQLiteWorkQueue(WorkQueue):
+    def __init__(self, path, max_attempts=3):
+        self.path = path
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, search_id TEXT, payload BLOB, "
+                "status TEXT DEFAULT 'pending', attempts INTEGER DEFAULT 0, worker TEXT, "
+                "lease_expires REAL, result BLOB, error TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS tasks_search ON tasks (search_id, status)")
+
+    def _connect(self):
+        # Autocommit; lease() opens its own write transaction
+        return sqlite3.connect(self.path, timeout=60, isolation_level=None)
+
+    def publish(self, search_id, payloads):
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            ids = [
+                conn.execute("INSERT INTO tasks (search_id, payload) VALUES (?, ?)", (search_id, payload)).lastrowid
+                for payload in payloads
+            ]
+            conn.execute("COMMIT")
+        return ids
+
+    def lease(self, worker_id, lease_seconds):
+        with closing(self._connect()) as conn:
+            while True:
+                now = time.time()
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    "SELECT id, payload, attempts FROM tasks "
+                    "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) ORDER BY id LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                task_id, payload, attempts = row
+                if attempts >= self.max_attempts:
+                    conn.execute(
+                        "UPDATE tasks SET status = 'failed', error = ? WHERE id = ?",
+                        (f"worker lost on all {attempts} deliveries", task_id),
+                    )
+                    conn.execute("COMMIT")
+                    continue
+                conn.execute(
+                    "UPDATE tasks SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                    "WHERE id = ?",
+                    (worker_id, now + lease_seconds, task_id),
+                )
+                conn.execute("COMMIT")
+                return task_id, payload
+
+    def renew(self, task_id, worker_id, lease_seconds):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + lease_seconds, task_id, worker_id),
+            )
+
+    def complete(self, task_id, result):
+        # A re-delivered task can be completed twice; the first result stays
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE tasks SET status = 'done', result = ? WHERE id = ? AND status != 'done'",
+                (result, task_id),
+            )
+
+    def release(self, worker_id):
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "UPDATE tasks SET status = 'pending', worker = NULL WHERE worker = ? AND status = 'leased'",
+                (worker_id,),
+            ).rowcount
+
+    def finished(self, search_id):
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id, status, result, error FROM tasks WHERE search_id = ? AND status IN ('done', 'failed')",
+                (search_id,),
+            )
+            return {task_id: (status, result, error) for task_id, status, result, error in rows}
+
+    def count_finished(self, search_id):
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM tasks WHERE search_id = ? AND status IN ('done', 'failed')", (search_id,)
+            ).fetchone()[0]
+
+    def purge(self, search_id):
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM tasks WHERE search_id = ?", (search_id,))
+
+
+def publish_dataset(data_root, X, y, folds, fit_params):
+    """
+    Writes the training arrays and CV folds once per content digest under
+    data_root, and the fit params (eval sets differ between families) next
+    to them once per digest. Returns (data_dir, fit_params_path) for the
+    workers to load them from.
+    """
+    from scipy import sparse
+    from src.Data_Science_Project.model_search import data_digest
+
+    data_dir = os.path.join(data_root, data_digest(X, y, [test for _, test in folds]))
+    if not os.path.isdir(data_dir):
+        tmp_dir = f"{data_dir}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        save_features(os.path.join(tmp_dir, "X.npz" if sparse.issparse(X) else "X.npy"), X)
+        np.save(os.path.join(tmp_dir, "y.npy"), np.asarray(y))
+        with open(os.path.join(tmp_dir, "folds.pkl"), "wb") as file_obj:
+            pickle.dump(folds, file_obj)
+        try:
+            os.replace(tmp_dir, data_dir)
+        except OSError:
+            # Another search published the same data first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    fit_params_path = os.path.join(data_dir, f"fit_params-{data_digest(fit_params)}.pkl")
+    if not os.path.exists(fit_params_path):
+        tmp_path = f"{fit_params_path}.tmp-{os.getpid()}"
+        with open(tmp_path, "wb") as file_obj:
+            pickle.dump(fit_params, file_obj)
+        os.replace(tmp_path, fit_params_path)
+    return data_dir, fit_params_path
+
+
+def load_dataset(data_dir):
+    X_path = os.path.join(data_dir, "X.npz")
+    X = load_features(X_path if os.path.exists(X_path) else os.path.join(data_dir, "X.npy"))
+    y = np.load(os.path.join(data_dir, "y.npy"), mmap_mode="r")
+    with open(os.path.join(data_dir, "folds.pkl"), "rb") as file_obj:
+        folds = pickle.load(file_obj)
+    return X, y, folds
+
+
+class QueueWorker:
+    """
+    Leases tasks until stopped (or idle for idle_timeout), renewing the
+    lease from a background thread while a fit runs.
+    """
+
+    def __init__(self, queue: WorkQueue, config: WorkQueueConfig = None, worker_id=None):
+        self.queue = queue
+        self.config = config or WorkQueueConfig()
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        # The last dataset and fit params loaded, as (path, value)
+        self._dataset = (None, None)
+        self._fit_params = (None, None)
+
+    def _load(self, data_dir, fit_params_path):
+        if self._dataset[0] != data_dir:
+            self._dataset = (data_dir, load_dataset(data_dir))
+        if self._fit_params[0] != fit_params_path:
+            with open(fit_params_path, "rb") as file_obj:
+                self._fit_params = (fit_params_path, pickle.load(file_obj))
+        return (*self._dataset[1], self._fit_params[1])
+
+    def _renew_until(self, task_id, done):
+        interval = self.config.lease_seconds / 3
+        while not done.wait(interval):
+            self.queue.renew(task_id, self.worker_id, self.config.lease_seconds)
+
+    def run_task(self, task_id, payload):
+        from src.Data_Science_Project.model_search import _fit_and_score_fold
+
+        task = pickle.loads(payload)
+        done = threading.Event()
+        renewer = threading.Thread(target=self._renew_until, args=(task_id, done), daemon=True)
+        renewer.start()
+        try:
+            X, y, folds, fit_params = self._load(task["data_dir"], task["fit_params_path"])
+            train, test = folds[task["fold"]]
+            result = _fit_and_score_fold(task["estimator"], task["params"], X, y, train, test, fit_params)
+        finally:
+            done.set()
+            renewer.join()
+        self.queue.complete(task_id, pickle.dumps(result))
+
+    def run(self):
+        logging.info(f"Work queue worker {self.worker_id} started")
+        idle_since = time.monotonic()
+        while True:
+            leased = self.queue.lease(self.worker_id, self.config.lease_seconds)
+            if leased is None:
+                if self.config.idle_timeout and time.monotonic() - idle_since > self.config.idle_timeout:
+                    logging.info(f"Work queue worker {self.worker_id} idle, exiting")
+                    return 0
+                time.sleep(self.config.poll_interval)
+                continue
+            self.run_task(*leased)
+            idle_since = time.monotonic()
+
+
+class QueueExecutor:
+    """
+    Runs a search's fold fits through the work queue: publishes the data and
+    one task per fit, keeps the local workers alive (a dead one's tasks are
+    released straight away instead of waiting for the lease to run out) and
+    waits for every task to finish.
+    """
+
+    def __init__(self, config: WorkQueueConfig = None, queue: WorkQueue = None):
+        self.config = config or WorkQueueConfig()
+        self.queue = queue or SQLiteWorkQueue(self.config.queue_path, self.config.max_attempts)
+        # Absolute, so workers started from another directory (or another
+        # host with the same shared mount) find the published data
+        self.data_root = os.path.abspath(os.path.join(os.path.dirname(self.config.queue_path) or ".", "data"))
+        self.workers = {}
+        self.published = set()
+        self.redelivered = 0
+        atexit.register(self.close)
+
+    def _spawn(self, slot):
+        worker_id = f"{socket.gethostname()}:local-{slot}-{uuid.uuid4().hex[:8]}"
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [REPO_ROOT, os.getenv("PYTHONPATH")]))}
+        process = subprocess.Popen(
+            [sys.executable, "-m", "src.Data_Science_Project.work_queue", "worker",
+             "--queue", os.path.abspath(self.config.queue_path), "--worker-id", worker_id,
+             "--idle-timeout", str(self.config.idle_timeout)],
+            env=env,
+        )
+        self.workers[slot] = (process, worker_id)
+
+    def ensure_workers(self):
+        for slot in range(self.config.local_workers):
+            if slot in self.workers:
+                process, worker_id = self.workers[slot]
+                if process.poll() is None:
+                    continue
+                released = self.queue.release(worker_id)
+                self.redelivered += released
+                logging.warning(
+                    f"Work queue worker {worker_id} exited with {process.returncode}, "
+                    f"re-delivering {released} tasks and restarting it"
+                )
+            self._spawn(slot)
+
+    def map_folds(self, estimator, candidates, X, y, folds, fit_params, pairs):
+        """
+        Returns (score, fit_time, score_time) for every (candidate, fold)
+        index pair, in order.
+        """
+        from sklearn.base import clone
+
+        data_dir, fit_params_path = publish_dataset(self.data_root, X, y, folds, fit_params)
+        self.published.add(data_dir)
+        search_id = uuid.uuid4().hex
+        payloads = [
+            pickle.dumps({
+                "data_dir": data_dir,
+                "fit_params_path": fit_params_path,
+                "estimator": clone(estimator),
+                "params": candidates[c],
+                "fold": i,
+            })
+            for c, i in pairs
+        ]
+        task_ids = self.queue.publish(search_id, payloads)
+
+        try:
+            while self.queue.count_finished(search_id) < len(task_ids):
+                self.ensure_workers()
+                time.sleep(self.config.poll_interval)
+            finished = self.queue.finished(search_id)
+        finally:
+            self.queue.purge(search_id)
+
+        results = []
+        for task_id in task_ids:
+            status, result, error = finished[task_id]
+            if status == "failed":
+                logging.warning(f"Work queue task {task_id} failed: {error}")
+                results.append((np.nan, 0.0, 0.0))
+            else:
+                results.append(pickle.loads(result))
+        return results
+
+    def close(self):
+        for process, worker_id in self.workers.values():
+            if process.poll() is None:
+                process.terminate()
+        for process, worker_id in self.workers.values():
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.workers = {}
+        for data_dir in self.published:
+            shutil.rmtree(data_dir, ignore_errors=True)
+        self.published = set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    worker_parser = commands.add_parser("worker")
+    worker_parser.add_argument("--queue", default=WorkQueueConfig.queue_path)
+    worker_parser.add_argument("--worker-id", default=None)
+    # 0 keeps the worker running until it is stopped
+    worker_parser.add_argument("--idle-timeout", type=float, default=0)
+    worker_parser.add_argument("--lease-seconds", type=float, default=WorkQueueConfig.lease_seconds)
+    args = parser.parse_args(argv)
+
+    config = WorkQueueConfig(queue_path=args.queue, idle_timeout=args.idle_timeout, lease_seconds=args.lease_seconds)
+    queue = SQLiteWorkQueue(config.queue_path, config.max_attempts)
+    return QueueWorker(queue, config, worker_id=args.worker_id).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import os
+import warnings
+
+import pytest
+from sklearn.linear_model import Ridge
+
+from src.Data_Science_Project.utils import read_frame, save_object
+from src.Data_Science_Project.components.data_ingestion import DataIngestion, DataIngestionConfig
+from src.Data_Science_Project.components.data_transformation import DataTransformation
+from src.Data_Science_Project.components.prediction_table import PredictionTableBuilder, PredictionTableConfig
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DATA_PATH = os.path.join(REPO_ROOT, "notebook", "data", "raw.csv")
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_dir(tmp_path, monkeypatch):
+    """
+    Every test runs in its own empty directory, so the relative artifacts/
+    paths of the configs never touch the repository.
+    """
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def source_data_path():
+    return SOURCE_DATA_PATH
+
+
+@pytest.fixture
+def source_frame():
+    return read_frame(SOURCE_DATA_PATH)
+
+
+@pytest.fixture(scope="session")
+def trained_artifacts(tmp_path_factory):
+    """
+    Runs ingestion and transformation on the students dataset, fits a
+    Ridge and builds a prediction table for scores 40-60.
+    Returns the directory holding artifacts/.
+    """
+    root = tmp_path_factory.mktemp("trained")
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        data_ingestion = DataIngestion()
+        data_ingestion.ingestion_config = DataIngestionConfig(source_data_path=SOURCE_DATA_PATH)
+        train_path, test_path = data_ingestion.initiate_data_ingestion()
+
+        data_transformation = DataTransformation()
+        data_transformation.initiate_data_transformation(train_path, test_path)
+        (X_train, y_train), _ = data_transformation.load_transformed_arrays()
+        save_object(os.path.join("artifacts", "model.pkl"), Ridge().fit(X_train, y_train))
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            PredictionTableBuilder(_table_config(root)).initiate_table_build()
+    finally:
+        os.chdir(cwd)
+    return root
+
+
+@pytest.fixture
+def table_config(trained_artifacts):
+    return _table_config(trained_artifacts)
+
+
+def _table_config(root):
+    artifacts = os.path.join(root, "artifacts")
+    return PredictionTableConfig(
+        table_file_path=os.path.join(artifacts, "prediction_table.npy"),
+        metadata_file_path=os.path.join(artifacts, "prediction_table.json"),
+        preprocessor_file_path=os.path.join(artifacts, "preprocessor.pkl"),
+        model_file_path=os.path.join(artifacts, "model.pkl"),
+        score_min=40,
+        score_max=60,
+    )
@@ -0,0 +1,11 @@
+from src.Data_Science_Project.benchmarks.import_time import ImportTimeConfig, run_import_check
+
+
+def test_serving_import_is_lean_and_has_no_side_effects():
+    """
+    Fails when importing the serving modules pulls in a training-only
+    dependency, prints, creates files or takes longer than the budget
+    (IMPORT_TIME_BUDGET_MS, median of 3 fresh interpreters).
+    """
+    report = run_import_check(ImportTimeConfig(runs=3))
+    assert not report["failures"], "; ".join(report["failures"])
@@ -0,0 +1,79 @@
+import os
+import json
+
+import numpy as np
+import pytest
+
+from src.Data_Science_Project.components.prediction_table import PredictionTable
+from src.Data_Science_Project.pipelines.prediction_pipeline import (
+    FEATURE_COLUMNS,
+    ArtifactCache,
+    PredictPipeline,
+    PredictPipelineConfig,
+)
+
+
+def predict_pipeline(table_config, serving_mode):
+    return PredictPipeline(ArtifactCache(PredictPipelineConfig(
+        model_file_path=table_config.model_file_path,
+        preprocessor_file_path=table_config.preprocessor_file_path,
+        serving_mode=serving_mode,
+        table_file_path=table_config.table_file_path,
+        table_metadata_file_path=table_config.metadata_file_path,
+        use_exported_model=False,
+    )))
+
+
+@pytest.fixture
+def features(source_frame, table_config):
+    rng = np.random.default_rng(0)
+    features = source_frame[FEATURE_COLUMNS].copy()
+    for col in ("reading score", "writing score"):
+        features[col] = rng.integers(table_config.score_min, table_config.score_max + 1, len(features))
+    return features
+
+
+def test_table_serves_what_the_model_predicts(table_config, features):
+    preds, found = PredictionTable.load(table_config).lookup(features)
+    assert found.all()
+
+    expected = predict_pipeline(table_config, "model").predict(features)
+    np.testing.assert_allclose(preds, expected, rtol=1e-5, atol=1e-4)
+    np.testing.assert_allclose(predict_pipeline(table_config, "table").predict(features), expected, rtol=1e-5, atol=1e-4)
+
+
+def test_single_row_lookup_matches_frame_lookup(table_config, features):
+    table = PredictionTable.load(table_config)
+    preds, _ = table.lookup(features)
+    # Frames up to SMALL_FRAME_ROWS rows take the dict lookup path
+    for i in range(5):
+        row_preds, row_found = table.lookup(features.iloc[i:i + 1])
+        assert row_found.all()
+        assert row_preds[0] == preds[i]
+
+
+def test_rows_outside_the_table_fall_back_to_the_model(table_config, features):
+    features = features.head(4).copy()
+    features["reading score"] = features["reading score"].astype(float)
+    features.loc[features.index[0], "reading score"] = 50.5
+    features.loc[features.index[1], "writing score"] = table_config.score_max + 1
+    features.loc[features.index[2], "gender"] = "unknown"
+
+    _, found = PredictionTable.load(table_config).lookup(features)
+    assert found.tolist() == [False, False, False, True]
+
+    expected = predict_pipeline(table_config, "model").predict(features)
+    np.testing.assert_allclose(predict_pipeline(table_config, "table").predict(features), expected, rtol=1e-5, atol=1e-4)
+
+
+def test_table_of_other_artifacts_is_not_served(table_config, tmp_path):
+    with open(table_config.metadata_file_path) as file_obj:
+        metadata = json.load(file_obj)
+    metadata["artifact_digest"] = "0" * 64
+    stale_metadata_path = os.path.join(tmp_path, "prediction_table.json")
+    with open(stale_metadata_path, "w") as file_obj:
+        json.dump(metadata, file_obj)
+
+    table_config.metadata_file_path = stale_metadata_path
+    artifacts = predict_pipeline(table_config, "table").artifact_cache.get()
+    assert artifacts.table is None
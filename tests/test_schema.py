@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from src.Data_Science_Project.schema import CATEGORICAL_COLUMNS, SCORE_COLUMNS, optimize_dtypes, read_with_schema
+from src.Data_Science_Project.components.data_transformation import DataTransformation
+
+
+def test_schema_dtypes_keep_every_value(source_data_path):
+    default = pd.read_csv(source_data_path)
+    typed = read_with_schema(source_data_path)
+
+    for col in CATEGORICAL_COLUMNS:
+        assert typed[col].dtype.name == "category"
+    for col in SCORE_COLUMNS:
+        assert typed[col].dtype == np.uint8
+    pd.testing.assert_frame_equal(typed.astype(default.dtypes.to_dict()), default)
+    assert typed.memory_usage(deep=True).sum() < default.memory_usage(deep=True).sum() / 4
+
+
+def test_scores_that_do_not_fit_a_byte_stay_float(source_frame):
+    df = source_frame.head(3).copy()
+    df["math score"] = [np.nan, 50.0, 70.0]
+    df["reading score"] = [300, 50, 70]
+    df = optimize_dtypes(df)
+    assert df["math score"].dtype == np.float32
+    assert df["reading score"].dtype == np.float32
+    assert df["writing score"].dtype == np.uint8
+
+
+def transform(features, feature_dtype):
+    data_transformation = DataTransformation()
+    data_transformation.data_transformation_config.feature_dtype = feature_dtype
+    preprocessor = data_transformation.get_data_transformer_object().fit(features)
+    return data_transformation.transform_features(preprocessor, features)
+
+
+def test_schema_typed_features_transform_like_default_dtypes(source_data_path):
+    default = pd.read_csv(source_data_path).drop(columns=["math score"])
+    typed = read_with_schema(source_data_path).drop(columns=["math score"])
+    np.testing.assert_array_equal(transform(typed, "float64"), transform(default, "float64"))
+
+
+def test_float32_features_match_float64(source_data_path):
+    features = read_with_schema(source_data_path).drop(columns=["math score"])
+    X64 = transform(features, "float64")
+    X32 = transform(features, "float32")
+    assert X32.dtype == np.float32
+    np.testing.assert_allclose(X32, X64, rtol=1e-6, atol=1e-6)
@@ -0,0 +1,44 @@
+import pandas as pd
+
+from src.Data_Science_Project.components.data_ingestion import DataIngestion, DataIngestionConfig, is_test_row
+
+
+def streaming_ingestion(source_data_path, chunk_size):
+    data_ingestion = DataIngestion()
+    data_ingestion.ingestion_config = DataIngestionConfig(
+        source_data_path=source_data_path, streaming=True, data_format="csv", chunk_size=chunk_size,
+    )
+    return data_ingestion.initiate_data_ingestion()
+
+
+def read_text(path):
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def test_split_covers_every_source_row_once(source_data_path):
+    train_path, test_path = streaming_ingestion(source_data_path, chunk_size=128)
+    source = read_text(source_data_path)
+    train, test = read_text(train_path), read_text(test_path)
+
+    assert len(train) + len(test) == len(source)
+    merged = pd.concat([train, test]).sort_values(list(source.columns)).reset_index(drop=True)
+    pd.testing.assert_frame_equal(merged, source.sort_values(list(source.columns)).reset_index(drop=True))
+    assert abs(len(test) / len(source) - 0.2) < 0.05
+
+
+def test_split_does_not_depend_on_chunk_size(source_data_path):
+    splits = []
+    for chunk_size in (37, 100_000):
+        train_path, test_path = streaming_ingestion(source_data_path, chunk_size)
+        splits.append((read_text(train_path), read_text(test_path)))
+    for small, large in zip(*splits):
+        pd.testing.assert_frame_equal(small, large)
+
+
+def test_appending_rows_never_moves_existing_rows(source_data_path):
+    source = read_text(source_data_path)
+    extra = source.sample(200, random_state=0).assign(**{"math score": "1"})
+
+    before = is_test_row(source)
+    after = is_test_row(pd.concat([source, extra], ignore_index=True))
+    assert (after[:len(source)] == before).all()